@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+SkyLink Hot Path Benchmarks
+Times each per-frame / per-message stage separately, on a CPU-only box with synthetic inputs
+
+This script:
+1. Imports drone_control_V2.py without starting its threads (no camera or autopilot needed)
+2. Times the CameraManager stages (HUD, heatmap, detection overlay), the MJPEG JPEG
+   encode, the WebRTC av.VideoFrame conversion, the WebSocket stick message parsing
+   and the run_mavlink_loop smoothing + MANUAL_CONTROL send, alone and for a 40-drone fleet,
+   plus the telemetry journal append and flush
+3. Times the bridge building blocks (parser, batcher, policy) and runs bridge_throughput.py
+4. Writes everything to a JSON file, tagged with the git commit, for --compare
+
+Stages whose dependencies are missing are reported as skipped rather than failing the run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np  # Imported lazily at run time, so a missing numpy only skips the app stages
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(REPO_ROOT, "server", "scripts")
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+WIDTH, HEIGHT = 640, 480
+STICK_MESSAGE = '{"l":{"x":0.12,"y":-0.4},"r":{"x":-0.3,"y":0.55}}'
+ARM_MESSAGE = '{"action":"ARM"}'
+APP_GROUPS = ("camera", "detections", "mjpeg", "webrtc", "ws", "mavlink", "worker", "fleet", "journal")
+FLEET_SIZE = 40
+
+def measure(fn: Callable[[], object], seconds: float, min_rounds: int = 20) -> dict:
+    """Calls fn repeatedly for about `seconds` and summarises the per-call time in microseconds"""
+    fn()  # Warm-up: lazy imports, allocator, caches
+    # Group calls so each timed round lasts >= ~1 ms and timer overhead stays negligible
+    started = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - started, 1e-7)
+    number = max(1, int(0.001 / single))
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + seconds
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "unit": "us",
+        "median": median,
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean": statistics.fmean(samples),
+        "min": samples[0],
+        "rounds": len(samples),
+        "calls_per_round": number,
+        "ops_per_sec": 1e6 / median if median else 0.0,
+    }
+
+def synthetic_color(rng) -> "np.ndarray":
+    """Smooth gradients plus sensor noise: compresses like a real scene, unlike pure noise"""
+    import numpy as np
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+    img = np.stack([(x * 255 // WIDTH), (y * 255 // HEIGHT), ((x + y) * 255 // (WIDTH + HEIGHT))], axis=-1)
+    img = img.astype(np.int16) + rng.integers(-12, 12, size=img.shape, dtype=np.int16)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+def synthetic_depth(rng) -> "np.ndarray":
+    """z16 depth in millimetres: a floor ramp from 8 m to 0.5 m, noise and a few holes"""
+    import numpy as np
+    ramp = np.linspace(8000, 500, HEIGHT, dtype=np.float32)[:, None].repeat(WIDTH, axis=1)
+    depth = (ramp + rng.normal(0, 40, size=ramp.shape)).astype(np.uint16)
+    depth[rng.random(size=depth.shape) < 0.03] = 0
+    return depth
+
+def synthetic_detections(rng, count: int) -> "np.ndarray":
+    """People-sized boxes in the app's detection layout (x1, y1, x2, y2, cls, conf, track, dist)"""
+    import numpy as np
+    dets = np.zeros((count, 8), np.int32)
+    for row in dets:
+        x1, y1 = int(rng.integers(0, WIDTH - 120)), int(rng.integers(20, HEIGHT - 200))
+        row[:] = (x1, y1, x1 + 100, y1 + 180, 0, int(rng.integers(500, 1000)), 0, int(rng.integers(500, 8000)))
+    return dets
+
+class NullLink:
+    """Write sink for pymavlink: keeps the pack + CRC cost, drops the bytes"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data: bytes) -> int:
+        self.bytes += len(data)
+        return len(data)
+
+class LinkStandIn:
+    """What DroneController.send_manual_control needs from a mavutil connection"""
+
+    def __init__(self, mavlink_module):
+        self.mav = mavlink_module.MAVLink(NullLink(), srcSystem=255, srcComponent=190)
+        self.target_system = 1
+
+def bench_app(seconds: float, boxes: int, inference: bool) -> Dict[str, dict]:
+    sys.path.insert(0, REPO_ROOT)
+    try:
+        import numpy as np
+        import drone_control_V2 as app
+        from pymavlink import mavutil
+    except Exception as e:
+        return {"app": {"skipped": f"drone_control_V2 import failed: {e!r}"}}
+
+    rng = np.random.default_rng(0)
+    color = synthetic_color(rng)
+    depth = synthetic_depth(rng)
+    dets = synthetic_detections(rng, boxes)
+    cam, drone, guard = app.cam, app.drone, app.guard
+    results: Dict[str, dict] = {}
+
+    canvas = color.copy()
+    results["camera.hud"] = measure(lambda: cam.draw_hud(canvas), seconds)
+    results["camera.heatmap"] = measure(lambda: cam.render_heatmap(depth), seconds)
+    results["camera.detection_overlay"] = measure(lambda: cam.draw_detections(canvas, dets), seconds)
+    gate = app.MotionGate(max_age=3600)
+    gate.should_run(color)
+    results["camera.motion_gate"] = measure(lambda: gate.should_run(color), seconds)
+    results["camera.obstacle_sectors"] = measure(lambda: app.obstacle_sectors(depth, cam.depth_scale), seconds)
+    results["detections.distance"] = measure(lambda: cam.measure_distances(dets, depth), seconds)
+    moved = dets.copy()
+    moved[:, :4] += 3  # Next frame: everyone shifted a little
+    tracker = app.IouTracker()
+    tracker.update(dets.copy())
+    results["detections.track"] = measure(lambda: tracker.update(moved.copy()), seconds)
+    results["detections.encode"] = measure(lambda: app.encode_detections(1, dets), seconds)
+    results["detections.encode"]["bytes"] = len(app.encode_detections(1, dets))
+
+    cam.ai_enabled, cam.view_mode = False, "normal"
+    results["camera.process_frame.normal"] = measure(lambda: cam.process_frame(canvas, depth), seconds)
+    cam.view_mode = "heatmap"
+    results["camera.process_frame.heatmap"] = measure(lambda: cam.process_frame(canvas, depth), seconds)
+    cam.view_mode = "normal"
+    if inference:
+        cam.load_model()
+        cam.device = "cpu"
+        results["camera.detect"] = measure(lambda: cam.detect(color), seconds, min_rounds=5)
+
+    cam.frame = color.copy()
+    results["mjpeg.encode_jpeg"] = measure(lambda: app.encode_jpeg(cam.frame), seconds)
+    results["mjpeg.encode_jpeg"]["bytes"] = len(app.encode_jpeg(cam.frame))
+    results["webrtc.video_frame"] = measure(app.pilot_video_frame, seconds)
+    guard.video_enabled = False
+    results["webrtc.video_frame.blocked"] = measure(app.pilot_video_frame, seconds)
+    guard.video_enabled = True
+
+    ring = app.FrameRing()
+    try:
+        results["worker.ring_write"] = measure(lambda: ring.write(color, depth, dets), seconds)
+        results["worker.ring_read"] = measure(lambda: ring.read(0), seconds)
+    finally:
+        ring.close(unlink=True)
+
+    results["ws.sticks"] = measure(lambda: app.handle_control_message(STICK_MESSAGE), seconds)
+    results["ws.arm_no_link"] = measure(lambda: app.handle_control_message(ARM_MESSAGE), seconds)
+
+    drone.update_sticks(0.12, -0.4, -0.3, 0.55)
+    results["mavlink.smooth_step"] = measure(drone.smooth_step, seconds)
+    drone.master = LinkStandIn(mavutil.mavlink)
+    results["mavlink.send_manual_control"] = measure(drone.send_manual_control, seconds)
+    drone.master = None
+
+    fleet = app.FleetManager([])
+    for sysid in range(1, FLEET_SIZE + 1):
+        vehicle = fleet.vehicles[sysid] = app.DroneController(app.SystemGuard())
+        vehicle.master = LinkStandIn(mavutil.mavlink)
+        vehicle.last_heard = time.monotonic() + 3600  # Never times out during the run
+        vehicle.update_sticks(0.12, -0.4, -0.3, 0.55)
+    results[f"fleet.tick_{FLEET_SIZE}_vehicles"] = measure(fleet.tick, seconds)
+
+    frame = mavutil.mavlink.MAVLink_attitude_message(0, 0.02, 0.01, 1.5, 0.0, 0.0, 0.01).pack(mavutil.mavlink.MAVLink(None))
+    with tempfile.TemporaryDirectory() as directory:
+        journal = app.TelemetryJournal(directory, 1 << 30)
+        results["journal.append"] = measure(lambda: journal.append(frame), seconds)
+        journal.flush()
+
+        def one_second():
+            for _ in range(65):  # About one second of the autopilot stream
+                journal.append(frame)
+            journal.flush()
+        results["journal.flush_65_frames"] = measure(one_second, seconds)
+        journal.close()
+    return results
+
+def bench_bridge(seconds: float, frames: int) -> Dict[str, dict]:
+    sys.path.insert(0, SCRIPTS_DIR)
+    try:
+        from bridge_throughput import synthetic_stream
+        from mavproxy_bridge import FrameBatcher, MavlinkFrameParser, UplinkPolicy, parse_msgid
+    except Exception as e:
+        return {"bridge": {"skipped": f"bridge import failed: {e!r}"}}
+
+    results: Dict[str, dict] = {}
+    chunk = synthetic_stream(100)  # One serial read's worth of frames
+    parser = MavlinkFrameParser()
+    results["bridge.parser_feed_100_frames"] = measure(lambda: parser.feed(chunk), seconds)
+    parsed = MavlinkFrameParser().feed(chunk)
+
+    batcher = FrameBatcher(1200, 0.02)
+    def batch():
+        now = time.monotonic()
+        for frame in parsed:
+            batcher.add(frame.data, now)
+        batcher.flush()
+    results["bridge.batcher_100_frames"] = measure(batch, seconds)
+
+    policy = UplinkPolicy(rates={parse_msgid("ATTITUDE"): 10.0}, max_kbps=64)
+    clock = [0.0]
+    def admit():
+        clock[0] += 0.01
+        for frame in parsed:
+            policy.admit(frame, clock[0])
+    results["bridge.policy_admit_100_frames"] = measure(admit, seconds)
+
+    # End-to-end: pty -> bridge -> UDP, in a separate process so its threads do not skew the above
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out_path = f.name
+    try:
+        subprocess.run(
+            [sys.executable, "bridge_throughput.py", "--frames", str(frames), "--json", out_path],
+            cwd=SCRIPTS_DIR, check=True, stdout=subprocess.DEVNULL, timeout=120
+        )
+        with open(out_path) as f:
+            throughput = json.load(f)
+        uplink, downlink = throughput["uplink"], throughput["downlink"]
+        results["bridge.throughput"] = {
+            "unit": "frames/s",
+            "frames_per_sec": uplink["frames_per_sec"],
+            "mbit_per_sec": uplink["mbit_per_sec"],
+            "frames_lost": uplink["frames_sent"] - uplink["frames_received"],
+            "avg_frames_per_datagram": uplink["avg_frames_per_datagram"],
+            "downlink_intact": downlink.get("intact"),
+            "process_cpu_seconds": throughput["process_cpu_seconds"],
+        }
+    except Exception as e:
+        results["bridge.throughput"] = {"skipped": f"bridge_throughput.py failed: {e!r}"}
+    finally:
+        os.unlink(out_path)
+    return results
+
+def git_revision() -> dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except Exception:
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def library_versions() -> dict:
+    versions = {}
+    for name in ("numpy", "cv2", "av", "torch", "pymavlink"):
+        try:
+            versions[name] = getattr(__import__(name), "__version__", "unknown")
+        except Exception:
+            versions[name] = None
+    return versions
+
+def headline(result: dict) -> Optional[float]:
+    """The number compared between runs: median time, or throughput for end-to-end stages"""
+    if "median" in result:
+        return result["median"]
+    return result.get("frames_per_sec")
+
+def compare(baseline_path: str, current: dict, threshold: float) -> List[str]:
+    """Prints a per-stage diff and returns the stages that got slower than `threshold` percent"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"\nvs {baseline_path} ({(baseline['meta'].get('commit') or '?')[:10]})")
+    print(f"{'stage':40} {'before':>12} {'after':>12} {'change':>8}")
+    for stage, result in current["results"].items():
+        before = headline(baseline["results"].get(stage, {}))
+        after = headline(result)
+        if before is None or after is None or not before:
+            continue
+        higher_is_better = "median" not in result
+        change = (after - before) / before * 100
+        slower = -change if higher_is_better else change
+        flag = "  <-- slower" if slower > threshold else ""
+        if flag:
+            regressions.append(stage)
+        print(f"{stage:40} {before:12.1f} {after:12.1f} {change:+7.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink hot path benchmarks")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Timing budget per stage")
+    parser.add_argument("--only", action="append", metavar="PREFIX", help="Run stages starting with PREFIX, e.g. camera or bridge.parser (repeatable)")
+    parser.add_argument("--boxes", type=int, default=5, help="Synthetic detections drawn per frame")
+    parser.add_argument("--inference", action="store_true", help="Also time YOLO inference on CPU (slow, needs the weights)")
+    parser.add_argument("--bridge-frames", type=int, default=100000, help="Frames pushed by the bridge throughput run")
+    parser.add_argument("--json", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file from another commit to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown reported as a regression")
+    args = parser.parse_args()
+
+    groups = {p.split(".")[0] for p in args.only or []}
+    results: Dict[str, dict] = {}
+    if not args.only or groups & set(APP_GROUPS):
+        results.update(bench_app(args.seconds, args.boxes, args.inference))
+    if not args.only or "bridge" in groups:
+        results.update(bench_bridge(args.seconds, args.bridge_frames))
+    if args.only:
+        results = {k: v for k, v in results.items() if "skipped" in v or any(k.startswith(p) for p in args.only)}
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            **revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "libraries": library_versions(),
+            "seconds_per_stage": args.seconds,
+        },
+        "results": results,
+    }
+
+    for stage, result in results.items():
+        if "skipped" in result:
+            print(f"{stage:40} skipped: {result['skipped']}")
+        elif "median" in result:
+            print(f"{stage:40} median {result['median']:10.1f} us   p95 {result['p95']:10.1f} us   {result['ops_per_sec']:10.0f}/s")
+        else:
+            print(f"{stage:40} {result['frames_per_sec']:10.0f} frames/s   {result['mbit_per_sec']:.1f} Mbit/s")
+
+    out_path = args.json
+    if not out_path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = (revision["commit"] or "unknown")[:12] + ("-dirty" if revision["dirty"] else "")
+        out_path = os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults: {out_path}")
+
+    if args.compare and compare(args.compare, report, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+SkyLink Fake Autopilot
+A local MAVLink endpoint that behaves enough like an ArduPilot CubePilot for load tests
+
+- Streams telemetry at ArduPilot's usual ground-station rates (about 65 msg/s)
+- Answers COMMAND_LONG with COMMAND_ACK and tracks the armed state in its HEARTBEAT
+- Timestamps every MANUAL_CONTROL it receives so callers can measure control latency
+
+Runs over UDP (the app connects with MAVLINK_URL=udpin:...) or over a pseudo-terminal
+(MAVLINK_URL=/dev/pts/N, like the real serial link).
+"""
+
+import argparse
+import math
+import os
+import select
+import socket
+import threading
+import time
+import tty
+from collections import Counter
+from typing import List, Optional, Tuple
+
+os.environ.setdefault("MAVLINK20", "1")
+from pymavlink.dialects.v20 import ardupilotmega as mavlink
+
+# msg -> Hz, roughly ArduCopter with SR0_* defaults raised for a ground station
+STREAM_RATES = {
+    "HEARTBEAT": 1,
+    "SYS_STATUS": 2,
+    "ATTITUDE": 20,
+    "GLOBAL_POSITION_INT": 10,
+    "VFR_HUD": 10,
+    "GPS_RAW_INT": 5,
+    "RC_CHANNELS": 5,
+    "SERVO_OUTPUT_RAW": 10,
+}
+
+class FakeAutopilot:
+    def __init__(self, mode: str = "udp", sysid: int = 1, rate_scale: float = 1.0, port: int = 0):
+        self.mode = mode
+        self.sysid = sysid
+        self.rate_scale = rate_scale
+        self.port = port
+        self.mav = mavlink.MAVLink(self, srcSystem=sysid, srcComponent=1)
+        self.sock: Optional[socket.socket] = None
+        self.app_addr: Optional[tuple] = None
+        self.master_fd: Optional[int] = None
+        self.slave_fd: Optional[int] = None
+        self.armed = False
+        self.running = False
+        self.started_at = time.monotonic()
+        self.sent = Counter()
+        self.received = Counter()
+        self.acks = 0
+        # (perf_counter, x, y, z, r) for every MANUAL_CONTROL
+        self.manual_control: List[Tuple[float, int, int, int, int]] = []
+        # (perf_counter, command) for every COMMAND_LONG
+        self.commands: List[Tuple[float, int]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> str:
+        """Creates the endpoint and returns the MAVLINK_URL the app should use"""
+        if self.mode == "pty":
+            self.master_fd, self.slave_fd = os.openpty()
+            tty.setraw(self.master_fd)
+            os.set_blocking(self.master_fd, False)
+            return os.ttyname(self.slave_fd)
+        if not self.port:
+            probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+            probe.close()
+        self.app_addr = ("127.0.0.1", self.port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.setblocking(False)
+        return f"udpin:127.0.0.1:{self.port}"
+
+    def write(self, data: bytes):
+        """File interface for pymavlink's encoder"""
+        try:
+            if self.master_fd is not None:
+                os.write(self.master_fd, data)
+            else:
+                self.sock.sendto(data, self.app_addr)
+        except OSError:
+            pass  # App not listening yet, or pty buffer full: a real serial link drops too
+
+    def fileno(self) -> int:
+        return self.master_fd if self.master_fd is not None else self.sock.fileno()
+
+    def read(self) -> bytes:
+        try:
+            if self.master_fd is not None:
+                return os.read(self.master_fd, 4096)
+            return self.sock.recv(4096)
+        except (BlockingIOError, ConnectionRefusedError):
+            return b""
+
+    def send_stream(self, name: str):
+        t = time.monotonic() - self.started_at
+        boot_ms = int(t * 1000) & 0xFFFFFFFF
+        lat, lon = 144500000 + int(1000 * math.sin(t / 10)), -175000000 + int(1000 * math.cos(t / 10))
+        mav = self.mav
+        if name == "HEARTBEAT":
+            base_mode = mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+            if self.armed:
+                base_mode |= mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+            mav.heartbeat_send(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                               base_mode, 5, mavlink.MAV_STATE_ACTIVE)
+        elif name == "SYS_STATUS":
+            mav.sys_status_send(0, 0, 0, 300, 15800 - int(t), 1200, 87, 0, 0, 0, 0, 0, 0)
+        elif name == "ATTITUDE":
+            mav.attitude_send(boot_ms, 0.02 * math.sin(t), 0.02 * math.cos(t), t % 6.28, 0.0, 0.0, 0.01)
+        elif name == "GLOBAL_POSITION_INT":
+            mav.global_position_int_send(boot_ms, lat, lon, 30000, 10000, 0, 0, 0, int(t * 100) % 36000)
+        elif name == "VFR_HUD":
+            mav.vfr_hud_send(0.5, 0.4, int(t) % 360, 45, 10.0, 0.0)
+        elif name == "GPS_RAW_INT":
+            mav.gps_raw_int_send(int(t * 1e6), 3, lat, lon, 30000, 80, 120, 40, 0, 14)
+        elif name == "RC_CHANNELS":
+            mav.rc_channels_send(boot_ms, 8, *([1500] * 8 + [0] * 10), 255)
+        elif name == "SERVO_OUTPUT_RAW":
+            mav.servo_output_raw_send(int(t * 1e6) & 0xFFFFFFFF, 0, *([1450] * 4 + [0] * 4))
+        self.sent[name] += 1
+
+    def handle(self, msg, now: float):
+        name = msg.get_type()
+        self.received[name] += 1
+        if name == "MANUAL_CONTROL":
+            self.manual_control.append((now, msg.x, msg.y, msg.z, msg.r))
+        elif name == "COMMAND_LONG":
+            self.commands.append((now, msg.command))
+            if msg.command == mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+                self.armed = msg.param1 == 1
+            self.mav.command_ack_send(msg.command, mavlink.MAV_RESULT_ACCEPTED)
+            self.acks += 1
+
+    def run(self):
+        intervals = {name: 1.0 / (hz * self.rate_scale) for name, hz in STREAM_RATES.items()}
+        next_at = {name: time.monotonic() for name in intervals}
+        parser = mavlink.MAVLink(None)
+        parser.robust_parsing = True
+        while self.running:
+            now = time.monotonic()
+            for name, due in next_at.items():
+                if due <= now:
+                    self.send_stream(name)
+                    # Skip ahead rather than burst if we fell behind
+                    next_at[name] = max(due + intervals[name], now)
+            timeout = max(0.0, min(next_at.values()) - time.monotonic())
+            readable, _, _ = select.select([self.fileno()], [], [], timeout)
+            if readable:
+                data = self.read()
+                received_at = time.perf_counter()
+                for msg in parser.parse_buffer(data) or []:
+                    self.handle(msg, received_at)
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                os.close(fd)
+        if self.sock:
+            self.sock.close()
+
+    def summary(self) -> dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "sent_per_sec": sum(self.sent.values()) / elapsed,
+            "received": dict(self.received),
+            "manual_control_per_sec": self.received["MANUAL_CONTROL"] / elapsed,
+            "command_acks": self.acks,
+            "armed": self.armed,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink fake autopilot")
+    parser.add_argument("--mode", choices=["udp", "pty"], default="udp")
+    parser.add_argument("--port", type=int, default=14550, help="UDP port the app listens on (udpin)")
+    parser.add_argument("--sysid", type=int, default=1)
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="Multiply every stream rate")
+    args = parser.parse_args()
+
+    autopilot = FakeAutopilot(args.mode, args.sysid, args.rate_scale, args.port)
+    print(f"MAVLINK_URL={autopilot.open()}")
+    autopilot.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(autopilot.summary())
+    except KeyboardInterrupt:
+        pass
+    autopilot.stop()
+
+if __name__ == "__main__":
+    main()
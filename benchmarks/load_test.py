@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+SkyLink Load Test
+Runs drone_control_V2.py against a fake autopilot and a crowd of simulated clients
+
+This script:
+1. Starts a FakeAutopilot (UDP or pty) and launches the app pointed at it, with the
+   synthetic camera unless --camera realsense
+2. Connects N pilots (WebSocket sticks at 30 Hz), M admin MJPEG viewers and K WebRTC peers
+3. Pilots flip the pitch stick between two values every --step-period seconds; the time
+   until the autopilot sees MANUAL_CONTROL move is the control latency
+4. Samples the app's CPU and memory from /proc and reports everything, optionally as JSON
+
+Clients run in this process: with many WebRTC peers the decoder cost here can become the
+limit, so check "harness_cpu_percent" before blaming the app.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from bench_hot_paths import REPO_ROOT, git_revision
+from fake_autopilot import FakeAutopilot, mavlink
+
+STICK_RATE = 30.0  # Hz, like the pilot page
+STEP_HIGH = 0.8    # Pitch stick value for the "high" half of each step, target x = 800
+STEP_DETECT = 20   # MANUAL_CONTROL x change that counts as the drone reacting
+
+class ClientStats:
+    def __init__(self, kind: str, index: int):
+        self.kind = kind
+        self.index = index
+        self.frames = 0
+        self.bytes = 0
+        self.messages = 0
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self.max_gap = 0.0
+        self.error: Optional[str] = None
+
+    def frame(self, now: float, count: int = 1):
+        if self.last_at is not None:
+            self.max_gap = max(self.max_gap, now - self.last_at)
+        if self.first_at is None:
+            self.first_at = now
+        self.last_at = now
+        self.frames += count
+
+    def summary(self) -> dict:
+        span = (self.last_at - self.first_at) if self.first_at is not None and self.last_at != self.first_at else 0
+        result = {"client": f"{self.kind}-{self.index}"}
+        if self.kind == "pilot":
+            result["messages_sent"] = self.messages
+        else:
+            result["frames"] = self.frames
+            result["fps"] = (self.frames - 1) / span if span else 0.0
+            result["max_gap_ms"] = self.max_gap * 1000
+            if self.bytes:
+                result["kbps"] = self.bytes * 8 / span / 1000 if span else 0.0
+        if self.error:
+            result["error"] = self.error
+        return result
+
+class StepSchedule:
+    """Shared stick pattern: every pilot sends the same value, so they agree on the target"""
+
+    def __init__(self, started_at: float, period: float):
+        self.started_at = started_at
+        self.period = period
+        self.first_send: Dict[int, float] = {}
+
+    def step(self, now: float) -> int:
+        return int((now - self.started_at) / self.period)
+
+    def value(self, now: float) -> float:
+        step = self.step(now)
+        if step not in self.first_send:
+            self.first_send[step] = now
+        return STEP_HIGH if step % 2 else 0.0
+
+def control_latencies(schedule: StepSchedule, manual_control: list) -> dict:
+    """Time from the first stick message of each step to the first MANUAL_CONTROL that follows it"""
+    latencies = []
+    missed = 0
+    for step, sent_at in sorted(schedule.first_send.items()):
+        if step == 0:
+            continue
+        before = [x for at, x, *_ in manual_control if at <= sent_at]
+        if not before:
+            continue
+        baseline = before[-1]
+        rising = step % 2 == 1
+        reacted = next((at for at, x, *_ in manual_control
+                        if at > sent_at and (x > baseline + STEP_DETECT if rising else x < baseline - STEP_DETECT)), None)
+        if reacted is None or reacted - sent_at > schedule.period:
+            missed += 1
+        else:
+            latencies.append((reacted - sent_at) * 1000)
+    if not latencies:
+        return {"steps": 0, "missed": missed}
+    latencies.sort()
+    return {
+        "steps": len(latencies),
+        "missed": missed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "max_ms": latencies[-1],
+    }
+
+async def run_pilot(session, base_url: str, stats: ClientStats, schedule: StepSchedule, stop_at: float,
+                    arm_sent: Optional[list] = None):
+    try:
+        async with session.ws_connect(f"{base_url}/ws/control") as ws:
+            if arm_sent is not None:
+                arm_sent.append(time.perf_counter())
+                await ws.send_str(json.dumps({"action": "ARM"}))
+            interval = 1.0 / STICK_RATE
+            next_at = time.perf_counter()
+            while next_at < stop_at:
+                now = time.perf_counter()
+                pitch = schedule.value(now)
+                await ws.send_str(json.dumps({"l": {"x": 0, "y": -1}, "r": {"x": 0, "y": pitch}}))
+                stats.messages += 1
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+    except Exception as e:
+        stats.error = repr(e)
+
+async def run_mjpeg_viewer(session, base_url: str, stats: ClientStats, stop_at: float):
+    marker = b"--frame\r\n"
+    tail = b""
+    try:
+        async with session.get(f"{base_url}/video_feed") as resp:
+            while time.perf_counter() < stop_at:
+                chunk = await asyncio.wait_for(resp.content.readany(), timeout=max(0.1, stop_at - time.perf_counter()))
+                if not chunk:
+                    break
+                stats.bytes += len(chunk)
+                data = tail + chunk
+                count = data.count(marker)
+                if count:
+                    stats.frame(time.perf_counter(), count)
+                tail = data[-(len(marker) - 1):]
+    except asyncio.TimeoutError:
+        pass
+    except Exception as e:
+        stats.error = repr(e)
+
+async def run_webrtc_peer(session, base_url: str, stats: ClientStats, stop_at: float):
+    try:
+        from aiortc import RTCPeerConnection, RTCSessionDescription
+    except ImportError as e:
+        stats.error = repr(e)
+        return
+    pc = RTCPeerConnection()
+    got_track = asyncio.get_running_loop().create_future()
+
+    @pc.on("track")
+    def on_track(track):
+        if not got_track.done():
+            got_track.set_result(track)
+
+    try:
+        pc.addTransceiver("video", direction="recvonly")
+        await pc.setLocalDescription(await pc.createOffer())
+        offer = {"sdp": pc.localDescription.sdp, "type": pc.localDescription.type}
+        async with session.post(f"{base_url}/offer", json=offer) as resp:
+            answer = await resp.json()
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=answer["sdp"], type=answer["type"]))
+        track = await asyncio.wait_for(got_track, timeout=10)
+        while time.perf_counter() < stop_at:
+            await asyncio.wait_for(track.recv(), timeout=5)
+            stats.frame(time.perf_counter())
+    except Exception as e:
+        stats.error = repr(e)
+    finally:
+        await pc.close()
+
+class ProcessSampler:
+    """CPU and RSS of one process from /proc, once per interval"""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_percent: List[float] = []
+        self.rss_mb: List[float] = []
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+
+    def rss(self) -> float:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def run(self, stop_at: float):
+        try:
+            last_cpu, last_at = self.cpu_seconds(), time.perf_counter()
+            while time.perf_counter() < stop_at:
+                await asyncio.sleep(self.interval)
+                cpu, now = self.cpu_seconds(), time.perf_counter()
+                self.cpu_percent.append(100.0 * (cpu - last_cpu) / (now - last_at))
+                self.rss_mb.append(self.rss())
+                last_cpu, last_at = cpu, now
+        except FileNotFoundError:
+            pass  # App exited
+
+    def summary(self) -> dict:
+        if not self.cpu_percent:
+            return {}
+        return {
+            "cpu_percent_avg": statistics.fmean(self.cpu_percent),
+            "cpu_percent_max": max(self.cpu_percent),
+            "rss_mb_start": self.rss_mb[0],
+            "rss_mb_max": max(self.rss_mb),
+            "rss_mb_end": self.rss_mb[-1],
+        }
+
+async def wait_ready(session, base_url: str, app: subprocess.Popen, autopilot: FakeAutopilot, timeout: float) -> dict:
+    """Seconds until the app served its first page and until it started driving the autopilot"""
+    started = time.perf_counter()
+    deadline = started + timeout
+    first_page = None
+    while time.perf_counter() < deadline and app.poll() is None:
+        try:
+            async with session.get(f"{base_url}/") as resp:
+                if resp.status == 200:
+                    first_page = time.perf_counter() - started
+                    break
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    if first_page is None:
+        raise RuntimeError("app did not serve / in time (see its log)")
+    while not autopilot.manual_control and time.perf_counter() < deadline:
+        await asyncio.sleep(0.1)
+    if not autopilot.manual_control:
+        raise RuntimeError("app never sent MANUAL_CONTROL to the fake autopilot")
+    startup = {"first_page_s": first_page, "autopilot_link_s": time.perf_counter() - started}
+    # The app's own view, counted from process start and per subsystem (model, camera, mavlink)
+    async with session.get(f"{base_url}/api/ready") as resp:
+        if resp.content_type == "application/json":
+            startup["app_readiness"] = await resp.json()
+    return startup
+
+async def run_load(args, app: subprocess.Popen, autopilot: FakeAutopilot) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=5)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        startup = await wait_ready(session, base_url, app, autopilot, args.startup_timeout)
+
+        started = time.perf_counter()
+        stop_at = started + args.duration
+        schedule = StepSchedule(started, args.step_period)
+        arm_sent: list = []
+        clients = ([ClientStats("pilot", i) for i in range(args.pilots)] +
+                   [ClientStats("mjpeg", i) for i in range(args.viewers)] +
+                   [ClientStats("webrtc", i) for i in range(args.peers)])
+        tasks = []
+        for stats in clients:
+            if stats.kind == "pilot":
+                arm = arm_sent if args.arm and stats.index == 0 else None
+                tasks.append(run_pilot(session, base_url, stats, schedule, stop_at, arm))
+            elif stats.kind == "mjpeg":
+                tasks.append(run_mjpeg_viewer(session, base_url, stats, stop_at))
+            else:
+                tasks.append(run_webrtc_peer(session, base_url, stats, stop_at))
+        sampler = ProcessSampler(app.pid)
+        harness_cpu = time.process_time()
+        await asyncio.gather(sampler.run(stop_at), *tasks)
+        harness_cpu = time.process_time() - harness_cpu
+
+    arm_latency = None
+    if arm_sent:
+        arms = [at for at, command in autopilot.commands
+                if command == mavlink.MAV_CMD_COMPONENT_ARM_DISARM and at >= arm_sent[0]]
+        arm_latency = (arms[0] - arm_sent[0]) * 1000 if arms else None
+
+    per_client = [stats.summary() for stats in clients]
+    video = [c for c in per_client if "fps" in c]
+    return {
+        "startup": startup,
+        "control_latency": control_latencies(schedule, autopilot.manual_control),
+        "arm_command_latency_ms": arm_latency,
+        "video_fps_min": min((c["fps"] for c in video), default=None),
+        "video_fps_avg": statistics.fmean(c["fps"] for c in video) if video else None,
+        "clients": per_client,
+        "app": sampler.summary(),
+        "harness_cpu_percent": 100.0 * harness_cpu / args.duration,
+        "autopilot": autopilot.summary(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink load test")
+    parser.add_argument("--pilots", type=int, default=1, help="WebSocket pilots sending sticks at 30 Hz")
+    parser.add_argument("--viewers", type=int, default=1, help="Admin MJPEG viewers")
+    parser.add_argument("--peers", type=int, default=1, help="WebRTC peers (needs aiortc)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--step-period", type=float, default=1.0, help="Seconds between stick steps")
+    parser.add_argument("--arm", action="store_true", help="First pilot sends ARM and the ack path is timed")
+    parser.add_argument("--autopilot", choices=["udp", "pty"], default="udp")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="Multiply the autopilot stream rates")
+    parser.add_argument("--camera", choices=["synthetic", "realsense"], default="synthetic")
+    parser.add_argument("--port", type=int, default=5055, help="HTTP port for the app under test")
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "drone_control_V2.py"))
+    parser.add_argument("--startup-timeout", type=float, default=180.0, help="Model loading can take a while")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    autopilot = FakeAutopilot(args.autopilot, rate_scale=args.rate_scale)
+    env = dict(os.environ, MAVLINK_URL=autopilot.open(), CAMERA_SOURCE=args.camera, SERVER_PORT=str(args.port))
+    autopilot.start()
+    log = tempfile.NamedTemporaryFile(prefix="skylink-app-", suffix=".log", delete=False)
+    app = subprocess.Popen([sys.executable, args.app], env=env, stdout=log, stderr=subprocess.STDOUT,
+                           cwd=os.path.dirname(os.path.abspath(args.app)))
+    try:
+        results = asyncio.run(run_load(args, app, autopilot))
+    except RuntimeError as e:
+        print(f"❌ {e}; app log: {log.name}")
+        sys.exit(1)
+    finally:
+        app.send_signal(signal.SIGINT)
+        try:
+            app.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            app.kill()
+        autopilot.stop()
+
+    results["scenario"] = {k: getattr(args, k) for k in ("pilots", "viewers", "peers", "duration", "autopilot", "camera", "rate_scale")}
+    results["meta"] = {**git_revision(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "app_log": log.name}
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,72 @@ import json
 import threading
 import time
 import socket
+import select
 import cv2
 import numpy as np
-import pyrealsense2 as rs
-import torch
 import glob
 import sys
 import os
+import bisect
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
 
 os.environ['MAVLINK20'] = '1'
 from pymavlink import mavutil
 from aiohttp import web
 from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack
-from ultralytics import YOLO
 import av
+# pyrealsense2, torch et ultralytics sont importés au démarrage des sous-systèmes
+# (voir start_subsystems) pour que le port HTTP soit ouvert tout de suite.
 
 # ==========================================
 # --- CONFIGURATION SECURITE ---
 # ==========================================
 WIDTH, HEIGHT = 640, 480 
 FPS_TARGET = 30
-SERVER_PORT = 5000
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "5000"))
 BAUDRATE = 115200
+# Autopilote partagé via server/scripts/mavlink_router.py (ex: "udpin:127.0.0.1:14550").
+# Vide = recherche directe du port série.
+MAVLINK_URL = os.environ.get("MAVLINK_URL", "")
+# Flux H.264/RTP encodé une seule fois (encodeur matériel Jetson) pour mavproxy_bridge.py --video-port.
+# 0 = désactivé.
+RTP_OUT_PORT = int(os.environ.get("RTP_OUT_PORT", "0"))
+RTP_PIPELINE = (
+    "appsrc ! videoconvert ! video/x-raw,format=BGRx ! nvvidconv ! video/x-raw(memory:NVMM),format=NV12 ! "
+    "nvv4l2h264enc bitrate=2500000 iframeinterval=30 insert-sps-pps=true ! h264parse ! "
+    "rtph264pay config-interval=1 pt=96 ! udpsink host=127.0.0.1 port={port} sync=false"
+)
+# "synthetic" = mire animée sans RealSense (banc de charge benchmarks/load_test.py, démo)
+CAMERA_SOURCE = os.environ.get("CAMERA_SOURCE", "realsense")
+# 1 = caméra + IA dans un processus séparé (pas de GIL partagé avec le contrôle), images via mémoire partagée
+CAMERA_WORKER = os.environ.get("CAMERA_WORKER", "0") == "1"
+# Les détections partent sur /ws/detections et les clients les dessinent ; 1 = les incruster aussi
+# dans l'image comme avant (anciens clients)
+BURN_IN_DETECTIONS = os.environ.get("BURN_IN_DETECTIONS", "0") == "1"
+# YOLO ne tourne que si la scène a changé depuis la dernière inférence (part de la vignette modifiée)
+# ou si ses résultats ont plus de MOTION_MAX_AGE s. 0 = inférence à chaque image.
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", "0.005"))
+MOTION_MAX_AGE = float(os.environ.get("MOTION_MAX_AGE", "1.0"))
+# Mode flotte : liaisons MAVLink séparées par des virgules (ex: "udpin:0.0.0.0:14550,/dev/ttyUSB0").
+# Chaque véhicule (system ID) vu sur l'une d'elles a son DroneController ; pas de caméra ni d'IA.
+FLEET_URLS = [u for u in os.environ.get("FLEET_URLS", "").split(",") if u]
+# Journal télémétrie : chaque trame MAVLink reçue, brute et horodatée, pour l'analyse après vol et le
+# rejeu (server/scripts/telemetry_journal.py). Vide = désactivé ; les plus vieux segments sautent
+# au-delà de TELEMETRY_MAX_MB.
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry"))
+TELEMETRY_MAX_MB = int(os.environ.get("TELEMETRY_MAX_MB", "1024"))
 SMOOTH_FACTOR = 0.08
+# Limiteur obstacles (caméra de profondeur) : manche avant réduit sous OBSTACLE_SLOW_M, nul sous
+# OBSTACLE_STOP_M, linéaire entre les deux. OBSTACLE_SLOW_M=0 désactive.
+OBSTACLE_SLOW_M = float(os.environ.get("OBSTACLE_SLOW_M", "4.0"))
+OBSTACLE_STOP_M = float(os.environ.get("OBSTACLE_STOP_M", "1.0"))
+OBSTACLE_STALE_S = 0.5  # Grille plus vieille (caméra arrêtée) : plus de limite, signalé au pilote
+OBSTACLE_BLIND_S = 1.0  # Couloir sans mesure moins d'1 s après un obstacle proche : limite gelée
+# Refusé au démarrage : STOP >= SLOW diviserait par zéro (ou inverserait la rampe) dans cam.publish
+if OBSTACLE_SLOW_M > 0 and not 0 <= OBSTACLE_STOP_M < OBSTACLE_SLOW_M:
+    raise SystemExit(f"❌ OBSTACLE_STOP_M ({OBSTACLE_STOP_M}) doit être >= 0 et < OBSTACLE_SLOW_M ({OBSTACLE_SLOW_M}), ou OBSTACLE_SLOW_M=0 pour désactiver")
 
 # CLES D'ACCES
 ADMIN_TOKEN = "admin_secret_999" # Pour l'App Admin
@@ -42,6 +85,114 @@ class SystemGuard:
 
 guard = SystemGuard()
 
+# ETAT DES SOUS-SYSTEMES (GET /api/ready)
+BOOT_TIME = time.monotonic()
+
+def process_age():
+    """Secondes depuis le lancement du processus (imports compris), via /proc si possible"""
+    try:
+        with open("/proc/self/stat") as f: start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f: uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except: return time.monotonic() - BOOT_TIME
+
+class Readiness:
+    def __init__(self):
+        self.subsystems = {}
+        self.first_page = None  # Secondes avant la première page servie
+        self.on_change = None  # Processus caméra : remonte l'état au processus web
+
+    def set(self, name, state, detail=""):
+        # state : starting / ready / failed
+        self.subsystems[name] = {"state": state, "detail": detail, "since_s": round(process_age(), 2)}
+        if self.on_change: self.on_change(name, state)
+        print(f"{'✅' if state == 'ready' else '❌' if state == 'failed' else '⏳'} {name}: {state} {detail}".rstrip())
+
+    def ready(self):
+        return all(s["state"] == "ready" for s in self.subsystems.values())
+
+status = Readiness()
+
+# ==========================================
+# METRIQUES (format Prometheus, GET /metrics)
+# ==========================================
+# Mêmes types que MetricsRegistry dans server/scripts/mavproxy_bridge.py, recopiés ici
+# car ce script est déployé seul sur le Jetson.
+class Metric:
+    def __init__(self, name, help, kind="counter", labels=(), collect=None):
+        self.name, self.help, self.kind, self.labels = name, help, kind, labels
+        self.collect = collect  # Lu au moment du scrape, sinon self.values
+        self.values = {} if labels or collect else {(): 0.0}
+
+    def inc(self, *labels, amount=1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def label_text(self, values, extra=""):
+        pairs = [f"{k}={json.dumps(str(v))}" for k, v in zip(self.labels, values)]
+        if extra: pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        values = self.collect() if self.collect else dict(self.values)
+        lines += [f"{self.name}{self.label_text(k)} {v}" for k, v in values.items()]
+        return lines
+
+class Histogram(Metric):
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, "histogram", labels)
+        self.buckets = buckets
+        self.series = {}  # labels -> [compteurs par bucket..., +Inf, somme]
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None: series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in list(self.series.items()):
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self.label_text(key, 'le=' + json.dumps(le))} {total}")
+            lines.append(f"{self.name}_sum{self.label_text(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{self.label_text(key)} {total}")
+        return lines
+
+METRICS = []
+def metric(m): METRICS.append(m); return m
+
+CAPTURE_FRAMES = metric(Metric("skylink_capture_frames_total", "Images couleur traitées"))
+CAPTURE_TIMEOUTS = metric(Metric("skylink_capture_timeouts_total", "Attentes caméra sans image"))
+# wait, align, inference, overlay, heatmap, hud, encode_jpeg, video_frame
+STAGE_SECONDS = metric(Histogram("skylink_stage_seconds", "Durée de chaque étape du pipeline vidéo", ("stage",)))
+FRAMES_SKIPPED = metric(Metric("skylink_frames_skipped_total", "Images jamais envoyées à un client (remplacées avant lecture)", labels=("consumer",)))
+FRAME_AGE = metric(Histogram("skylink_frame_age_seconds", "Âge de l'image à l'envoi (capture -> client)", ("consumer",)))
+CLIENTS = metric(Metric("skylink_clients", "Clients connectés", "gauge", ("kind",)))
+LOOP_LAG = metric(Histogram("skylink_event_loop_lag_seconds", "Retard de réveil de la boucle asyncio"))
+WORKER_RESTARTS = metric(Metric("skylink_camera_worker_restarts_total", "Redémarrages du processus caméra (CAMERA_WORKER=1)"))
+RING_SKIPPED = metric(Metric("skylink_ring_frames_skipped_total", "Images du ring écrasées avant lecture par le processus web"))
+OBSTACLE_NEAREST = metric(Metric("skylink_obstacle_nearest_meters", "Obstacle le plus proche dans le couloir avant (absent sans mesure)", "gauge",
+                                 collect=lambda: {(): drone.obstacle_nearest} if drone.obstacle_nearest is not None else {}))
+FORWARD_LIMIT = metric(Metric("skylink_forward_stick_scale", "Part du manche avant autorisée par le limiteur obstacles", "gauge",
+                              collect=lambda: {(): drone.forward_scale if drone.limiter_state() != "stale" else 1.0}))
+LIMITER_STATE = metric(Metric("skylink_obstacle_limiter", "État du limiteur obstacles (1 = état courant)", "gauge", ("state",),
+                              collect=lambda: {(drone.limiter_state(),): 1}))
+JOURNAL_SEGMENTS = metric(Metric("skylink_journal_segments_total", "Segments du journal télémétrie remplis et fermés"))
+INFERENCES = metric(Metric("skylink_inference_frames_total", "Images avec IA active : YOLO lancé (run) ou résultats réutilisés (skipped)", labels=("result",)))
+WS_MESSAGES = metric(Metric("skylink_ws_messages_total", "Messages WebSocket pilote", labels=("result",)))
+MAVLINK_RX = metric(Metric("skylink_mavlink_received_total", "Messages MAVLink reçus de l'autopilote", labels=("type",)))
+CONTROL_INTERVAL = metric(Histogram("skylink_control_send_interval_seconds", "Intervalle entre deux MANUAL_CONTROL (cible 0.02 s)",
+                                    buckets=(0.015, 0.018, 0.02, 0.021, 0.022, 0.025, 0.03, 0.05, 0.1, 0.5)))
+
+def render_metrics():
+    return "\n".join(line for m in METRICS for line in m.render()) + "\n"
+
 # ==========================================
 # CORS HELPER FUNCTION
 # ==========================================
@@ -53,19 +204,185 @@ def add_cors_headers(response):
     response.headers['Access-Control-Max-Age'] = '3600'
     return response
 
+# ==========================================
+# JOURNAL TELEMETRIE (segments binaires à taille fixe)
+# ==========================================
+# Même format que server/scripts/telemetry_journal.py (lecture, rejeu), recopié car ce script est déployé seul.
+# Segment = en-tête (64 o) | index (JOURNAL_INDEX_SLOTS x <QI : horodatage µs, position) | données.
+# Données = enregistrements <QH (horodatage de réception en µs, longueur) + trame MAVLink brute.
+JOURNAL_MAGIC = b"SKTJ"
+JOURNAL_HEADER = struct.Struct("<4sHHQQII")  # magic, version, réservé, 1er horodatage, dernier, octets de données, entrées d'index
+JOURNAL_HEADER_SIZE = 64
+JOURNAL_INDEX = struct.Struct("<QI")
+JOURNAL_INDEX_SLOTS = 4096
+JOURNAL_RECORD = struct.Struct("<QH")
+JOURNAL_SEGMENT_SIZE = 8 << 20
+JOURNAL_DATA_OFFSET = JOURNAL_HEADER_SIZE + JOURNAL_INDEX_SLOTS * JOURNAL_INDEX.size
+JOURNAL_INDEX_INTERVAL_US = 1_000_000  # Une entrée d'index par seconde : un seek relit au plus 1 s de trames
+
+class JournalSegment:
+    def __init__(self, directory, first_us):
+        self.path = os.path.join(directory, f"telemetry-{first_us:016d}.seg")
+        self.first_us = self.last_us = first_us
+        self.fd = None
+        self.used = 0  # Octets de données comptés (écrits + en attente)
+        self.written = 0
+        self.pending = bytearray()
+        self.index = []
+        self.index_written = 0
+
+    def has_room(self, size, needs_index):
+        return self.used + size <= JOURNAL_SEGMENT_SIZE - JOURNAL_DATA_OFFSET and not (needs_index and len(self.index) >= JOURNAL_INDEX_SLOTS)
+
+class TelemetryJournal:
+    """Journal append-only des trames MAVLink reçues.
+
+    append() ne fait que copier la trame dans un tampon (thread MAVLink) ; un thread écrit les tampons
+    toutes les FLUSH_S avec os.pwrite puis met l'en-tête à jour. Un lecteur ne lit que les octets que
+    l'en-tête annonce, il peut donc mapper un segment en cours d'écriture.
+    """
+    FLUSH_S = 0.5
+
+    def __init__(self, directory, max_bytes):
+        self.directory, self.max_bytes = directory, max_bytes
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # close() peut flusher pendant le thread d'écriture
+        self.segment = None
+        self.sealed = []  # Segments pleins dont le reste n'est pas encore écrit
+        self.running = False
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def append(self, frame, ts_us=None):
+        if ts_us is None: ts_us = time.time_ns() // 1000
+        with self.lock:
+            seg = self.segment
+            size = JOURNAL_RECORD.size + len(frame)
+            needs_index = seg is None or ts_us - (seg.index[-1][0] if seg.index else 0) >= JOURNAL_INDEX_INTERVAL_US
+            if seg is None or not seg.has_room(size, needs_index):
+                if seg is not None: self.sealed.append(seg)
+                seg = self.segment = JournalSegment(self.directory, ts_us)
+                needs_index = True
+            if needs_index: seg.index.append((ts_us, seg.used))
+            seg.pending += JOURNAL_RECORD.pack(ts_us, len(frame))
+            seg.pending += frame
+            seg.used += size
+            seg.last_us = ts_us
+
+    def write(self, seg):
+        with self.lock:
+            data, seg.pending = seg.pending, bytearray()
+            index = seg.index[seg.index_written:]
+            last_us = seg.last_us
+        if not data and not index: return
+        if seg.fd is None:
+            seg.fd = os.open(seg.path, os.O_RDWR | os.O_CREAT, 0o644)
+            os.ftruncate(seg.fd, JOURNAL_SEGMENT_SIZE)  # Taille fixe : un lecteur peut mapper tout le fichier
+        os.pwrite(seg.fd, data, JOURNAL_DATA_OFFSET + seg.written)
+        if index: os.pwrite(seg.fd, b"".join(JOURNAL_INDEX.pack(*e) for e in index), JOURNAL_HEADER_SIZE + seg.index_written * JOURNAL_INDEX.size)
+        seg.written += len(data)
+        seg.index_written += len(index)
+        # En-tête en dernier : il n'annonce que des octets déjà écrits
+        os.pwrite(seg.fd, JOURNAL_HEADER.pack(JOURNAL_MAGIC, 1, 0, seg.first_us, last_us, seg.written, seg.index_written), 0)
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock: sealed, self.sealed, current = self.sealed, [], self.segment
+            for seg in sealed:
+                self.write(seg)
+                if seg.fd is not None: os.fsync(seg.fd); os.close(seg.fd)
+                JOURNAL_SEGMENTS.inc()
+            if current is not None: self.write(current)
+            if sealed: self.prune()
+
+    def prune(self):
+        paths = sorted(glob.glob(os.path.join(self.directory, "telemetry-*.seg")))
+        while len(paths) > 1 and len(paths) * JOURNAL_SEGMENT_SIZE > self.max_bytes:
+            try: os.remove(paths.pop(0))
+            except OSError: pass
+
+    def run(self):
+        while self.running:
+            time.sleep(self.FLUSH_S)
+            t = time.perf_counter()
+            try: self.flush()
+            except OSError as e: print(f"⚠️ Journal télémétrie: {e}")
+            STAGE_SECONDS.observe(time.perf_counter() - t, "journal_flush")
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            if self.segment: self.sealed.append(self.segment); self.segment = None
+        self.flush()
+
+journal = TelemetryJournal(TELEMETRY_DIR, TELEMETRY_MAX_MB << 20) if TELEMETRY_DIR else None
+
+# ==========================================
+# GRILLE D'OBSTACLES (profondeur -> secteurs)
+# ==========================================
+SECTOR_ROWS, SECTOR_COLS = 4, 8
+SECTOR_MIN_MM = 150  # En dessous : bruit ou sous la portée mini de la RealSense, traité comme un trou
+SECTOR_NEAR_FRACTION = 0.02  # "Plus proche" = 2e centile du secteur : quelques pixels volants ne comptent pas
+NO_SECTORS = np.zeros((SECTOR_ROWS, SECTOR_COLS), np.uint16)
+# Couloir de vol avant : colonnes du milieu, sans la rangée du bas qui voit le sol
+FORWARD_SECTORS = (slice(0, SECTOR_ROWS - 1), slice(SECTOR_COLS // 4, SECTOR_COLS * 3 // 4))
+
+def obstacle_sectors(depth, depth_scale):
+    """Profondeur z16 -> distance du plus proche obstacle par secteur (SECTOR_ROWS, SECTOR_COLS), en mm.
+
+    Une passe NumPy sur l'image sous-échantillonnée 1/2 : trous et mesures trop proches mis à 0xFFFF,
+    puis np.partition par secteur. 0 = secteur sans assez de mesures valides.
+    """
+    d = depth[::2, ::2]
+    h, w = d.shape
+    d = d[:h - h % SECTOR_ROWS, :w - w % SECTOR_COLS]
+    blocks = d.reshape(SECTOR_ROWS, h // SECTOR_ROWS, SECTOR_COLS, w // SECTOR_COLS).swapaxes(1, 2).reshape(SECTOR_ROWS, SECTOR_COLS, -1)
+    blocks = np.where(blocks < SECTOR_MIN_MM / (depth_scale * 1000), np.uint16(0xFFFF), blocks)
+    k = int(blocks.shape[-1] * SECTOR_NEAR_FRACTION)
+    near = np.partition(blocks, k, axis=-1)[..., k]
+    mm = np.clip(near * (depth_scale * 1000), 0, 0xFFFE).astype(np.uint16)
+    mm[near == 0xFFFF] = 0
+    return mm
+
+def nearest_ahead(sectors):
+    """Obstacle le plus proche dans le couloir avant, en mètres, ou None"""
+    ahead = sectors[FORWARD_SECTORS]
+    ahead = ahead[ahead > 0]
+    return ahead.min() / 1000.0 if ahead.size else None
+
 # ==========================================
 # 1. GESTION DRONE (AVEC VERROUILLAGE)
 # ==========================================
 class DroneController:
-    def __init__(self):
+    def __init__(self, guard=guard):
+        self.guard = guard  # Verrous admin de ce drone (un par véhicule en mode flotte)
         self.master = None
         self.lock = threading.Lock()
         self.target = {"x": 0, "y": 0, "z": 0, "r": 0}
         self.current = {"x": 0.0, "y": 0.0, "z": 0.0, "r": 0.0}
         self.telemetry = {"bat": 0, "alt": 0, "armed": False}
-        threading.Thread(target=self.run_mavlink_loop, daemon=True).start()
+        self.last_send = None
+        self.last_heard = None  # time.monotonic() du dernier message de l'autopilote
+        self.forward_scale = 1.0  # Limiteur obstacles : part du manche avant autorisée
+        self.obstacle_nearest = None  # Mètres, couloir avant
+        self.obstacle_time = 0.0  # time.monotonic() de la dernière grille reçue
+        self.obstacle_close_time = 0.0  # Dernière mesure du couloir sous OBSTACLE_SLOW_M
+        self.obstacle_blind = False  # Couloir aveugle juste après un obstacle proche : limite gelée
+
+    def start(self): threading.Thread(target=self.run_mavlink_loop, daemon=True).start()
 
     def find_pixhawk(self):
+        if MAVLINK_URL:
+            # Le routeur possède le port série, on se branche sur son endpoint
+            master = mavutil.mavlink_connection(MAVLINK_URL, source_system=255, source_component=190)
+            if master.wait_heartbeat(timeout=2):
+                print(f"✅ Pixhawk connecté via routeur: {MAVLINK_URL}")
+                return master
+            master.close()
+            return None
         print("🔍 Recherche Pixhawk...")
         ports = glob.glob('/dev/ttyACM*') + glob.glob('/dev/ttyUSB*') + glob.glob('/dev/ttyTHS*')
         for port in ports:
@@ -79,7 +396,7 @@ class DroneController:
 
     def arm(self, state=True, is_admin=False):
         # SI c'est le pilote ET que les commandes sont bloquées -> REFUSER
-        if not is_admin and not guard.controls_enabled:
+        if not is_admin and not self.guard.controls_enabled:
             print("⛔ TENTATIVE D'ARMEMENT BLOQUÉE (Admin Lock)")
             return
 
@@ -96,7 +413,7 @@ class DroneController:
 
     def update_sticks(self, l_x, l_y, r_x, r_y):
         # SI VERROUILLÉ -> On force tout à 0 (Stationnaire/Sol)
-        if not guard.controls_enabled:
+        if not self.guard.controls_enabled:
             with self.lock:
                 self.target = {"x": 0, "y": 0, "z": 0, "r": 0}
             return
@@ -116,34 +433,257 @@ class DroneController:
                 if not self.master:
                     time.sleep(2)
                     continue
+                status.set("mavlink", "ready", MAVLINK_URL or self.master.address)
             try:
-                msg = self.master.recv_match(blocking=False)
-                if msg:
-                    if msg.get_type() == 'SYS_STATUS': self.telemetry["bat"] = msg.voltage_battery / 1000.0
-                    elif msg.get_type() == 'HEARTBEAT': self.telemetry["armed"] = (msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) > 0
-
-                # Si Verrouillage d'urgence total, on coupe tout instantanément
-                if guard.emergency_lock:
-                    self.current = {"x": 0, "y": 0, "z": 0, "r": 0}
-                else:
-                    with self.lock:
-                        for axis in ["x", "y", "z", "r"]:
-                            diff = self.target[axis] - self.current[axis]
-                            self.current[axis] += diff * SMOOTH_FACTOR
-                
-                self.master.mav.manual_control_send(
-                    self.master.target_system,
-                    int(self.current["x"]), int(self.current["y"]),
-                    int(self.current["z"]), int(self.current["r"]), 0
-                )
+                # Tout ce qui est arrivé depuis le dernier tour : à un message par tour (50/s max), le flux
+                # complet de l'autopilote prend du retard et le journal en perd. Borné pour garder la cadence.
+                for _ in range(200):
+                    msg = self.master.recv_match(blocking=False)
+                    if not msg: break
+                    self.handle_message(msg)
+
+                self.smooth_step()
+                self.send_manual_control()
                 time.sleep(0.02)
-            except: self.master = None
+            except:
+                self.master = None
+                status.set("mavlink", "starting", "liaison perdue")
+
+    def handle_message(self, msg):
+        self.last_heard = time.monotonic()
+        MAVLINK_RX.inc(msg.get_type())
+        if journal and msg.get_type() != 'BAD_DATA': journal.append(msg.get_msgbuf())
+        if msg.get_type() == 'SYS_STATUS': self.telemetry["bat"] = msg.voltage_battery / 1000.0
+        elif msg.get_type() == 'HEARTBEAT': self.telemetry["armed"] = (msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED) > 0
+
+    def limit_forward(self, sectors):
+        now = time.monotonic()
+        d = self.obstacle_nearest = nearest_ahead(sectors)
+        self.obstacle_time = now
+        if OBSTACLE_SLOW_M <= 0: self.forward_scale = 1.0
+        elif d is not None:
+            self.obstacle_blind = False
+            self.forward_scale = min(1.0, max(0.0, (d - OBSTACLE_STOP_M) / (OBSTACLE_SLOW_M - OBSTACLE_STOP_M)))
+            if d < OBSTACLE_SLOW_M: self.obstacle_close_time = now
+        elif self.obstacle_blind or now - self.obstacle_close_time < OBSTACLE_BLIND_S:
+            # Plus aucune mesure juste après un obstacle proche : mur sous la portée mini ou sans texture,
+            # pas un couloir dégagé. On garde la dernière limite tant qu'il reste aveugle (reculer reste libre).
+            self.obstacle_blind = True
+        else: self.forward_scale = 1.0
+
+    def limiter_state(self):
+        """off (désactivé ou sans caméra), stale (grille périmée : pas de limite), blind (limite gelée), ok"""
+        if OBSTACLE_SLOW_M <= 0 or not self.obstacle_time: return "off"
+        if time.monotonic() - self.obstacle_time >= OBSTACLE_STALE_S: return "stale"
+        return "blind" if self.obstacle_blind else "ok"
+
+    def smooth_step(self):
+        # Si Verrouillage d'urgence total, on coupe tout instantanément
+        if self.guard.emergency_lock:
+            self.current = {"x": 0, "y": 0, "z": 0, "r": 0}
+        else:
+            # Grille périmée (caméra arrêtée) : pas de limite, le pilote garde la main (et le voit, push_limiter)
+            fresh = time.monotonic() - self.obstacle_time < OBSTACLE_STALE_S
+            with self.lock:
+                for axis in ["x", "y", "z", "r"]:
+                    target = self.target[axis]
+                    if axis == "x" and target > 0 and fresh: target *= self.forward_scale  # Avancer seulement
+                    diff = target - self.current[axis]
+                    self.current[axis] += diff * SMOOTH_FACTOR
+
+    def send_manual_control(self):
+        now = time.perf_counter()
+        if self.last_send: CONTROL_INTERVAL.observe(now - self.last_send)
+        self.last_send = now
+        self.master.mav.manual_control_send(
+            self.master.target_system,
+            int(self.current["x"]), int(self.current["y"]),
+            int(self.current["z"]), int(self.current["r"]), 0
+        )
 
 drone = DroneController()
 
+class VehicleLink:
+    """Ce que DroneController attend de self.master, pour un véhicule d'une liaison partagée par la flotte"""
+    def __init__(self, conn, sysid, compid):
+        self.conn = conn
+        self.target_system, self.target_component = sysid, compid
+        self.address = None  # UDP : adresse d'où ce véhicule parle, on ne répond qu'à lui
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255, srcComponent=190)
+
+    def write(self, buf):
+        if self.address: self.conn.port.sendto(buf, self.address)
+        else: self.conn.write(buf)
+
+class FleetManager:
+    """Mode flotte : un DroneController par véhicule (clé = system ID), un seul thread d'E/S pour toutes les liaisons"""
+    LINK_TIMEOUT = 3.0  # Véhicule muet depuis : plus de MANUAL_CONTROL tant qu'il ne reparle pas
+
+    def __init__(self, urls):
+        self.urls = urls
+        self.conns = {}  # fd -> (url, connexion mavutil)
+        self.vehicles = {}  # sysid -> DroneController
+
+    def start(self): threading.Thread(target=self.run, daemon=True).start()
+
+    def connect(self, url):
+        while True:
+            try:
+                conn = mavutil.mavlink_connection(url, source_system=255, source_component=190)
+                self.conns[conn.fd] = (url, conn)
+                return
+            except Exception as e:
+                print(f"⚠️ Flotte: {url} indisponible ({e})"); time.sleep(2)
+
+    def vehicle(self, conn, msg):
+        d = self.vehicles.get(msg.get_srcSystem())
+        if d is not None: return d
+        # Un véhicule n'est créé que sur le HEARTBEAT de son autopilote (pas les GCS ni les caméras)
+        if msg.get_type() != "HEARTBEAT" or msg.type == mavutil.mavlink.MAV_TYPE_GCS or msg.autopilot == mavutil.mavlink.MAV_AUTOPILOT_INVALID: return None
+        d = DroneController(SystemGuard())
+        d.master = VehicleLink(conn, msg.get_srcSystem(), msg.get_srcComponent())
+        self.vehicles[msg.get_srcSystem()] = d
+        print(f"✅ Flotte: drone {msg.get_srcSystem()} sur {conn.address}")
+        return d
+
+    def receive(self, conn):
+        # Vide la liaison sans bloquer ; en UDP chaque datagramme dit de quelle adresse parle le véhicule
+        while True:
+            addr = None
+            if isinstance(conn, mavutil.mavudp):
+                try: data, addr = conn.port.recvfrom(65535)
+                except (BlockingIOError, ConnectionRefusedError): return
+                msgs = conn.mav.parse_buffer(data) or []
+            else:
+                msg = conn.recv_msg()
+                if msg is None: return
+                msgs = [msg]
+            for msg in msgs:
+                if msg.get_type() == "BAD_DATA": continue
+                d = self.vehicle(conn, msg)
+                if d is None: continue
+                d.master.conn = conn  # Liaison rouverte, ou véhicule vu sur une liaison redondante
+                d.master.address = addr
+                d.handle_message(msg)
+
+    def tick(self):
+        now = time.monotonic()
+        for d in list(self.vehicles.values()):
+            d.smooth_step()
+            if now - d.last_heard > self.LINK_TIMEOUT: continue
+            try: d.send_manual_control()
+            except OSError: pass
+
+    def run(self):
+        for url in self.urls: self.connect(url)
+        status.set("mavlink", "ready", ",".join(self.urls))
+        next_tick = time.monotonic()
+        while True:
+            readable, _, _ = select.select(list(self.conns), [], [], max(0.0, next_tick - time.monotonic()))
+            for fd in readable:
+                url, conn = self.conns[fd]
+                try: self.receive(conn)
+                except Exception as e:
+                    # Port série débranché... : on ferme et on rouvre à côté, les autres liaisons continuent
+                    print(f"⚠️ Flotte: liaison {url} perdue ({e})")
+                    del self.conns[fd]
+                    try: conn.close()
+                    except: pass
+                    threading.Thread(target=self.connect, args=(url,), daemon=True).start()
+            if time.monotonic() >= next_tick:
+                self.tick()
+                # Même cadence que run_mavlink_loop (20 ms), sans rafale de rattrapage
+                next_tick = max(next_tick + 0.02, time.monotonic())
+
+    def summary(self, sysid, d):
+        return {"sysid": sysid, "telemetry": d.telemetry,
+                "link": d.last_heard is not None and time.monotonic() - d.last_heard <= self.LINK_TIMEOUT,
+                "controls": d.guard.controls_enabled, "emergency": d.guard.emergency_lock, "limiter": d.limiter_state()}
+
+fleet = FleetManager(FLEET_URLS)
+FLEET_VEHICLES = metric(Metric("skylink_fleet_vehicles", "Véhicules connus en mode flotte", "gauge",
+                               collect=lambda: {(): len(fleet.vehicles)}))
+
 # ==========================================
 # 2. GESTION VIDEO (AVEC CENSURE)
 # ==========================================
+# Détections : une ligne int32 par objet (aussi le format du ring du processus caméra)
+DET_FIELDS = ("x1", "y1", "x2", "y2", "cls", "conf", "track", "dist")  # conf en ‰, dist en mm (0 = inconnue)
+NO_DETECTIONS = np.zeros((0, len(DET_FIELDS)), np.int32)
+# /ws/detections, little-endian : en-tête 12 octets + 14 octets par objet
+DET_HEADER = struct.Struct("<BBHHIH")  # version, réservé, largeur, hauteur, seq de l'image, nb objets
+DET_VERSION = 1
+DET_WIRE = np.dtype([("x1", "<u2"), ("y1", "<u2"), ("x2", "<u2"), ("y2", "<u2"),
+                     ("cls", "u1"), ("conf", "u1"), ("track", "<u2"), ("dist_cm", "<u2")])  # conf en %
+
+DET_HAS_SECTORS = 1  # Drapeau : grille d'obstacles après les objets (lignes u8, colonnes u8, cm u16 chacun)
+
+def encode_detections(seq, dets, sectors=None):
+    out = np.zeros(len(dets), DET_WIRE)
+    for i, name in enumerate(("x1", "y1", "x2", "y2", "cls")): out[name] = np.clip(dets[:, i], 0, 0xFFFF)
+    out["conf"] = dets[:, 5] // 10
+    out["track"] = dets[:, 6] & 0xFFFF
+    out["dist_cm"] = np.clip(dets[:, 7] // 10, 0, 0xFFFF)
+    flags = DET_HAS_SECTORS if sectors is not None else 0
+    msg = DET_HEADER.pack(DET_VERSION, flags, WIDTH, HEIGHT, seq & 0xFFFFFFFF, len(dets)) + out.tobytes()
+    if sectors is not None: msg += struct.pack("<BB", *sectors.shape) + (sectors // 10).astype("<u2").tobytes()
+    return msg
+
+class IouTracker:
+    """ID stable d'une image à l'autre : chaque boîte reprend l'ID de la boîte précédente qui la recouvre le plus"""
+    def __init__(self, min_iou=0.3):
+        self.min_iou = min_iou
+        self.prev = NO_DETECTIONS
+        self.next_id = 1
+
+    def update(self, dets):
+        dets[:, 6] = 0
+        if len(dets) and len(self.prev):
+            a, b = dets[:, None, :4].astype(np.float32), self.prev[None, :, :4].astype(np.float32)
+            w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+            h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+            area = lambda x: (x[..., 2] - x[..., 0]) * (x[..., 3] - x[..., 1])
+            iou = w * h / np.maximum(area(a) + area(b) - w * h, 1)
+            # Glouton par IoU décroissante : au plus 32 boîtes, inutile de sortir l'algorithme hongrois
+            taken = set()
+            for flat in np.argsort(-iou, axis=None):
+                i, j = divmod(int(flat), iou.shape[1])
+                if iou[i, j] < self.min_iou: break
+                if dets[i, 6] or j in taken: continue
+                dets[i, 6] = self.prev[j, 6]; taken.add(j)
+        for d in dets:
+            if not d[6]: d[6] = self.next_id; self.next_id += 1
+        self.prev = dets
+        return dets
+
+class MotionGate:
+    """Dit si l'image a assez changé depuis la dernière inférence pour relancer YOLO.
+
+    Compare une vignette 160x120 en niveaux de gris à celle de la dernière inférence (pas à l'image
+    précédente : une dérive lente finit par déclencher). Le score est la part de pixels dont
+    l'écart dépasse PIXEL_DELTA, insensible au bruit capteur, contrairement à une moyenne.
+    """
+    SIZE = (160, 120)
+    PIXEL_DELTA = 15
+
+    def __init__(self, threshold=MOTION_THRESHOLD, max_age=MOTION_MAX_AGE):
+        self.threshold, self.max_age = threshold, max_age
+        self.ref = None
+        self.ref_time = 0.0
+        self.score = 0.0
+
+    def reset(self): self.ref = None
+
+    def should_run(self, img):
+        if self.threshold <= 0: return True
+        thumb = cv2.cvtColor(cv2.resize(img, self.SIZE, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+        now = time.monotonic()
+        if self.ref is not None and now - self.ref_time < self.max_age:
+            self.score = np.count_nonzero(cv2.absdiff(thumb, self.ref) > self.PIXEL_DELTA) / thumb.size
+            if self.score < self.threshold: return False
+        self.ref, self.ref_time = thumb, now
+        return True
+
 class CameraManager:
     def __init__(self):
         self.lock = threading.Lock()
@@ -151,18 +691,131 @@ class CameraManager:
         self.ai_enabled = False 
         self.view_mode = "normal" 
         self.frame = None 
+        self.frame_seq = 0  # Numéro de l'image courante, pour compter les images sautées
+        self.frame_time = 0.0
+        self.depth = None  # Profondeur z16 alignée de l'image courante
+        self.detections = NO_DETECTIONS  # Détections (DET_FIELDS) de l'image courante
+        self.sectors = None  # Grille d'obstacles (mm) de l'image courante, None sans profondeur
+        self.last_sectors = None
+        self.ring = None  # Dans le processus caméra : FrameRing où publier
+        self.last_detections = NO_DETECTIONS
+        self.tracker = IouTracker()
+        self.gate = MotionGate()
+        self.inferred = NO_DETECTIONS  # Résultat de la dernière inférence, réutilisé quand la scène ne bouge pas
+        self.rtp_writer = None
         # Image "CENSURÉE" (Ecran noir avec texte)
         self.blocked_frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
         cv2.putText(self.blocked_frame, "VIDEO BLOQUEE PAR ADMIN", (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
 
+        self.model = None  # Chargé par load_model(), l'IA reste inactive d'ici là
+        self.device = 'cpu'
+        self.depth_scale = 0.001  # Mètres par unité z16, lu sur le capteur au démarrage
+
+    def start(self):
+        target = self.run_synthetic if CAMERA_SOURCE == "synthetic" else self.run
+        threading.Thread(target=target, daemon=True).start()
+
+    def load_model(self):
+        import torch
+        from ultralytics import YOLO
         if torch.cuda.is_available(): self.device = 'cuda:0'; print("🚀 GPU OK")
         else: self.device = 'cpu'
-        try: self.model = YOLO('yolov8n.engine', task='detect'); print("✅ TRT OK")
-        except: self.model = YOLO('yolov8n.pt'); self.model.to(self.device)
+        try: model = YOLO('yolov8n.engine', task='detect'); print("✅ TRT OK")
+        except: model = YOLO('yolov8n.pt'); model.to(self.device)
+        self.model = model
 
-    def start(self): threading.Thread(target=self.run, daemon=True).start()
+    def detect(self, img):
+        """Personnes détectées (N, DET_FIELDS), sans track ni distance"""
+        boxes = self.model(img, classes=[0], conf=0.5, verbose=False, device=self.device)[0].boxes
+        dets = np.zeros((len(boxes), len(DET_FIELDS)), np.int32)
+        if len(boxes):
+            dets[:, :4] = boxes.xyxy.cpu().numpy()
+            dets[:, 4] = boxes.cls.cpu().numpy()
+            dets[:, 5] = boxes.conf.cpu().numpy() * 1000
+        return dets
+
+    def measure_distances(self, dets, depth):
+        # Médiane d'un patch 5x5 au centre de la boîte, trous (0) exclus
+        for d in dets:
+            cx, cy = (d[0] + d[2]) // 2, (d[1] + d[3]) // 2
+            patch = depth[max(cy - 2, 0):cy + 3, max(cx - 2, 0):cx + 3]
+            valid = patch[patch > 0]
+            d[7] = np.median(valid) * self.depth_scale * 1000 if valid.size else 0
+
+    def draw_detections(self, img, dets):
+        for x1, y1, x2, y2, _, _, _, dist in dets:
+            cv2.rectangle(img, (x1,y1), (x2,y2), (0,255,0), 2)
+            if dist: cv2.putText(img, f"{dist / 1000:.1f}m", (x1,y1-10), 0, 0.6, (0,255,0), 2)
+
+    def render_heatmap(self, depth):
+        return cv2.applyColorMap(cv2.convertScaleAbs(depth, alpha=0.03), cv2.COLORMAP_JET)
+
+    def draw_hud(self, img):
+        # HUD ETAT SYSTEME
+        status_txt = "SYSTEM: OK" if guard.controls_enabled else "SYSTEM: LOCK"
+        col = (0, 255, 0) if guard.controls_enabled else (0, 0, 255)
+        cv2.putText(img, status_txt, (10, 30), 0, 0.7, col, 2)
+
+        if guard.message:
+            cv2.putText(img, f"ADMIN: {guard.message}", (10, 450), 0, 0.8, (0, 255, 255), 2)
+
+    def process_frame(self, img, depth):
+        """Image couleur + profondeur alignée (z16, ou None) -> image affichée"""
+        if self.ring: self.ring.apply_settings(self)
+        dets = NO_DETECTIONS
+        if self.ai_enabled and self.model is not None:
+            t = time.perf_counter()
+            run = self.gate.should_run(img)
+            STAGE_SECONDS.observe(time.perf_counter() - t, "motion")
+            if run:
+                t = time.perf_counter()
+                self.inferred = self.tracker.update(self.detect(img))
+                STAGE_SECONDS.observe(time.perf_counter() - t, "inference")
+            INFERENCES.inc("run" if run else "skipped")
+            # Mêmes boîtes, mais distances remesurées : le drone peut avancer sur une scène figée
+            dets = self.inferred.copy()
+            if depth is not None: self.measure_distances(dets, depth)
+            if BURN_IN_DETECTIONS:
+                t = time.perf_counter()
+                self.draw_detections(img, dets)
+                STAGE_SECONDS.observe(time.perf_counter() - t, "overlay")
+        else: self.gate.reset()  # IA réactivée : première image toujours analysée
+
+        self.last_sectors = None
+        if depth is not None:
+            t = time.perf_counter()
+            self.last_sectors = obstacle_sectors(depth, self.depth_scale)
+            STAGE_SECONDS.observe(time.perf_counter() - t, "sectors")
+
+        if self.view_mode == "heatmap" and depth is not None:
+            t = time.perf_counter()
+            img = self.render_heatmap(depth)
+            STAGE_SECONDS.observe(time.perf_counter() - t, "heatmap")
+
+        t = time.perf_counter()
+        self.draw_hud(img)
+        STAGE_SECONDS.observe(time.perf_counter() - t, "hud")
+        self.last_detections = dets
+        return img
+
+    def publish(self, img, depth=None, detections=None, sectors=None):
+        if detections is None: detections, sectors = self.last_detections, self.last_sectors
+        if self.ring:
+            self.ring.write(img, depth, detections, sectors)
+            return
+        with self.lock:
+            self.frame = img
+            self.depth = depth
+            self.detections = detections
+            self.sectors = sectors
+            self.frame_seq += 1
+            self.frame_time = time.perf_counter()
+        if sectors is not None: drone.limit_forward(sectors)
+        CAPTURE_FRAMES.inc()
 
     def run(self):
+        try: import pyrealsense2 as rs
+        except ImportError as e: status.set("camera", "failed", str(e)); return
         pipeline = rs.pipeline()
         config = rs.config()
         config.enable_stream(rs.stream.color, WIDTH, HEIGHT, rs.format.bgr8, FPS_TARGET)
@@ -170,46 +823,235 @@ class CameraManager:
         try: 
             p = pipeline.start(config)
             p.get_device().first_color_sensor().set_option(rs.option.frames_queue_size, 1)
-        except: return
+            self.depth_scale = p.get_device().first_depth_sensor().get_depth_scale()
+        except Exception as e: status.set("camera", "failed", str(e)); return
+        status.set("camera", "ready", "realsense")
         
         align = rs.align(rs.stream.color)
+        if RTP_OUT_PORT:
+            self.rtp_writer = cv2.VideoWriter(RTP_PIPELINE.format(port=RTP_OUT_PORT), cv2.CAP_GSTREAMER, 0, FPS_TARGET, (WIDTH, HEIGHT))
+            if not self.rtp_writer.isOpened():
+                print("⚠️ Pipeline RTP indisponible (OpenCV sans GStreamer ?)")
+                self.rtp_writer = None
         while self.running:
             try:
-                fs = pipeline.wait_for_frames(timeout_ms=100)
+                t = time.perf_counter()
+                try: fs = pipeline.wait_for_frames(timeout_ms=100)
+                except RuntimeError: CAPTURE_TIMEOUTS.inc(); continue
+                t2 = time.perf_counter()
                 aligned = align.process(fs)
+                STAGE_SECONDS.observe(t2 - t, "wait")
+                STAGE_SECONDS.observe(time.perf_counter() - t2, "align")
                 c_frame = aligned.get_color_frame()
                 d_frame = aligned.get_depth_frame()
                 if not c_frame: continue
                 
                 img = np.asanyarray(c_frame.get_data())
-                
-                if self.ai_enabled:
-                    res = self.model(img, classes=[0], conf=0.5, verbose=False, device=self.device)
-                    for r in res:
-                        for box in r.boxes:
-                            x1,y1,x2,y2 = box.xyxy[0].cpu().numpy().astype(int)
-                            cv2.rectangle(img, (x1,y1), (x2,y2), (0,255,0), 2)
-                            if d_frame:
-                                dist = d_frame.get_distance(int((x1+x2)/2), int((y1+y2)/2))
-                                cv2.putText(img, f"{dist:.1f}m", (x1,y1-10), 0, 0.6, (0,255,0), 2)
-
-                if self.view_mode == "heatmap" and d_frame:
-                    dimg = np.asanyarray(d_frame.get_data())
-                    img = cv2.applyColorMap(cv2.convertScaleAbs(dimg, alpha=0.03), cv2.COLORMAP_JET)
-
-                # HUD ETAT SYSTEME
-                status_txt = "SYSTEM: OK" if guard.controls_enabled else "SYSTEM: LOCK"
-                col = (0, 255, 0) if guard.controls_enabled else (0, 0, 255)
-                cv2.putText(img, status_txt, (10, 30), 0, 0.7, col, 2)
-
-                if guard.message:
-                    cv2.putText(img, f"ADMIN: {guard.message}", (10, 450), 0, 0.8, (0, 255, 255), 2)
-
-                with self.lock: self.frame = img 
+                depth = np.asanyarray(d_frame.get_data()) if d_frame else None
+                img = self.process_frame(img, depth)
+
+                self.publish(img, depth)
+                if self.rtp_writer: self.rtp_writer.write(img)
             except: pass
 
+    def run_synthetic(self):
+        y, x = np.mgrid[0:HEIGHT, 0:WIDTH]
+        base = np.dstack([x * 255 // WIDTH, y * 255 // HEIGHT, (x ^ y) & 255]).astype(np.uint8)
+        # Mur à 8 m, sol dans le quart bas de l'image : le couloir avant est dégagé, pas de limiteur
+        depth = np.full((HEIGHT, WIDTH), 8000, np.uint16)
+        depth[HEIGHT * 3 // 4:] = np.linspace(8000, 500, HEIGHT - HEIGHT * 3 // 4)[:, None]
+        status.set("camera", "ready", "synthetic")
+        n = 0
+        while self.running:
+            t0 = time.time()
+            img = self.process_frame(np.roll(base, n * 4, axis=1), depth)
+            self.publish(img, depth)
+            n += 1
+            time.sleep(max(0, 1.0 / FPS_TARGET - (time.time() - t0)))
+
 cam = CameraManager()
-cam.start()
+
+def load_model_with_status():
+    try:
+        cam.load_model()
+        status.set("model", "ready", cam.device)
+    except Exception as e: status.set("model", "failed", str(e))
+
+# ==========================================
+# 2b. PROCESSUS CAMERA SEPARE (CAMERA_WORKER=1)
+# ==========================================
+RING_SLOTS = 4
+MAX_DETECTIONS = 32
+RING_HEADER_SIZE = 128
+RING_SETTINGS = struct.Struct("<BBBB64s")  # Web -> caméra : ai, heatmap, controls, longueur msg, msg admin
+RING_STATES = struct.Struct("<BB")  # Caméra -> web : état caméra, état modèle
+RING_STATES_OFFSET = 8 + RING_SETTINGS.size
+SLOT_HEADER = struct.Struct("<QdIB3x")  # seq (0 = en cours d'écriture), heure de capture, nb détections, drapeaux
+SLOT_HAS_SECTORS, SLOT_HAS_DEPTH = 1, 2  # Sans ces drapeaux, le slot garde les données d'une image plus ancienne
+STATE_CODES = ["starting", "ready", "failed"]
+
+class FrameRing:
+    """Images, profondeur et détections partagées entre processus sans pickling.
+
+    En-tête : dernier seq publié (u64), réglages écrits par le web, états écrits par la caméra.
+    Chaque slot : SLOT_HEADER, image BGR, profondeur z16, détections int32 (MAX_DETECTIONS, DET_FIELDS),
+    grille d'obstacles u16 (SECTOR_ROWS, SECTOR_COLS).
+    L'écrivain remet le seq du slot à 0 pendant l'écriture ; le lecteur relit ce seq après
+    copie et jette l'image si le slot a été réécrit entre-temps.
+    """
+    def __init__(self, name=None):
+        self.img_size = HEIGHT * WIDTH * 3
+        self.depth_size = HEIGHT * WIDTH * 2
+        self.slot_size = SLOT_HEADER.size + self.img_size + self.depth_size + MAX_DETECTIONS * 4 * len(DET_FIELDS) + NO_SECTORS.nbytes
+        size = RING_HEADER_SIZE + RING_SLOTS * self.slot_size
+        # Le processus caméra est lancé en "spawn" et partage le resource_tracker du web :
+        # le segment survit à ses crashs et n'est détruit que par close(unlink=True) côté web.
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.name = self.shm.name
+        buf = self.shm.buf
+        self.buf = buf
+        self.slots = []
+        for k in range(RING_SLOTS):
+            off = RING_HEADER_SIZE + k * self.slot_size
+            o = off + SLOT_HEADER.size
+            img = np.ndarray((HEIGHT, WIDTH, 3), np.uint8, buf, o)
+            depth = np.ndarray((HEIGHT, WIDTH), np.uint16, buf, o + self.img_size)
+            o += self.img_size + self.depth_size
+            dets = np.ndarray((MAX_DETECTIONS, len(DET_FIELDS)), np.int32, buf, o)
+            sectors = np.ndarray(NO_SECTORS.shape, np.uint16, buf, o + MAX_DETECTIONS * 4 * len(DET_FIELDS))
+            self.slots.append((off, img, depth, dets, sectors))
+
+    def latest(self):
+        return struct.unpack_from("<Q", self.buf, 0)[0]
+
+    # --- côté caméra ---
+    def write(self, img, depth, dets, sectors=None):
+        seq = self.latest() + 1
+        off, s_img, s_depth, s_dets, s_sectors = self.slots[seq % RING_SLOTS]
+        SLOT_HEADER.pack_into(self.buf, off, 0, 0.0, 0, 0)
+        s_img[:] = img
+        if depth is not None: s_depth[:] = depth
+        n = min(len(dets), MAX_DETECTIONS)
+        if n: s_dets[:n] = dets[:n]
+        if sectors is not None: s_sectors[:] = sectors
+        flags = (SLOT_HAS_SECTORS if sectors is not None else 0) | (SLOT_HAS_DEPTH if depth is not None else 0)
+        SLOT_HEADER.pack_into(self.buf, off, seq, time.time(), n, flags)
+        struct.pack_into("<Q", self.buf, 0, seq)
+
+    def apply_settings(self, camera):
+        ai, heatmap, controls, n, msg = RING_SETTINGS.unpack_from(self.buf, 8)
+        camera.ai_enabled = bool(ai)
+        camera.view_mode = "heatmap" if heatmap else "normal"
+        guard.controls_enabled = bool(controls)
+        guard.message = msg[:n].decode(errors="replace")
+
+    def set_state(self, name, state):
+        if name not in ("camera", "model"): return
+        struct.pack_into("<B", self.buf, RING_STATES_OFFSET + (name == "model"), STATE_CODES.index(state))
+
+    # --- côté web ---
+    def write_settings(self, camera):
+        msg = guard.message.encode()[:64]
+        RING_SETTINGS.pack_into(self.buf, 8, camera.ai_enabled, camera.view_mode == "heatmap", guard.controls_enabled, len(msg), msg)
+
+    def states(self):
+        return [STATE_CODES[c] if c < len(STATE_CODES) else "failed" for c in RING_STATES.unpack_from(self.buf, RING_STATES_OFFSET)]
+
+    def read(self, after):
+        """(seq, heure de capture, image, profondeur ou None, détections, grille ou None) plus récent que `after`, ou None"""
+        seq = self.latest()
+        if seq == after: return None
+        off, s_img, s_depth, s_dets, s_sectors = self.slots[seq % RING_SLOTS]
+        slot_seq, captured, n, flags = SLOT_HEADER.unpack_from(self.buf, off)
+        if slot_seq != seq: return None
+        out = (seq, captured, s_img.copy(), s_depth.copy() if flags & SLOT_HAS_DEPTH else None, s_dets[:n].copy(),
+               s_sectors.copy() if flags & SLOT_HAS_SECTORS else None)
+        if SLOT_HEADER.unpack_from(self.buf, off)[0] != seq: return None  # Réécrit pendant la copie
+        return out
+
+    def close(self, unlink=False):
+        self.slots = []
+        self.buf = None
+        self.shm.close()
+        if unlink: self.shm.unlink()
+
+def camera_worker_main(ring_name, parent_pid):
+    """Point d'entrée du processus caméra : capture, alignement, IA et HUD, publiés dans le ring"""
+    ring = FrameRing(ring_name)
+    status.on_change = ring.set_state
+    cam.ring = ring
+
+    def watch_parent():
+        # Processus web tué (SIGKILL) : ne pas garder la caméra
+        while os.getppid() == parent_pid: time.sleep(1)
+        os._exit(0)
+    threading.Thread(target=watch_parent, daemon=True).start()
+    threading.Thread(target=load_model_with_status, daemon=True).start()
+    status.set("model", "starting")
+    status.set("camera", "starting")
+    (cam.run_synthetic if CAMERA_SOURCE == "synthetic" else cam.run)()
+
+class CameraWorker:
+    """Côté web : lance le processus caméra, le relance s'il meurt ou se fige, recopie ses images dans cam"""
+    STALL_S = 5.0  # Caméra prête mais plus aucune image depuis : processus figé, on le relance
+
+    def __init__(self):
+        self.ring = None
+        self.proc = None
+        self.last_frame_at = 0.0
+        self.threads = []
+
+    def start(self):
+        self.ring = FrameRing()
+        self.ring.write_settings(cam)
+        self.threads = [threading.Thread(target=f, daemon=True) for f in (self.supervise, self.read_loop)]
+        for t in self.threads: t.start()
+
+    def supervise(self):
+        # spawn : pas de fork d'un processus qui a déjà des threads (boucle MAVLink, aiohttp)
+        ctx = multiprocessing.get_context("spawn")
+        backoff = 1
+        while cam.running:
+            self.proc = ctx.Process(target=camera_worker_main, args=(self.ring.name, os.getpid()), daemon=True)
+            self.proc.start()
+            started = self.last_frame_at = time.monotonic()
+            while cam.running and self.proc.is_alive():
+                self.proc.join(1.0)
+                if self.ring.states()[0] == "ready" and time.monotonic() - self.last_frame_at > self.STALL_S:
+                    print("⚠️ Processus caméra figé, arrêt")
+                    self.proc.kill()
+            if not cam.running: break
+            WORKER_RESTARTS.inc()
+            status.set("camera", "failed", f"processus caméra terminé ({self.proc.exitcode}), relance dans {backoff} s")
+            time.sleep(backoff)
+            # Crash au démarrage : on espace les relances ; après un long vol, relance immédiate
+            backoff = min(backoff * 2, 10) if time.monotonic() - started < 30 else 1
+
+    def read_loop(self):
+        last, states = 0, None
+        while cam.running:
+            self.ring.write_settings(cam)
+            if self.ring.states() != states:
+                states = self.ring.states()
+                for name, state in zip(("camera", "model"), states):
+                    if status.subsystems.get(name, {}).get("state") != state: status.set(name, state, "processus caméra")
+            got = self.ring.read(last)
+            if got is None:
+                time.sleep(0.003)
+                continue
+            seq, _, img, depth, dets, sectors = got
+            if last and seq > last + 1: RING_SKIPPED.inc(amount=seq - last - 1)
+            last = seq
+            self.last_frame_at = time.monotonic()
+            cam.publish(img, depth, dets, sectors)
+
+    def stop(self):
+        # cam.running est déjà à False : on attend les deux threads avant de libérer la mémoire partagée
+        for t in self.threads: t.join(3)
+        if self.proc and self.proc.is_alive(): self.proc.terminate(); self.proc.join(2)
+        if self.ring: self.ring.close(unlink=True)
+
+camera_worker = CameraWorker()
 
 # ==========================================
 # 3. ROUTES & LOGIQUE ADMIN
@@ -219,19 +1061,42 @@ async def on_shutdown(app):
     [await pc.close() for pc in pcs]
     pcs.clear()
     cam.running = False
+    if "loop_lag" in app: app["loop_lag"].cancel()
+    if CAMERA_WORKER: camera_worker.stop()
+    if journal: journal.close()
+
+CONNECTED = {"pilot": 0, "mjpeg": 0, "detections": 0}
+CLIENTS.collect = lambda: {("pilot",): CONNECTED["pilot"], ("mjpeg",): CONNECTED["mjpeg"], ("webrtc",): len(pcs),
+                           ("detections",): CONNECTED["detections"]}
+
+def note_frame_sent(consumer, last_seq):
+    """A appeler sous cam.lock : compte les images sautées depuis le dernier envoi de ce client"""
+    seq = cam.frame_seq
+    if last_seq is not None and seq > last_seq + 1: FRAMES_SKIPPED.inc(consumer, amount=seq - last_seq - 1)
+    FRAME_AGE.observe(time.perf_counter() - cam.frame_time, consumer)
+    return seq
+
+def pilot_video_frame(track=None):
+    """Image courante pour le pilote, convertie pour WebRTC"""
+    # VERIFICATION ADMIN : Si vidéo coupée, envoyer écran noir
+    if not guard.video_enabled:
+        return av.VideoFrame.from_ndarray(cam.blocked_frame, format="bgr24")
+
+    t = time.perf_counter()
+    with cam.lock:
+        if cam.frame is None: return av.VideoFrame.from_ndarray(np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8), format="bgr24")
+        img = cam.frame.copy()
+        if track: track.last_seq = note_frame_sent("webrtc", track.last_seq)
+    frame = av.VideoFrame.from_ndarray(img, format="bgr24")
+    STAGE_SECONDS.observe(time.perf_counter() - t, "video_frame")
+    return frame
 
 class VideoTrack(VideoStreamTrack):
+    last_seq = None
+
     async def recv(self):
         await asyncio.sleep(0.03)
-        
-        # VERIFICATION ADMIN : Si vidéo coupée, envoyer écran noir
-        if not guard.video_enabled:
-            return av.VideoFrame.from_ndarray(cam.blocked_frame, format="bgr24")
-
-        with cam.lock:
-            if cam.frame is None: return av.VideoFrame.from_ndarray(np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8), format="bgr24")
-            img = cam.frame.copy()
-        new_frame = av.VideoFrame.from_ndarray(img, format="bgr24")
+        new_frame = pilot_video_frame(self)
         pts, time_base = await self.next_timestamp()
         new_frame.pts = pts; new_frame.time_base = time_base
         return new_frame
@@ -250,7 +1115,11 @@ async def admin_control(request):
         return add_cors_headers(response)
     
     data = await request.json()
-    
+    response = web.json_response(apply_admin(data, drone))
+    return add_cors_headers(response)
+
+def apply_admin(data, d):
+    guard = d.guard
     if "lock_controls" in data:
         guard.controls_enabled = not data["lock_controls"] # True = Unlocked
         print(f"👑 ADMIN: Controls {'UNLOCKED' if guard.controls_enabled else 'LOCKED'}")
@@ -261,7 +1130,7 @@ async def admin_control(request):
         
     if "emergency" in data:
         # Arrêt d'urgence total
-        drone.arm(False, is_admin=True)
+        d.arm(False, is_admin=True)
         guard.controls_enabled = False
         guard.video_enabled = False
         guard.emergency_lock = True
@@ -270,52 +1139,179 @@ async def admin_control(request):
     if "message" in data:
         guard.message = data["message"] # Afficher msg sur écran pilote
 
-    response = web.json_response({
+    return {
         "controls": guard.controls_enabled,
         "video": guard.video_enabled,
         "emergency": guard.emergency_lock
-    })
-    return add_cors_headers(response)
+    }
 
 # --- FLUX ADMIN (Toujours visible, ignore le blocage) ---
 async def mjpeg_handler(request):
     # L'Admin voit TOUJOURS, même si le pilote est bloqué
     response = web.StreamResponse(status=200, reason='OK', headers={'Content-Type': 'multipart/x-mixed-replace;boundary=--frame', 'Access-Control-Allow-Origin': '*'})
     await response.prepare(request)
-    while True:
-        await asyncio.sleep(0.05)
-        frame_bytes = None
-        with cam.lock:
-            if cam.frame is not None:
-                # L'Admin voit l'image brute, sans la censure "VIDEO BLOQUEE"
-                ret, buffer = cv2.imencode('.jpg', cam.frame, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
-                if ret: frame_bytes = buffer.tobytes()
-        if frame_bytes:
-            await response.write(b'--frame\r\n'); await response.write(b'Content-Type: image/jpeg\r\n\r\n'); await response.write(frame_bytes); await response.write(b'\r\n')
+    CONNECTED["mjpeg"] += 1
+    last_seq = None
+    try:
+        while True:
+            await asyncio.sleep(0.05)
+            frame_bytes = None
+            with cam.lock:
+                if cam.frame is not None:
+                    # L'Admin voit l'image brute, sans la censure "VIDEO BLOQUEE"
+                    t = time.perf_counter()
+                    frame_bytes = encode_jpeg(cam.frame)
+                    STAGE_SECONDS.observe(time.perf_counter() - t, "encode_jpeg")
+                    last_seq = note_frame_sent("mjpeg", last_seq)
+            if frame_bytes:
+                await response.write(b'--frame\r\n'); await response.write(b'Content-Type: image/jpeg\r\n\r\n'); await response.write(frame_bytes); await response.write(b'\r\n')
+    finally:
+        CONNECTED["mjpeg"] -= 1
     return response
 
+async def detections_handler(r):
+    # Détections de chaque nouvelle image en binaire (DET_HEADER + DET_WIRE), le client dessine lui-même.
+    # Même règle que la vidéo : rien pour le pilote si l'admin a coupé la vidéo, sauf ?token=<admin>
+    ws = web.WebSocketResponse(); await ws.prepare(r)
+    admin = r.query.get("token") == ADMIN_TOKEN
+    CONNECTED["detections"] += 1
+    last_seq, was_empty = None, False
+    try:
+        while not ws.closed:
+            await asyncio.sleep(0.01)
+            with cam.lock:
+                if cam.frame_seq == last_seq: continue
+                last_seq, dets, sectors = cam.frame_seq, cam.detections, cam.sectors
+            if not admin and not guard.video_enabled: dets = NO_DETECTIONS
+            # Une seule trame vide quand tout disparaît (IA coupée, pas de profondeur...), pas une par image
+            if not len(dets) and sectors is None and was_empty: continue
+            was_empty = not len(dets) and sectors is None
+            await ws.send_bytes(encode_detections(last_seq, dets, sectors))
+    except ConnectionResetError: pass
+    finally:
+        CONNECTED["detections"] -= 1
+    return ws
+
+def encode_jpeg(img):
+    ret, buffer = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), 50])
+    return buffer.tobytes() if ret else None
+
 async def index(r): 
+    if status.first_page is None:
+        status.first_page = round(process_age(), 2)
+        print(f"⏱️ Première page servie {status.first_page} s après le lancement")
     response = web.Response(content_type="text/html", text=HTML_PAGE)
     return add_cors_headers(response)
 
 async def websocket_handler(r):
+    return await control_socket(r, drone)
+
+async def push_limiter(ws, d):
+    # Le pilote doit savoir quand le limiteur ne le protège plus (grille périmée) ou bloque l'avant sans mesure
+    last = None
+    try:
+        while not ws.closed:
+            state = {"limiter": d.limiter_state(), "forward_scale": round(d.forward_scale, 1)}
+            if state != last: await ws.send_json(state); last = state
+            await asyncio.sleep(0.2)
+    except ConnectionResetError: pass
+
+async def control_socket(r, d):
     ws = web.WebSocketResponse(); await ws.prepare(r)
-    async for msg in ws:
-        if msg.type == web.WSMsgType.TEXT:
-            try:
-                # VERIFICATION PILOTE
-                # Si les contrôles sont coupés, on ignore tout sauf le "Ping"
-                if not guard.controls_enabled:
-                    continue
+    CONNECTED["pilot"] += 1
+    pusher = asyncio.ensure_future(push_limiter(ws, d))
+    try:
+        async for msg in ws:
+            if msg.type == web.WSMsgType.TEXT:
+                try:
+                    # VERIFICATION PILOTE
+                    # Si les contrôles sont coupés, on ignore tout sauf le "Ping"
+                    if not d.guard.controls_enabled:
+                        WS_MESSAGES.inc("locked")
+                        continue
 
-                d = json.loads(msg.data)
-                if 'action' in d:
-                    if d["action"]=="ARM": drone.arm(True)
-                    elif d["action"]=="DISARM": drone.arm(False)
-                if 'l' in d: drone.update_sticks(float(d['l']['x']), float(d['l']['y']), float(d['r']['x']), float(d['r']['y']))
-            except: pass
+                    handle_control_message(msg.data, d)
+                    WS_MESSAGES.inc("ok")
+                except: WS_MESSAGES.inc("error")
+    finally:
+        pusher.cancel()
+        CONNECTED["pilot"] -= 1
     return ws
 
+def handle_control_message(raw, target=drone):
+    d = json.loads(raw)
+    if 'action' in d:
+        if d["action"]=="ARM": target.arm(True)
+        elif d["action"]=="DISARM": target.arm(False)
+    if 'l' in d: target.update_sticks(float(d['l']['x']), float(d['l']['y']), float(d['r']['x']), float(d['r']['y']))
+
+# --- MODE FLOTTE : routes par drone (/api/drones/{sysid}/...) ---
+def fleet_drone(r):
+    try: return fleet.vehicles.get(int(r.match_info["sysid"]))
+    except ValueError: return None
+
+async def fleet_list(r):
+    response = web.json_response([fleet.summary(sysid, d) for sysid, d in sorted(fleet.vehicles.items())])
+    return add_cors_headers(response)
+
+async def fleet_status(r):
+    d = fleet_drone(r)
+    if d is None: return add_cors_headers(web.json_response({"error": "unknown drone"}, status=404))
+    return add_cors_headers(web.json_response(fleet.summary(d.master.target_system, d)))
+
+async def fleet_control_socket(r):
+    d = fleet_drone(r)
+    if d is None: raise web.HTTPNotFound()
+    return await control_socket(r, d)
+
+async def fleet_admin(r):
+    if r.method == 'OPTIONS': return add_cors_headers(web.Response())
+    if r.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return add_cors_headers(web.json_response({"error": "Unauthorized"}, status=403))
+    d = fleet_drone(r)
+    if d is None: return add_cors_headers(web.json_response({"error": "unknown drone"}, status=404))
+    return add_cors_headers(web.json_response(apply_admin(await r.json(), d)))
+
+async def ready_handler(r):
+    response = web.json_response({
+        "ready": status.ready(),
+        "uptime_s": round(process_age(), 2),
+        "first_page_s": status.first_page,
+        "subsystems": status.subsystems,
+    }, status=200 if status.ready() else 503)
+    return add_cors_headers(response)
+
+async def start_subsystems(app):
+    # Lancé en tâche de fond : aiohttp n'ouvre le port qu'après les hooks on_startup
+    loop = asyncio.get_running_loop()
+    if journal: journal.start()
+    if FLEET_URLS:
+        # Serveur de contrôle seul : une boucle MAVLink pour tous les drones, ni caméra ni modèle
+        status.set("mavlink", "starting")
+        fleet.start()
+        return
+    for name in ("model", "camera", "mavlink"): status.set(name, "starting")
+    drone.start()
+    if CAMERA_WORKER:
+        # Modèle et caméra vivent dans le processus caméra ; ici on ne fait que lire le ring
+        camera_worker.start()
+        return
+    cam.start()
+    app["model_task"] = loop.run_in_executor(None, load_model_with_status)
+
+async def metrics_handler(r):
+    return web.Response(body=render_metrics().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+async def monitor_loop_lag(app):
+    # Retard de réveil d'un sleep de 100 ms = temps où d'autres callbacks ont tenu la boucle
+    async def run():
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(0.1)
+            LOOP_LAG.observe(max(0.0, loop.time() - t - 0.1))
+    app["loop_lag"] = asyncio.ensure_future(run())
+
 async def offer(r):
     # Handle OPTIONS preflight request
     if r.method == 'OPTIONS':
@@ -346,7 +1342,8 @@ async def toggle(r):
     d = await r.json()
     if "ai" in d: cam.ai_enabled = d["ai"]
     if "view" in d: cam.view_mode = d["view"]
-    response = web.json_response({"status":"ok"})
+    # L'IA activée avant la fin du chargement du modèle démarre dès qu'il est prêt
+    response = web.json_response({"status":"ok", "model": status.subsystems.get("model", {}).get("state")})
     return add_cors_headers(response)
 
 HTML_PAGE = """
@@ -358,7 +1355,8 @@ HTML_PAGE = """
     <script src="https://cdnjs.cloudflare.com/ajax/libs/nipplejs/0.10.1/nipplejs.min.js"></script>
     <style>
         body { margin: 0; background: #000; overflow: hidden; user-select: none; touch-action: none; }
-        #vid { position: absolute; width: 100%; height: 100%; object-fit: cover; z-index: 1; }
+        #vid, #ov { position: absolute; width: 100%; height: 100%; object-fit: cover; z-index: 1; }
+        #ov { z-index: 2; pointer-events: none; }
         #ui { position: absolute; width: 100%; height: 100%; z-index: 10; pointer-events: none; }
         .top-bar { display: flex; justify-content: space-between; padding: 15px; pointer-events: auto; background: rgba(0,0,0,0.3); }
         .btn { background: rgba(255,255,255,0.2); border: 1px solid rgba(255,255,255,0.5); color: white; padding: 12px 20px; border-radius: 20px; font-weight: bold; cursor: pointer; }
@@ -374,6 +1372,7 @@ HTML_PAGE = """
 </head>
 <body>
     <video id="vid" autoplay playsinline muted></video>
+    <canvas id="ov"></canvas>
     <div id="ui">
         <div class="top-bar">
             <div style="display:flex; gap:15px">
@@ -390,10 +1389,18 @@ HTML_PAGE = """
         <div id="zone-r" class="stick-container"></div>
     </div>
 <script>
-    const ws = new WebSocket("ws://" + location.host + "/ws/control");
+    // Mode flotte : /?drone=<system ID> pilote ce drone
+    const droneId = new URLSearchParams(location.search).get('drone');
+    const ws = new WebSocket("ws://" + location.host + (droneId ? "/api/drones/" + droneId + "/ws/control" : "/ws/control"));
     const status = document.getElementById('status');
     ws.onopen = () => { status.innerText="ONLINE"; status.style.color="#2ecc71"; };
     ws.onclose = () => { status.innerText="OFFLINE"; status.style.color="#e74c3c"; };
+    // État du limiteur obstacles poussé par le serveur : stale = plus de protection, blind = avant bloqué
+    const LIMITER = { stale: ["ONLINE - OBSTACLES: PAS DE CAMERA", "#f39c12"], blind: ["ONLINE - OBSTACLE: AVANT BLOQUE", "#e74c3c"] };
+    ws.onmessage = e => {
+        const m = JSON.parse(e.data), [text, color] = LIMITER[m.limiter] || ["ONLINE", "#2ecc71"];
+        status.innerText = text; status.style.color = color;
+    };
     function send(act) { if(ws.readyState===1) ws.send(JSON.stringify({action:act})); }
     let ai=false, view="normal";
     function toggle(type) {
@@ -408,6 +1415,39 @@ HTML_PAGE = """
     joyR.on('move', (e,d) => { cmd.r.x=d.vector.x; cmd.r.y=d.vector.y; });
     joyR.on('end', () => { cmd.r.x=0; cmd.r.y=0; });
     setInterval(() => { if(ws.readyState===1) ws.send(JSON.stringify(cmd)); }, 33);
+    // Détections : 12 octets d'en-tête puis 14 par objet (voir DET_WIRE côté serveur)
+    const ov = document.getElementById('ov'), ctx = ov.getContext('2d');
+    function drawDetections(buf) {
+        const v = new DataView(buf), w = v.getUint16(2, true), h = v.getUint16(4, true), n = v.getUint16(10, true);
+        ov.width = ov.clientWidth; ov.height = ov.clientHeight;
+        // Même cadrage que la vidéo (object-fit: cover)
+        const s = Math.max(ov.width / w, ov.height / h), dx = (ov.width - w * s) / 2, dy = (ov.height - h * s) / 2;
+        ctx.strokeStyle = ctx.fillStyle = 'lime'; ctx.lineWidth = 2; ctx.font = 'bold 16px monospace';
+        for (let i = 0, o = 12; i < n; i++, o += 14) {
+            const x1 = v.getUint16(o, true) * s + dx, y1 = v.getUint16(o + 2, true) * s + dy;
+            const x2 = v.getUint16(o + 4, true) * s + dx, y2 = v.getUint16(o + 6, true) * s + dy, cm = v.getUint16(o + 12, true);
+            ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+            if (cm) ctx.fillText((cm / 100).toFixed(1) + 'm', x1, y1 - 8);
+        }
+        // Grille d'obstacles : une barre par colonne en bas d'écran, couleur selon l'obstacle le plus proche
+        if (!(v.getUint8(1) & 1)) return;
+        const o = 12 + n * 14, rows = v.getUint8(o), cols = v.getUint8(o + 1), bw = ov.width / cols;
+        for (let c = 0; c < cols; c++) {
+            let near = 0;
+            for (let r = 0; r < rows - 1; r++) {  // Sans la rangée du bas (le sol)
+                const cm = v.getUint16(o + 2 + (r * cols + c) * 2, true);
+                if (cm && (!near || cm < near)) near = cm;
+            }
+            if (!near) continue;
+            ctx.fillStyle = near < 150 ? 'rgba(231,76,60,0.8)' : near < 400 ? 'rgba(243,156,18,0.7)' : 'rgba(46,204,113,0.4)';
+            ctx.fillRect(c * bw + 2, ov.height - 10, bw - 4, 8);
+        }
+    }
+    if (!droneId) {
+        const det = new WebSocket("ws://" + location.host + "/ws/detections");
+        det.binaryType = 'arraybuffer';
+        det.onmessage = e => drawDetections(e.data);
+    }
     const pc = new RTCPeerConnection();
     pc.ontrack = e => document.getElementById('vid').srcObject = e.streams[0];
     pc.addTransceiver('video', {direction:'recvonly'});
@@ -419,12 +1459,24 @@ HTML_PAGE = """
 
 if __name__ == "__main__":
     app = web.Application()
+    # Caméra, autopilote et modèle démarrent en parallèle, le port HTTP est ouvert sans les attendre.
+    # Rien n'est lancé à l'import : les benchmarks importent ce module sans matériel.
+    app.on_startup.append(start_subsystems)
+    app.on_startup.append(monitor_loop_lag)
     app.on_shutdown.append(on_shutdown)
     app.router.add_get("/", index)
     app.router.add_get("/ws/control", websocket_handler)
     app.router.add_get("/video_feed", mjpeg_handler) # Flux ADMIN (Non censuré)
+    app.router.add_get("/ws/detections", detections_handler) # Détections en binaire, dessinées par le client
     app.router.add_post("/offer", offer)
     app.router.add_post("/api/toggle", toggle)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/api/ready", ready_handler)
+    app.router.add_get("/api/drones", fleet_list)
+    app.router.add_get("/api/drones/{sysid}", fleet_status)
+    app.router.add_get("/api/drones/{sysid}/ws/control", fleet_control_socket)
+    app.router.add_post("/api/drones/{sysid}/admin", fleet_admin)
+    app.router.add_options("/api/drones/{sysid}/admin", fleet_admin)
     
     # NOUVELLE ROUTE ADMIN (Pour bloquer/débloquer)
     app.router.add_post("/api/admin", admin_control)
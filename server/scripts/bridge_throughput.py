@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+SkyLink Bridge Throughput Test
+Measures MAVProxyBridge forwarding on one machine, without a CubePilot or server
+
+This script:
+1. Creates a pseudo-terminal that stands in for the CubePilot serial port
+2. Binds a local UDP socket that stands in for the central server
+3. Pushes synthetic MAVLink frames through the bridge as fast as it takes them
+4. Sends large downlink datagrams back and checks they reach the serial side intact
+
+With --link (repeatable) the bridge bonds several loopback sockets; the stand-in
+server echoes link probes and drops duplicates by sequence number like the real one.
+Add ",loss=0.3" to a link spec to inject packet loss on it.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import tty
+from typing import Optional
+
+from mavproxy_bridge import (
+    BOND_BALANCE,
+    BOND_REDUNDANT,
+    BRIDGE_HEADER,
+    KIND_DATA,
+    KIND_PROBE,
+    KIND_PROBE_REPLY,
+    MAX_DATAGRAM_SIZE,
+    MAVProxyBridge,
+    MavlinkFrameParser,
+    SequenceTracker,
+    unpack_header,
+)
+
+DRONE_ID = "bench-001"
+ATTITUDE_MSGID = 30
+ATTITUDE_LEN = 28
+HEARTBEAT_MSGID = 0
+HEARTBEAT_LEN = 9
+
+def synthetic_frame(msgid: int, payload_len: int, seq: int, sysid: int = 1, compid: int = 1) -> bytes:
+    """MAVLink v2 frame with a zero payload and dummy CRC"""
+    header = struct.pack(
+        "<BBBBBBBHB", 0xFD, payload_len, 0, 0, seq & 0xFF, sysid, compid,
+        msgid & 0xFFFF, msgid >> 16
+    )
+    return header + bytes(payload_len) + b"\0\0"
+
+def synthetic_stream(count: int) -> bytes:
+    """ATTITUDE-heavy stream with a HEARTBEAT every 50 frames, like a real autopilot"""
+    frames = []
+    for seq in range(count):
+        if seq % 50 == 0:
+            frames.append(synthetic_frame(HEARTBEAT_MSGID, HEARTBEAT_LEN, seq))
+        else:
+            frames.append(synthetic_frame(ATTITUDE_MSGID, ATTITUDE_LEN, seq))
+    return b"".join(frames)
+
+class ServerStandIn:
+    """Counts what the bridge delivers and remembers where it sends from"""
+
+    def __init__(self, drone_num: Optional[int]):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.prefix_len = BRIDGE_HEADER.size if drone_num is not None else len(f"{DRONE_ID}:")
+        self.drone_num = drone_num
+        self.parser = MavlinkFrameParser()
+        self.tracker = SequenceTracker()
+        self.bridge_addr = None
+        self.datagrams = 0
+        self.frames = 0
+        self.bytes = 0
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if self.drone_num is not None:
+                header = unpack_header(data)
+                if header is None:
+                    continue
+                if header.kind == KIND_PROBE:
+                    self.sock.sendto(data[:3] + bytes([KIND_PROBE_REPLY]) + data[4:], addr)
+                    continue
+                if not self.tracker.update(header.seq, header.sent_us):
+                    continue  # Same datagram already arrived on another link
+                if header.kind != KIND_DATA:
+                    self.bridge_addr = addr
+                    continue
+            elif not data.startswith(f"{DRONE_ID}:".encode()):
+                self.bridge_addr = addr
+                continue
+            self.bridge_addr = addr
+            now = time.perf_counter()
+            if self.first_at is None:
+                self.first_at = now
+            self.last_at = now
+            self.datagrams += 1
+            self.bytes += len(data)
+            self.frames += len(self.parser.feed(data[self.prefix_len:]))
+
+def run_uplink(bridge: MAVProxyBridge, server: ServerStandIn, master_fd: int, frames: int) -> dict:
+    stream = synthetic_stream(frames)
+    started = time.perf_counter()
+    view = memoryview(stream)
+    while view:
+        written = os.write(master_fd, view[:4096])
+        view = view[written:]
+    deadline = time.time() + 10
+    while server.frames < frames and time.time() < deadline:
+        time.sleep(0.01)
+    elapsed = max((server.last_at or time.perf_counter()) - started, 1e-9)
+    return {
+        "frames_sent": frames,
+        "frames_received": server.frames,
+        "datagrams": server.datagrams,
+        "bytes_on_wire": server.bytes,
+        "seconds": elapsed,
+        "frames_per_sec": server.frames / elapsed,
+        "mbit_per_sec": server.bytes * 8 / elapsed / 1e6,
+        "avg_frames_per_datagram": server.frames / server.datagrams if server.datagrams else 0.0,
+        "parser_dropped_bytes": bridge.parser.dropped_bytes,
+        "receiver": server.tracker.summary() if bridge.drone_num is not None else None,
+    }
+
+def run_downlink(bridge: MAVProxyBridge, server: ServerStandIn, master_fd: int, count: int, size: int) -> dict:
+    if server.bridge_addr is None:
+        return {"error": "bridge address unknown"}
+    if bridge.drone_num is not None:
+        prefix_len = BRIDGE_HEADER.size
+    else:
+        prefix_len = len(bridge.prefix)
+    payload = bytes(range(256)) * (size // 256 + 1)
+    payload = payload[:size - prefix_len]
+    received = bytearray()
+    expected = len(payload) * count
+    os.set_blocking(master_fd, False)
+
+    started = time.perf_counter()
+    for seq in range(count):
+        if bridge.drone_num is not None:
+            header = BRIDGE_HEADER.pack(b"SL", 1, 0, bridge.drone_num, seq, time.time_ns() // 1000)
+        else:
+            header = bridge.prefix
+        server.sock.sendto(header + payload, server.bridge_addr)
+    deadline = time.time() + 10
+    while len(received) < expected and time.time() < deadline:
+        try:
+            received += os.read(master_fd, 1 << 16)
+        except BlockingIOError:
+            time.sleep(0.001)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return {
+        "datagrams": count,
+        "datagram_size": size,
+        "bytes_expected": expected,
+        "bytes_received": len(received),
+        "intact": bytes(received) == payload * count,
+        "seconds": elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink bridge throughput test")
+    parser.add_argument("--frames", type=int, default=200000, help="Synthetic frames to push uplink")
+    parser.add_argument("--downlink-count", type=int, default=20, help="Downlink datagrams to send")
+    parser.add_argument("--downlink-size", type=int, default=60000, help="Downlink datagram size in bytes")
+    parser.add_argument("--drone-num", type=int, help="Use the binary header with this drone number")
+    parser.add_argument("--mtu", type=int, default=1200)
+    parser.add_argument("--flush-ms", type=float, default=20)
+    parser.add_argument("--link", action="append", metavar="SPEC", help="Bond a local socket, e.g. 127.0.0.1,loss=0.3 (repeatable, needs --drone-num)")
+    parser.add_argument("--bond-mode", choices=[BOND_BALANCE, BOND_REDUNDANT], default=BOND_BALANCE)
+    parser.add_argument("--settle", type=float, default=0.0, help="Seconds to let link probes run before the test")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    if args.link and len(args.link) > 1 and args.drone_num is None:
+        parser.error("bonding needs --drone-num")
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    server = ServerStandIn(args.drone_num)
+    bridge = MAVProxyBridge(
+        serial_port=os.ttyname(slave_fd),
+        baud_rate=921600,
+        server_host="127.0.0.1",
+        server_port=server.port,
+        drone_id=DRONE_ID,
+        mtu=args.mtu,
+        flush_ms=args.flush_ms,
+        stats_interval=0,
+        drone_num=args.drone_num,
+        links=args.link,
+        bond_mode=args.bond_mode
+    )
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    bridge_thread = threading.Thread(target=bridge.start, daemon=True)
+    bridge_thread.start()
+    while not bridge.running or bridge._loop is None:
+        time.sleep(0.01)
+
+    time.sleep(args.settle)
+
+    cpu_before = time.process_time()
+    results = {
+        "uplink": run_uplink(bridge, server, master_fd, args.frames),
+        "downlink": run_downlink(bridge, server, master_fd, args.downlink_count, args.downlink_size),
+    }
+    results["process_cpu_seconds"] = time.process_time() - cpu_before
+    now = time.monotonic()
+    results["links"] = [
+        {
+            "link": link.name,
+            "healthy": link.healthy(now),
+            "rtt_ms": link.rtt_ms,
+            "probe_loss": link.loss,
+            "datagrams": link.datagrams,
+            "injected_drops": link.injected_drops,
+        }
+        for link in bridge.links
+    ]
+
+    bridge.stop()
+    bridge_thread.join(timeout=3)
+    server.running = False
+    server_thread.join(timeout=1)
+    os.close(slave_fd)
+    os.close(master_fd)
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+SkyLink MAVLink Router
+Runs on the Jetson and shares one CubePilot serial link between local programs
+
+This script:
+1. Owns the flight controller serial port (nobody else opens it)
+2. Fans autopilot messages out to local UDP and Unix datagram endpoints
+3. Forwards what the endpoints send to the autopilot, and broadcasts to the other endpoints
+4. Routes targeted messages (COMMAND_ACK, PARAM_VALUE, ...) only to the endpoint
+   that owns the target system/component
+
+Typical setup: drone_control_V2.py with MAVLINK_URL=udpin:127.0.0.1:14550 and
+mavproxy_bridge.py with --serial udpin:127.0.0.1:14551.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import socket
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import serial
+
+from mavproxy_bridge import (
+    DEFAULT_SOCKET_BUFFER,
+    MAX_DATAGRAM_SIZE,
+    MAVLINK_V1_STX,
+    FrameSpan,
+    scan_frames,
+)
+
+DEFAULT_SERIAL_PORT = "/dev/ttyACM0"
+DEFAULT_BAUD_RATE = 921600
+DEFAULT_STATS_INTERVAL = 30
+SERIAL_BUFFER_SIZE = 1 << 16  # Must hold a whole read plus one partial frame
+ROUTE_TIMEOUT = 30.0  # Forget a system/component after this long without traffic
+
+def load_target_offsets() -> Dict[int, Tuple[int, Optional[int]]]:
+    """msgid -> (target_system offset, target_component offset or None) in the payload.
+
+    Derived from pymavlink's generated message classes when it is installed;
+    without it every message is treated as a broadcast, which is still correct,
+    just chattier.
+    """
+    try:
+        os.environ.setdefault("MAVLINK20", "1")
+        from pymavlink.dialects.v20 import ardupilotmega as dialect
+    except ImportError:
+        print("[Router] pymavlink not found, targeted messages will be broadcast")
+        return {}
+    offsets = {}
+    for msgid, cls in dialect.mavlink_map.items():
+        if "target_system" not in cls.fieldnames:
+            continue
+        # Wire order and sizes come from the struct format, e.g. "<hBB16s"
+        field_offsets = {}
+        pos = 0
+        for name, (count, code) in zip(cls.ordered_fieldnames, re.findall(r"(\d*)([a-zA-Z])", cls.unpacker.format)):
+            field_offsets[name] = pos
+            pos += struct.calcsize(f"<{count}{code}")
+        offsets[msgid] = (field_offsets["target_system"], field_offsets.get("target_component"))
+    return offsets
+
+class Peer:
+    """One place frames can be delivered to: a socket plus a destination address"""
+
+    def __init__(self, endpoint: "Endpoint", addr):
+        self.endpoint = endpoint
+        self.addr = addr
+        self.frames_out = 0
+        self.frames_in = 0
+        self.drops = 0
+        self.last_seen = time.monotonic()
+
+    @property
+    def name(self) -> str:
+        return f"{self.endpoint.spec}@{self.addr}"
+
+    def send(self, data) -> bool:
+        try:
+            self.endpoint.sock.sendto(data, self.addr)
+            self.frames_out += 1
+            return True
+        except (BlockingIOError, InterruptedError):
+            # Client is not keeping up; its socket buffer is full
+            self.drops += 1
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Nobody listening yet (client not started); not worth logging
+            self.drops += 1
+        except OSError as e:
+            self.drops += 1
+            print(f"[Router] Send to {self.name} failed: {e}")
+        return False
+
+class Endpoint:
+    """A local datagram socket clients talk to.
+
+    - `udp:HOST:PORT`: the router sends to HOST:PORT (client listens, e.g. pymavlink udpin:)
+    - `udpin:HOST:PORT`: the router listens; every sender address becomes a client
+    - `unix:PATH`: the router listens on a Unix datagram socket at PATH
+    """
+
+    def __init__(self, spec: str, socket_buffer: int):
+        self.spec = spec
+        kind, _, target = spec.partition(":")
+        self.kind = kind
+        self.fixed_peer: Optional[Peer] = None
+        if kind == "udp" or kind == "udpin":
+            host, _, port = target.rpartition(":")
+            addr = (host or "127.0.0.1", int(port))
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            if kind == "udp":
+                self.sock.bind(("127.0.0.1" if addr[0].startswith("127.") else "0.0.0.0", 0))
+                self.fixed_peer = Peer(self, addr)
+            else:
+                self.sock.bind(addr)
+        elif kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.bind(target)
+        else:
+            raise ValueError(f"Unknown endpoint type: {spec}")
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, socket_buffer)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, socket_buffer)
+        self.sock.setblocking(False)
+        self.peers: Dict[object, Peer] = {}
+        if self.fixed_peer:
+            self.peers[self.fixed_peer.addr] = self.fixed_peer
+
+    def peer_for(self, addr) -> Optional[Peer]:
+        if self.fixed_peer:
+            return self.fixed_peer
+        if not addr:
+            return None  # Unbound Unix client, cannot be replied to
+        peer = self.peers.get(addr)
+        if peer is None:
+            peer = self.peers[addr] = Peer(self, addr)
+            print(f"[Router] New client {peer.name}")
+        return peer
+
+    def close(self):
+        self.sock.close()
+        if self.kind == "unix":
+            try:
+                os.unlink(self.spec.partition(":")[2])
+            except OSError:
+                pass
+
+class MavlinkRouter:
+    def __init__(
+        self,
+        serial_port: str,
+        baud_rate: int,
+        endpoints: List[str],
+        socket_buffer: int = DEFAULT_SOCKET_BUFFER,
+        stats_interval: float = DEFAULT_STATS_INTERVAL
+    ):
+        self.serial_port = serial_port
+        self.baud_rate = baud_rate
+        self.endpoint_specs = endpoints
+        self.socket_buffer = socket_buffer
+        self.stats_interval = stats_interval
+        self.serial_conn: Optional[serial.Serial] = None
+        self.endpoints: List[Endpoint] = []
+        self.target_offsets = load_target_offsets()
+
+        # (sysid, compid) -> peers that have sent as that component; the autopilot side is None
+        self.routes: Dict[Tuple[int, int], Set[Optional[Peer]]] = {}
+        self.route_seen: Dict[Tuple[int, int], float] = {}
+
+        # Serial bytes land here directly (os.readv) and are forwarded as slices
+        self.serial_buffer = bytearray(SERIAL_BUFFER_SIZE)
+        self.serial_view = memoryview(self.serial_buffer)
+        self.serial_fill = 0
+        self.serial_out = bytearray()  # Backlog when the UART is slower than the clients
+        self.rx_buffer = bytearray(MAX_DATAGRAM_SIZE)
+        self.rx_view = memoryview(self.rx_buffer)
+
+        self.serial_frames = 0
+        self.serial_dropped_bytes = 0
+        self.serial_write_backlog_max = 0
+        self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def connect(self) -> bool:
+        try:
+            self.serial_conn = serial.Serial(self.serial_port, self.baud_rate, timeout=0)
+            print(f"[Router] Connected to {self.serial_port} at {self.baud_rate} baud")
+        except Exception as e:
+            print(f"[Router] Failed to open serial: {e}")
+            return False
+        try:
+            self.endpoints = [Endpoint(spec, self.socket_buffer) for spec in self.endpoint_specs]
+        except (OSError, ValueError) as e:
+            print(f"[Router] Failed to open endpoint: {e}")
+            return False
+        for endpoint in self.endpoints:
+            print(f"[Router] Endpoint {endpoint.spec}")
+        return True
+
+    def target_of(self, buf, span: FrameSpan) -> Tuple[int, int]:
+        """(target_system, target_component) of a frame, (0, 0) for broadcasts"""
+        offsets = self.target_offsets.get(span.msgid)
+        if offsets is None:
+            return 0, 0
+        if buf[span.offset] == MAVLINK_V1_STX:
+            payload, length = span.offset + 6, span.size - 8
+        else:
+            # v2 payloads may be truncated; trailing zero bytes mean target 0
+            payload, length = span.offset + 10, buf[span.offset + 1]
+        ts_ofs, tc_ofs = offsets
+        target_system = buf[payload + ts_ofs] if ts_ofs < length else 0
+        target_component = buf[payload + tc_ofs] if tc_ofs is not None and tc_ofs < length else 0
+        return target_system, target_component
+
+    def learn(self, span: FrameSpan, peer: Optional[Peer], now: float):
+        key = (span.sysid, span.compid)
+        owners = self.routes.get(key)
+        if owners is None:
+            owners = self.routes[key] = set()
+        owners.add(peer)
+        self.route_seen[key] = now
+
+    def destinations(self, target_system: int, target_component: int) -> Optional[Set[Optional[Peer]]]:
+        """Peers owning the target (None entry = autopilot side); None means broadcast"""
+        if target_system == 0:
+            return None
+        found: Set[Optional[Peer]] = set()
+        for (sysid, compid), owners in self.routes.items():
+            if sysid == target_system and (target_component == 0 or compid == target_component):
+                found |= owners
+        return found or None
+
+    def all_peers(self) -> List[Peer]:
+        return [peer for endpoint in self.endpoints for peer in endpoint.peers.values()]
+
+    def on_serial_readable(self):
+        """Autopilot -> endpoints, forwarding slices of the read buffer"""
+        try:
+            n = os.readv(self.serial_conn.fd, [self.serial_view[self.serial_fill:]])
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"[Router] Serial read failed: {e}")
+            self.stop()
+            return
+        if n == 0:
+            return
+        end = self.serial_fill + n
+        now = time.monotonic()
+        spans, pos, dropped = scan_frames(self.serial_buffer, 0, end)
+        self.serial_dropped_bytes += dropped
+        peers = self.all_peers()
+        for span in spans:
+            self.serial_frames += 1
+            self.learn(span, None, now)
+            frame = self.serial_view[span.offset:span.offset + span.size]
+            dests = self.destinations(*self.target_of(self.serial_buffer, span))
+            for peer in peers if dests is None else dests:
+                if peer is not None:
+                    peer.send(frame)
+        # Keep the incomplete tail at the front for the next read
+        remaining = end - pos
+        if remaining and pos:
+            self.serial_buffer[:remaining] = self.serial_buffer[pos:end]
+        self.serial_fill = remaining
+        if self.serial_fill == SERIAL_BUFFER_SIZE:
+            # Cannot happen with valid framing (max frame is 280 bytes); resync
+            self.serial_dropped_bytes += self.serial_fill
+            self.serial_fill = 0
+
+    def on_endpoint_readable(self, endpoint: Endpoint):
+        """Endpoint -> autopilot, plus the other clients for broadcasts and messages targeted at them"""
+        for _ in range(256):
+            try:
+                size, addr = endpoint.sock.recvfrom_into(self.rx_buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # ICMP unreachable from a client that went away
+                if not isinstance(e, ConnectionRefusedError):
+                    print(f"[Router] Receive on {endpoint.spec} failed: {e}")
+                return
+            peer = endpoint.peer_for(addr)
+            now = time.monotonic()
+            spans, _, _ = scan_frames(self.rx_buffer, 0, size)
+            others = None
+            for span in spans:
+                if peer is not None:
+                    peer.frames_in += 1
+                    peer.last_seen = now
+                    self.learn(span, peer, now)
+                frame = self.rx_view[span.offset:span.offset + span.size]
+                dests = self.destinations(*self.target_of(self.rx_buffer, span))
+                if dests is None or None in dests:
+                    self.write_serial(frame)
+                if dests is None:
+                    # Broadcast (a GCS HEARTBEAT, ...): every other client sees it too, as on a shared bus
+                    if others is None:
+                        others = [other for other in self.all_peers() if other is not peer]
+                    dests = others
+                for other in dests:
+                    if other is not None and other is not peer:
+                        other.send(frame)
+
+    def write_serial(self, frame):
+        if self.serial_out:
+            self.serial_out += frame
+        else:
+            try:
+                written = os.write(self.serial_conn.fd, frame)
+            except BlockingIOError:
+                written = 0
+            if written < len(frame):
+                self.serial_out += frame[written:]
+                self._loop.add_writer(self.serial_conn.fd, self.on_serial_writable)
+        self.serial_write_backlog_max = max(self.serial_write_backlog_max, len(self.serial_out))
+
+    def on_serial_writable(self):
+        try:
+            written = os.write(self.serial_conn.fd, self.serial_out)
+        except BlockingIOError:
+            return
+        del self.serial_out[:written]
+        if not self.serial_out:
+            self._loop.remove_writer(self.serial_conn.fd)
+
+    def expire_routes(self, now: float):
+        for key, seen in list(self.route_seen.items()):
+            if now - seen > ROUTE_TIMEOUT:
+                del self.route_seen[key]
+                del self.routes[key]
+
+    def report(self):
+        print(f"[Router] serial {self.serial_frames} frames in, {self.serial_dropped_bytes} bytes skipped, "
+              f"max write backlog {self.serial_write_backlog_max} bytes")
+        for peer in self.all_peers():
+            print(f"[Router]   {peer.name}: {peer.frames_out} out, {peer.frames_in} in, {peer.drops} drops")
+        routes = ", ".join(f"{s}/{c}" for s, c in sorted(self.routes))
+        print(f"[Router]   known components: {routes or 'none'}")
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._loop.add_reader(self.serial_conn.fd, self.on_serial_readable)
+        for endpoint in self.endpoints:
+            self._loop.add_reader(endpoint.sock.fileno(), self.on_endpoint_readable, endpoint)
+        last_report = time.monotonic()
+        try:
+            while self.running:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                self.expire_routes(now)
+                if self.stats_interval and now - last_report >= self.stats_interval:
+                    self.report()
+                    last_report = now
+        finally:
+            self._loop.remove_reader(self.serial_conn.fd)
+            if self.serial_out:
+                self._loop.remove_writer(self.serial_conn.fd)
+            for endpoint in self.endpoints:
+                self._loop.remove_reader(endpoint.sock.fileno())
+
+    def start(self) -> bool:
+        if not self.connect():
+            return False
+        self.running = True
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            print("\n[Router] Shutting down...")
+        finally:
+            self.close()
+        return True
+
+    def stop(self):
+        """Stop the router; safe to call from any thread"""
+        self.running = False
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def close(self):
+        self.running = False
+        for endpoint in self.endpoints:
+            endpoint.close()
+        if self.serial_conn:
+            self.serial_conn.close()
+        print("[Router] Stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink MAVLink Router")
+    parser.add_argument("--serial", default=DEFAULT_SERIAL_PORT, help=f"Serial port (default: {DEFAULT_SERIAL_PORT})")
+    parser.add_argument("--baud", type=int, default=DEFAULT_BAUD_RATE, help=f"Baud rate (default: {DEFAULT_BAUD_RATE})")
+    parser.add_argument("--endpoint", action="append", required=True, metavar="SPEC",
+                        help="udp:HOST:PORT, udpin:HOST:PORT or unix:PATH (repeatable)")
+    parser.add_argument("--socket-buffer", type=int, default=DEFAULT_SOCKET_BUFFER, help="Endpoint socket buffer size in bytes")
+    parser.add_argument("--stats-interval", type=float, default=DEFAULT_STATS_INTERVAL, help="Seconds between reports, 0 to disable")
+    args = parser.parse_args()
+
+    router = MavlinkRouter(
+        serial_port=args.serial,
+        baud_rate=args.baud,
+        endpoints=args.endpoint,
+        socket_buffer=args.socket_buffer,
+        stats_interval=args.stats_interval
+    )
+    if not router.start():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -7,16 +7,22 @@ This script:
 1. Connects to CubePilot via serial/USB (MAVLink stream)
 2. Connects to SkyLink central server via internet
 3. Forwards all MAVLink messages bidirectionally
-4. Handles video stream forwarding (if available)
+4. Handles video stream forwarding (if available): relays an already-encoded RTP
+   stream to the server without decoding it
 """
 
+import asyncio
 import socket
 import serial
-import threading
 import time
 import sys
 import argparse
-from typing import Optional
+import bisect
+import collections
+import json
+import random
+import struct
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 # Configuration
 DEFAULT_SERIAL_PORT = "/dev/ttyUSB0"  # Adjust based on Jetson setup
@@ -24,6 +30,828 @@ DEFAULT_BAUD_RATE = 57600
 DEFAULT_SERVER_HOST = "your-server.com"  # Replace with actual server IP/domain
 DEFAULT_SERVER_PORT = 5761  # MAVLink UDP port
 DEFAULT_VIDEO_PORT = 8554  # RTSP/Video stream port
+DEFAULT_VIDEO_SERVER_PORT = 5600  # Where the server receives the relayed RTP stream
+DEFAULT_VIDEO_KBPS = 4000  # Pacing rate for video; bursts above it are smoothed out
+DEFAULT_VIDEO_MAX_DELAY_MS = 200  # Packets queued longer than this are dropped
+DEFAULT_MTU = 1200  # Max uplink datagram size, stays under typical 4G path MTU
+DEFAULT_FLUSH_MS = 20  # Max time a complete frame waits for more to coalesce with
+
+# MAVLink framing constants
+MAVLINK_V1_STX = 0xFE
+MAVLINK_V2_STX = 0xFD
+MAVLINK_V1_OVERHEAD = 8  # STX, len, seq, sysid, compid, msgid, crc(2)
+MAVLINK_V2_OVERHEAD = 12  # STX, len, incompat, compat, seq, sysid, compid, msgid(3), crc(2)
+MAVLINK_V2_SIGNATURE_LEN = 13
+MAVLINK_IFLAG_SIGNED = 0x01
+
+# Common message IDs, used for policy config and bandwidth reports
+MAVLINK_MSG_IDS = {
+    "HEARTBEAT": 0,
+    "SYS_STATUS": 1,
+    "SYSTEM_TIME": 2,
+    "PING": 4,
+    "PARAM_VALUE": 22,
+    "GPS_RAW_INT": 24,
+    "RAW_IMU": 27,
+    "SCALED_PRESSURE": 29,
+    "ATTITUDE": 30,
+    "ATTITUDE_QUATERNION": 31,
+    "LOCAL_POSITION_NED": 32,
+    "GLOBAL_POSITION_INT": 33,
+    "SERVO_OUTPUT_RAW": 36,
+    "MISSION_CURRENT": 42,
+    "MISSION_ACK": 47,
+    "NAV_CONTROLLER_OUTPUT": 62,
+    "RC_CHANNELS": 65,
+    "VFR_HUD": 74,
+    "COMMAND_ACK": 77,
+    "POSITION_TARGET_GLOBAL_INT": 87,
+    "SCALED_IMU2": 116,
+    "POWER_STATUS": 125,
+    "TERRAIN_REPORT": 136,
+    "SCALED_IMU3": 129,
+    "BATTERY_STATUS": 147,
+    "AHRS": 163,
+    "HWSTATUS": 165,
+    "AHRS2": 178,
+    "EKF_STATUS_REPORT": 193,
+    "VIBRATION": 241,
+    "HOME_POSITION": 242,
+    "EXTENDED_SYS_STATE": 245,
+    "STATUSTEXT": 253,
+}
+MAVLINK_MSG_NAMES = {v: k for k, v in MAVLINK_MSG_IDS.items()}
+
+# Sent ahead of everything else and never dropped by the uplink budget
+DEFAULT_CRITICAL_MSGS = ["HEARTBEAT", "COMMAND_ACK", "MISSION_ACK", "STATUSTEXT"]
+DEFAULT_STATS_INTERVAL = 30  # Seconds between uplink bandwidth reports
+DEFAULT_SOCKET_BUFFER = 1 << 20  # SO_RCVBUF/SO_SNDBUF, absorbs bursts while the loop is busy
+MAX_DATAGRAM_SIZE = 65535  # Largest downlink datagram accepted without truncation
+MAX_DRAIN_PER_WAKEUP = 256  # Datagrams read per wakeup before serial gets a turn
+HEARTBEAT_INTERVAL = 5  # Seconds
+PROBE_INTERVAL = 1.0  # Seconds between health probes on each link
+PROBE_TIMEOUT = 2.0  # A probe without reply after this long counts as lost
+LINK_DEAD_AFTER = 3.0  # Seconds without a probe reply before a link is skipped
+LINK_MAX_LOSS = 0.5  # Links losing more probes than this are skipped while others are up
+LINK_LOSS_SMOOTHING = 0.1  # EWMA weight of the newest probe outcome
+BOND_BALANCE = "balance"  # Weighted round-robin across healthy links, critical datagrams on all
+BOND_REDUNDANT = "redundant"  # Every datagram on every link
+DEFAULT_METRICS_PORT = 9101  # Prometheus /metrics on localhost, 0 to disable
+LOOP_LAG_INTERVAL = 0.1  # Seconds between event-loop lag samples
+
+# Binary bridge header (opt-in with --header binary), network byte order:
+# magic "SL", version, kind, drone number (u32), link sequence (u32), send time (u64, unix us)
+BRIDGE_HEADER = struct.Struct("!2sBBIIQ")
+BRIDGE_MAGIC = b"SL"
+BRIDGE_VERSION = 1
+KIND_DATA = 0  # MAVLink frames
+KIND_HANDSHAKE = 1  # payload: identity, "<drone ID>\n<session>"
+KIND_HEARTBEAT = 2  # payload: identity too, so a restarted server learns the drone again
+KIND_PROBE = 3  # Link health probe, echoed back by the server as KIND_PROBE_REPLY
+KIND_PROBE_REPLY = 4
+SEQ_MOD = 1 << 32
+SEQ_WINDOW = 1024  # How far back duplicates and late packets are still recognised
+SEQ_RESYNC_GAP = 1 << 16  # A forward jump this large is a new sequence space, not loss
+
+class BridgeHeader(NamedTuple):
+    version: int
+    kind: int
+    drone_num: int
+    seq: int
+    sent_us: int
+
+def pack_header(kind: int, drone_num: int, seq: int, sent_us: Optional[int] = None) -> bytes:
+    if sent_us is None:
+        sent_us = time.time_ns() // 1000
+    return BRIDGE_HEADER.pack(BRIDGE_MAGIC, BRIDGE_VERSION, kind, drone_num, seq % SEQ_MOD, sent_us)
+
+def unpack_header(data: bytes) -> Optional[BridgeHeader]:
+    """Parse the binary header, None if `data` does not start with a supported one"""
+    if len(data) < BRIDGE_HEADER.size or data[:2] != BRIDGE_MAGIC or data[2] != BRIDGE_VERSION:
+        return None
+    _, version, kind, drone_num, seq, sent_us = BRIDGE_HEADER.unpack_from(data)
+    return BridgeHeader(version, kind, drone_num, seq, sent_us)
+
+class SequenceTracker:
+    """Receiver-side loss, reordering and one-way latency for one link.
+
+    Keeps a bitmask of the last SEQ_WINDOW sequence numbers, so duplicates can be
+    rejected and late packets counted as reordered instead of lost. A sequence number
+    far outside that window means the sender restarted its counter: the tracker starts
+    over from it (a resync) instead of dropping everything until it catches up. Latency
+    uses the sender's wall clock, so it is only meaningful with NTP on both ends.
+    """
+
+    def __init__(self):
+        self.highest: Optional[int] = None
+        self.window = 0  # bit i set = (highest - i) received
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.resyncs = 0
+        self.latency_us_sum = 0
+        self.latency_us_max = 0
+        self.latency_samples = 0
+
+    def update(self, seq: int, sent_us: int, now_us: Optional[int] = None) -> bool:
+        """Account for a received packet; False if it is a duplicate"""
+        if self.highest is None:
+            self.highest, self.window = seq, 1
+        else:
+            ahead = (seq - self.highest) % SEQ_MOD
+            behind = (self.highest - seq) % SEQ_MOD
+            if 0 < ahead < SEQ_RESYNC_GAP:
+                # Newer than anything so far; the skipped ones are lost until they show up
+                self.lost += ahead - 1
+                self.window = ((self.window << ahead) | 1) & ((1 << SEQ_WINDOW) - 1) if ahead < SEQ_WINDOW else 1
+                self.highest = seq
+            elif ahead and behind >= SEQ_WINDOW:
+                # Restarted sender (bridge or server), or a counter reset on re-registration
+                self.resyncs += 1
+                self.highest, self.window = seq, 1
+            else:
+                bit = 1 << behind
+                if self.window & bit:
+                    self.duplicates += 1
+                    return False
+                self.window |= bit
+                self.reordered += 1
+                self.lost -= 1
+        self.received += 1
+        latency = (now_us if now_us is not None else time.time_ns() // 1000) - sent_us
+        self.latency_us_sum += latency
+        self.latency_us_max = max(self.latency_us_max, latency)
+        self.latency_samples += 1
+        return True
+
+    def summary(self) -> str:
+        expected = self.received + self.lost
+        loss = 100.0 * self.lost / expected if expected else 0.0
+        avg = self.latency_us_sum / self.latency_samples / 1000 if self.latency_samples else 0.0
+        return (f"rx {self.received} lost {self.lost} ({loss:.1f}%) reordered {self.reordered} "
+                f"dup {self.duplicates} resync {self.resyncs} latency avg {avg:.1f} ms max {self.latency_us_max / 1000:.1f} ms")
+
+def parse_msgid(name) -> int:
+    """Resolve a message name ("ATTITUDE") or numeric ID ("30", 30)"""
+    if isinstance(name, int):
+        return name
+    name = str(name).strip().upper()
+    if name.isdigit():
+        return int(name)
+    if name not in MAVLINK_MSG_IDS:
+        raise ValueError(f"Unknown MAVLink message: {name}")
+    return MAVLINK_MSG_IDS[name]
+
+def msg_name(msgid: int) -> str:
+    return MAVLINK_MSG_NAMES.get(msgid, f"MSG_{msgid}")
+
+class MavlinkFrame(NamedTuple):
+    msgid: int
+    sysid: int
+    compid: int
+    data: bytes
+
+class FrameSpan(NamedTuple):
+    """Location of a frame inside a caller-owned buffer, for zero-copy forwarding"""
+    offset: int
+    size: int
+    msgid: int
+    sysid: int
+    compid: int
+
+def scan_frames(buf, pos: int, end: int) -> Tuple[List[FrameSpan], int, int]:
+    """Find the complete MAVLink v1/v2 frames in buf[pos:end] without copying.
+
+    Returns (frames, resume position, skipped bytes). Bytes from the resume
+    position on are the start of an incomplete frame and must be kept.
+    """
+    frames = []
+    dropped = 0
+    while pos < end:
+        stx = buf[pos]
+        if stx != MAVLINK_V1_STX and stx != MAVLINK_V2_STX:
+            # Resync on the next start byte
+            nxt_v1 = buf.find(MAVLINK_V1_STX, pos + 1, end)
+            nxt_v2 = buf.find(MAVLINK_V2_STX, pos + 1, end)
+            candidates = [i for i in (nxt_v1, nxt_v2) if i != -1]
+            nxt = min(candidates) if candidates else end
+            dropped += nxt - pos
+            pos = nxt
+            continue
+
+        if stx == MAVLINK_V1_STX:
+            if end - pos < 6:
+                break
+            size = buf[pos + 1] + MAVLINK_V1_OVERHEAD
+            if end - pos < size:
+                break
+            msgid = buf[pos + 5]
+            sysid, compid = buf[pos + 3], buf[pos + 4]
+        else:
+            if end - pos < 10:
+                break
+            size = buf[pos + 1] + MAVLINK_V2_OVERHEAD
+            if buf[pos + 2] & MAVLINK_IFLAG_SIGNED:
+                size += MAVLINK_V2_SIGNATURE_LEN
+            if end - pos < size:
+                break
+            msgid = buf[pos + 7] | (buf[pos + 8] << 8) | (buf[pos + 9] << 16)
+            sysid, compid = buf[pos + 5], buf[pos + 6]
+
+        frames.append(FrameSpan(pos, size, msgid, sysid, compid))
+        pos += size
+    return frames, pos, dropped
+
+class MavlinkFrameParser:
+    """Incremental MAVLink v1/v2 frame splitter.
+
+    Only the framing is checked (start byte and lengths); CRCs are left to the
+    receiving MAVLink stack, which needs the per-message CRC_EXTRA table anyway.
+    Bytes that do not start a frame are skipped and counted in `dropped_bytes`.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.dropped_bytes = 0
+
+    def feed(self, data: bytes) -> List[MavlinkFrame]:
+        """Append raw serial bytes and return every frame completed by them"""
+        buf = self._buf
+        buf += data
+        spans, pos, dropped = scan_frames(buf, 0, len(buf))
+        self.dropped_bytes += dropped
+        frames = [
+            MavlinkFrame(f.msgid, f.sysid, f.compid, bytes(buf[f.offset:f.offset + f.size]))
+            for f in spans
+        ]
+        if pos:
+            del buf[:pos]
+        return frames
+
+class FrameBatcher:
+    """Coalesces complete MAVLink frames into datagrams of at most `mtu` bytes.
+
+    A datagram is emitted when the next frame would not fit, or when the oldest
+    pending frame has waited `flush_interval` seconds. Frames are never split.
+    Urgent frames are placed ahead of queued ones and make the batch due at once.
+    """
+
+    def __init__(self, mtu: int, flush_interval: float, header_len: int = 0):
+        self.capacity = max(mtu - header_len, 1)
+        self.flush_interval = flush_interval
+        self._pending: List[bytes] = []
+        self._pending_len = 0
+        self._urgent_count = 0
+        self._deadline: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self.last_urgent = False  # Whether the payload last returned held urgent frames
+        self.last_started_at: Optional[float] = None  # When the first frame of that payload was queued
+
+    def add(self, frame: bytes, now: float, urgent: bool = False) -> Optional[bytes]:
+        """Queue a frame; returns a full datagram payload if one had to be closed"""
+        out = None
+        if self._pending and self._pending_len + len(frame) > self.capacity:
+            out = self.flush()
+        if not self._pending:
+            self._started_at = now
+        if urgent:
+            self._pending.insert(self._urgent_count, frame)
+            self._urgent_count += 1
+            self._deadline = now
+        else:
+            self._pending.append(frame)
+        self._pending_len += len(frame)
+        if self._deadline is None:
+            self._deadline = now + self.flush_interval
+        return out
+
+    def flush(self) -> Optional[bytes]:
+        """Return every pending frame as one payload"""
+        if not self._pending:
+            return None
+        out = b"".join(self._pending)
+        self.last_urgent = self._urgent_count > 0
+        self.last_started_at = self._started_at
+        self._pending.clear()
+        self._pending_len = 0
+        self._urgent_count = 0
+        self._deadline = None
+        return out
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_len
+
+    def timeout(self, now: float) -> Optional[float]:
+        """Seconds until the pending batch must go out, None when idle"""
+        if self._deadline is None:
+            return None
+        return max(self._deadline - now, 0.0)
+
+class UplinkPolicy:
+    """Decides which autopilot messages are worth sending over the metered link.
+
+    - `rates`: msgid -> max messages per second, per source system
+    - `decimate`: msgid -> forward only every Nth message, per source system
+    - `critical`: msgids that jump the batching queue and ignore the budget
+    - `max_kbps`: uplink budget; non-critical frames over it are dropped
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Dict[int, float]] = None,
+        decimate: Optional[Dict[int, int]] = None,
+        critical: Optional[Iterable[int]] = None,
+        max_kbps: Optional[float] = None
+    ):
+        self.min_interval = {msgid: 1.0 / hz for msgid, hz in (rates or {}).items() if hz > 0}
+        self.blocked = {msgid for msgid, hz in (rates or {}).items() if hz <= 0}
+        self.decimate = {msgid: n for msgid, n in (decimate or {}).items() if n > 1}
+        self.critical = set(critical if critical is not None else map(parse_msgid, DEFAULT_CRITICAL_MSGS))
+        self.budget_rate = max_kbps * 125.0 if max_kbps else None  # bytes/s
+        self._tokens = self.budget_rate or 0.0
+        self._budget_at = time.monotonic()
+        self._last_sent: Dict[tuple, float] = {}
+        self._seen: Dict[tuple, int] = {}
+
+    @classmethod
+    def from_config(cls, config: dict, drone_id: str) -> "UplinkPolicy":
+        """Build the policy for one drone from a JSON config.
+
+        The "default" section applies to every drone; a section named after the
+        drone ID overrides individual keys.
+        """
+        section = dict(config.get("default", {}))
+        section.update(config.get(drone_id, {}))
+        critical = section.get("critical")
+        return cls(
+            rates={parse_msgid(k): float(v) for k, v in section.get("rates", {}).items()},
+            decimate={parse_msgid(k): int(v) for k, v in section.get("decimate", {}).items()},
+            critical=[parse_msgid(m) for m in critical] if critical is not None else None,
+            max_kbps=section.get("max_kbps")
+        )
+
+    def is_critical(self, msgid: int) -> bool:
+        return msgid in self.critical
+
+    def admit(self, frame: MavlinkFrame, now: float) -> bool:
+        """True if the frame should be forwarded"""
+        msgid = frame.msgid
+        critical = msgid in self.critical
+        if not critical:
+            if msgid in self.blocked:
+                return False
+            key = (frame.sysid, msgid)
+            if msgid in self.decimate:
+                seen = self._seen.get(key, 0)
+                self._seen[key] = seen + 1
+                if seen % self.decimate[msgid]:
+                    return False
+            interval = self.min_interval.get(msgid)
+            if interval is not None and now - self._last_sent.get(key, -interval) < interval:
+                return False
+
+        if self.budget_rate:
+            burst = self.budget_rate  # one second of traffic
+            self._tokens = min(self._tokens + (now - self._budget_at) * self.budget_rate, burst)
+            self._budget_at = now
+            if not critical and self._tokens < len(frame.data):
+                return False
+            self._tokens = max(self._tokens - len(frame.data), -burst)
+        if not critical and msgid in self.min_interval:
+            self._last_sent[(frame.sysid, msgid)] = now
+        return True
+
+class UplinkStats:
+    """Per message type counters of what came off the serial link and what was sent"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.by_msg: Dict[int, List[int]] = {}  # msgid -> [frames_in, bytes_in, frames_out, bytes_out]
+        self.datagrams = 0
+        self.send_drops = 0
+        # Everything before the last report, so metrics stay monotonic across resets
+        self.totals: Dict[int, List[int]] = {}
+        self.datagrams_total = 0
+        self.send_drops_total = 0
+
+    def record(self, frame: MavlinkFrame, forwarded: bool):
+        entry = self.by_msg.get(frame.msgid)
+        if entry is None:
+            entry = self.by_msg[frame.msgid] = [0, 0, 0, 0]
+        entry[0] += 1
+        entry[1] += len(frame.data)
+        if forwarded:
+            entry[2] += 1
+            entry[3] += len(frame.data)
+
+    def report(self) -> List[str]:
+        """Human readable bandwidth table since the last report, then reset"""
+        now = time.monotonic()
+        elapsed = max(now - self.started, 1e-6)
+        snapshot, self.by_msg = self.by_msg, {}
+        datagrams, self.datagrams = self.datagrams, 0
+        send_drops, self.send_drops = self.send_drops, 0
+        self.started = now
+        for msgid, entry in snapshot.items():
+            total = self.totals.setdefault(msgid, [0, 0, 0, 0])
+            for i, value in enumerate(entry):
+                total[i] += value
+        self.datagrams_total += datagrams
+        self.send_drops_total += send_drops
+        total_in = sum(e[1] for e in snapshot.values())
+        total_out = sum(e[3] for e in snapshot.values())
+        lines = [
+            f"uplink {total_out * 8 / elapsed / 1000:.1f} kbps of {total_in * 8 / elapsed / 1000:.1f} kbps "
+            f"from serial, {datagrams / elapsed:.1f} datagrams/s, {send_drops} send drops"
+        ]
+        for msgid, (f_in, b_in, f_out, b_out) in sorted(snapshot.items(), key=lambda kv: -kv[1][1]):
+            lines.append(
+                f"  {msg_name(msgid):<24} {f_in / elapsed:7.1f} Hz in {f_out / elapsed:7.1f} Hz out "
+                f"{b_out * 8 / elapsed / 1000:7.2f} kbps"
+            )
+        return lines
+
+    def cumulative(self, index: int) -> Dict[tuple, float]:
+        """Column `index` of the per-message table since start, keyed by (message name,)"""
+        out: Dict[tuple, float] = {}
+        for table in (self.totals, self.by_msg):
+            for msgid, entry in list(table.items()):
+                key = (msg_name(msgid),)
+                out[key] = out.get(key, 0) + entry[index]
+        return out
+
+class Metric:
+    """One Prometheus metric family, values keyed by a tuple of label values.
+
+    Updates are plain dict writes, cheap enough for per-frame paths. With
+    `collect`, values are instead read from existing counters at scrape time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str = "counter",
+        labels: Tuple[str, ...] = (),
+        collect: Optional[Callable[[], Dict[tuple, float]]] = None
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = labels
+        self.collect = collect
+        self.values: Dict[tuple, float] = {} if labels or collect else {(): 0.0}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+    def label_text(self, values: tuple, extra: str = "") -> str:
+        # JSON string escaping covers what Prometheus needs (backslash, quote, newline)
+        pairs = [f"{k}={json.dumps(str(v))}" for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        values = self.collect() if self.collect else dict(self.values)
+        for key, value in values.items():
+            lines.append(f"{self.name}{self.label_text(key)} {value}")
+        return lines
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; observe() is a bisect and two increments"""
+
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, "histogram", labels)
+        self.buckets = buckets
+        self.series: Dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self.label_text(key, 'le=' + json.dumps(le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self.label_text(key)} {series[-1]}")
+            lines.append(f"{self.name}_count{self.label_text(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Minimal HTTP server for GET /metrics on the caller's event loop"""
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+                path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b""
+                if path.split(b"?")[0] == b"/metrics":
+                    status, body = "200 OK", self.render().encode()
+                else:
+                    status, body = "404 Not Found", b"not found\n"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+        return await asyncio.start_server(handle, host, port)
+
+async def monitor_loop_lag(histogram: Histogram, interval: float = LOOP_LAG_INTERVAL):
+    """How late the event loop wakes a sleeper: time other callbacks held the loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - started - interval))
+
+class UdpMavlinkPort:
+    """Stands in for the serial port when the autopilot is shared through mavlink_router.py.
+
+    `udpin:HOST:PORT` listens for the router; writes go back to whoever sent last.
+    Mirrors the small part of the pyserial API the bridge uses; `read` returns one
+    whole datagram regardless of the size asked for.
+    """
+
+    def __init__(self, spec: str):
+        host, _, port = spec[len("udpin:"):].rpartition(":")
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host or "127.0.0.1", int(port)))
+        self.sock.setblocking(False)
+        self.peer = None
+
+    @property
+    def in_waiting(self) -> int:
+        return MAX_DATAGRAM_SIZE
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def read(self, size: int = MAX_DATAGRAM_SIZE) -> bytes:
+        try:
+            data, self.peer = self.sock.recvfrom(MAX_DATAGRAM_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return b""
+        return data
+
+    def write(self, data: bytes) -> int:
+        if self.peer is None:
+            return 0  # Router has not sent anything yet, nowhere to reply to
+        return self.sock.sendto(data, self.peer)
+
+    def close(self):
+        self.sock.close()
+
+RTP_VERSION = 2
+RTP_HEADER_LEN = 12
+
+class RtpForwarder:
+    """Relays an already-encoded RTP stream (e.g. H.264 from the Jetson encoder) to the server.
+
+    Packets are checked for an RTP v2 header and forwarded untouched; nothing is
+    decoded. Encoders emit keyframes as bursts of packets, which overflow the
+    modem queue on 4G, so output is paced with a token bucket at `max_kbps`.
+    Packets that would wait longer than `max_delay` are dropped instead of
+    adding latency.
+    """
+
+    def __init__(
+        self,
+        listen_port: int,
+        dest: tuple,
+        max_kbps: Optional[float] = DEFAULT_VIDEO_KBPS,
+        max_delay: float = DEFAULT_VIDEO_MAX_DELAY_MS / 1000.0,
+        socket_buffer: int = DEFAULT_SOCKET_BUFFER,
+        listen_host: str = "127.0.0.1"
+    ):
+        self.listen_addr = (listen_host, listen_port)
+        self.dest = dest
+        self.rate = max_kbps * 125.0 if max_kbps else None  # bytes/s
+        self.burst = (self.rate * 0.005 + 1500) if self.rate else 0.0  # ~5 ms of traffic
+        self.max_delay = max_delay
+        self.socket_buffer = socket_buffer
+        self.sock: Optional[socket.socket] = None
+        self.queue = collections.deque()  # (arrival time, packet)
+        self.tokens = self.burst
+        self.tokens_at = time.monotonic()
+        self.rx_buffer = bytearray(MAX_DATAGRAM_SIZE)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_seq: Optional[int] = None
+
+        self.packets_in = 0
+        self.packets_out = 0
+        self.bytes_out = 0
+        self.late_drops = 0
+        self.send_drops = 0
+        self.not_rtp = 0
+        self.input_gaps = 0  # Sequence gaps already present on the encoder side
+        self.frames = 0  # Marker bit ends an access unit for H.264
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.socket_buffer)
+        self.sock.bind(self.listen_addr)
+        self.sock.setblocking(False)
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        loop.add_reader(self.sock.fileno(), self.on_readable)
+
+    def detach(self):
+        if self._loop:
+            self._loop.remove_reader(self.sock.fileno())
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+
+    def on_readable(self):
+        now = time.monotonic()
+        view = memoryview(self.rx_buffer)
+        for _ in range(MAX_DRAIN_PER_WAKEUP):
+            try:
+                size = self.sock.recv_into(self.rx_buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                print(f"[MAVProxy] Video receive error: {e}")
+                break
+            if size < RTP_HEADER_LEN or self.rx_buffer[0] >> 6 != RTP_VERSION:
+                self.not_rtp += 1
+                continue
+            self.packets_in += 1
+            seq = (self.rx_buffer[2] << 8) | self.rx_buffer[3]
+            if self._last_seq is not None and seq != (self._last_seq + 1) & 0xFFFF:
+                self.input_gaps += 1
+            self._last_seq = seq
+            if self.rx_buffer[1] & 0x80:
+                self.frames += 1
+            self.queue.append((now, bytes(view[:size])))
+        self.pump()
+
+    def pump(self):
+        """Send queued packets as far as the token bucket allows, then wait for tokens"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.tokens + (now - self.tokens_at) * self.rate, self.burst)
+            self.tokens_at = now
+        queue = self.queue
+        while queue:
+            arrived, packet = queue[0]
+            if now - arrived > self.max_delay:
+                queue.popleft()
+                self.late_drops += 1
+                continue
+            if self.rate and self.tokens < len(packet):
+                self._timer = self._loop.call_later((len(packet) - self.tokens) / self.rate, self.pump)
+                return
+            queue.popleft()
+            try:
+                self.sock.sendto(packet, self.dest)
+                self.packets_out += 1
+                self.bytes_out += len(packet)
+            except OSError:
+                self.send_drops += 1
+            if self.rate:
+                self.tokens -= len(packet)
+
+    def summary(self) -> str:
+        return (f"video rtp in {self.packets_in} out {self.packets_out} ({self.bytes_out} bytes, "
+                f"{self.frames} frames), late drops {self.late_drops}, send drops {self.send_drops}, "
+                f"encoder gaps {self.input_gaps}, non-RTP {self.not_rtp}")
+
+class UplinkLink:
+    """One local socket (modem) towards the server, with probe-based health.
+
+    Spec format: `ADDR[:PORT]` to bind a local address, or `dev:IFNAME` to bind a
+    network interface (SO_BINDTODEVICE, needs CAP_NET_RAW). Options follow after
+    commas, e.g. `127.0.0.1,loss=0.2` drops 20% of sent datagrams for testing.
+    """
+
+    def __init__(self, spec: str, index: int):
+        self.spec = spec
+        self.index = index
+        target, *options = spec.split(",")
+        self.device: Optional[str] = None
+        self.bind_addr = ("0.0.0.0", 0)
+        if target.startswith("dev:"):
+            self.device = target[4:]
+        elif target:
+            host, _, port = target.rpartition(":") if target.count(":") == 1 else (target, "", "0")
+            self.bind_addr = (host, int(port or 0))
+        self.inject_loss = 0.0
+        for option in options:
+            key, _, value = option.partition("=")
+            if key == "loss":
+                self.inject_loss = float(value)
+            else:
+                raise ValueError(f"Unknown link option: {key}")
+
+        self.sock: Optional[socket.socket] = None
+        self.probe_seq = 0
+        self.pending_probes: Dict[int, float] = {}
+        self.last_reply_at = 0.0
+        self.rtt_ms: Optional[float] = None
+        self.loss = 0.0
+        self.datagrams = 0
+        self.bytes = 0
+        self.injected_drops = 0
+        self.credit = 0.0  # Smooth weighted round-robin state
+
+    @property
+    def name(self) -> str:
+        if self.device:
+            return self.device
+        host, port = self.sock.getsockname()[:2] if self.sock else self.bind_addr
+        return f"{host}:{port}"
+
+    def open(self, socket_buffer: int):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, socket_buffer)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, socket_buffer)
+        if self.device:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, self.device.encode())
+        self.sock.bind(self.bind_addr)
+        self.sock.setblocking(False)
+        # Grace period: a fresh link counts as up until its first probe could have returned
+        self.last_reply_at = time.monotonic()
+
+    def send(self, packet: bytes, addr: tuple):
+        if self.inject_loss and random.random() < self.inject_loss:
+            self.injected_drops += 1
+            return
+        self.sock.sendto(packet, addr)
+        self.datagrams += 1
+        self.bytes += len(packet)
+
+    def healthy(self, now: float) -> bool:
+        return now - self.last_reply_at < LINK_DEAD_AFTER and self.loss <= LINK_MAX_LOSS
+
+    def weight(self) -> float:
+        """Share of balanced traffic: falls off steeply with loss, gently with RTT"""
+        rtt = self.rtt_ms if self.rtt_ms is not None else 0.0
+        return (1.0 - self.loss) ** 4 / (1.0 + rtt / 100.0)
+
+    def next_probe(self, now: float) -> int:
+        """Expire unanswered probes and return the sequence number for a new one"""
+        for seq, sent_at in list(self.pending_probes.items()):
+            if now - sent_at > PROBE_TIMEOUT:
+                del self.pending_probes[seq]
+                self.loss += (1.0 - self.loss) * LINK_LOSS_SMOOTHING
+        seq = self.probe_seq
+        self.probe_seq = (self.probe_seq + 1) % SEQ_MOD
+        self.pending_probes[seq] = now
+        return seq
+
+    def on_probe_reply(self, header: BridgeHeader, now: float):
+        if self.pending_probes.pop(header.seq, None) is None:
+            return  # Late or duplicate reply, already counted as lost
+        rtt = (time.time_ns() // 1000 - header.sent_us) / 1000.0
+        self.rtt_ms = rtt if self.rtt_ms is None else self.rtt_ms * 0.8 + rtt * 0.2
+        self.loss -= self.loss * LINK_LOSS_SMOOTHING
+        self.last_reply_at = now
+
+    def summary(self, now: float) -> str:
+        state = "up" if self.healthy(now) else "down"
+        rtt = f"{self.rtt_ms:.1f} ms" if self.rtt_ms is not None else "n/a"
+        return (f"link {self.index} ({self.name}) {state} rtt {rtt} loss {self.loss * 100:.1f}% "
+                f"sent {self.datagrams} datagrams / {self.bytes} bytes, injected drops {self.injected_drops}")
 
 class MAVProxyBridge:
     def __init__(
@@ -33,26 +861,129 @@ class MAVProxyBridge:
         server_host: str,
         server_port: int,
         drone_id: str,
-        video_port: Optional[int] = None
+        video_port: Optional[int] = None,
+        mtu: int = DEFAULT_MTU,
+        flush_ms: float = DEFAULT_FLUSH_MS,
+        policy: Optional[UplinkPolicy] = None,
+        stats_interval: float = DEFAULT_STATS_INTERVAL,
+        drone_num: Optional[int] = None,
+        socket_buffer: int = DEFAULT_SOCKET_BUFFER,
+        links: Optional[List[str]] = None,
+        bond_mode: str = BOND_BALANCE,
+        video_dest: Optional[tuple] = None,
+        video_kbps: Optional[float] = DEFAULT_VIDEO_KBPS,
+        video_max_delay_ms: float = DEFAULT_VIDEO_MAX_DELAY_MS,
+        metrics_port: Optional[int] = None
     ):
         self.serial_port = serial_port
         self.baud_rate = baud_rate
         self.server_host = server_host
         self.server_port = server_port
+        self.server_addr = (server_host, server_port)
         self.drone_id = drone_id
         self.video_port = video_port
+        self.mtu = mtu
+        self.flush_interval = flush_ms / 1000.0
+        self.socket_buffer = socket_buffer
+        self.prefix = f"{drone_id}:".encode()
+        # A drone number switches the link to the binary header
+        self.drone_num = drone_num
+        self.header_len = BRIDGE_HEADER.size if drone_num is not None else len(self.prefix)
+        self.uplink_seq = 0
+        # New on every start, with the sequence numbers: tells the server a restarted bridge
+        # (new counter) from a handshake repeated on another bonded link
+        self.session = random.getrandbits(32)
+        self.identity = f"{drone_id}\n{self.session:08x}".encode()
+        self.downlink = SequenceTracker()
+        self.policy = policy or UplinkPolicy()
+        self.stats = UplinkStats()
+        self.stats_interval = stats_interval
         
         self.serial_conn: Optional[serial.Serial] = None
-        self.udp_socket: Optional[socket.socket] = None
+        # Default is a single link on an ephemeral port, as before bonding existed
+        self.links = [UplinkLink(spec, i) for i, spec in enumerate(links or [""])]
+        if len(self.links) > 1 and drone_num is None:
+            raise ValueError("Multiple links need --drone-num: duplicates are removed by sequence number")
+        self.bond_mode = bond_mode
+        self.video: Optional[RtpForwarder] = None
+        if video_port:
+            self.video = RtpForwarder(
+                video_port,
+                video_dest or (server_host, DEFAULT_VIDEO_SERVER_PORT),
+                max_kbps=video_kbps,
+                max_delay=video_max_delay_ms / 1000.0,
+                socket_buffer=socket_buffer
+            )
         self.running = False
+
+        self.parser = MavlinkFrameParser()
+        self.batcher = FrameBatcher(self.mtu, self.flush_interval, self.header_len)
+        self.rx_buffer = bytearray(MAX_DATAGRAM_SIZE)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.metrics_port = metrics_port
+        self.metrics = self.build_metrics()
+
+    def build_metrics(self) -> MetricsRegistry:
+        """Prometheus view of the bridge; mostly read from existing counters at scrape time"""
+        registry = MetricsRegistry()
+        m = "skylink_bridge_"
+        msg = ("type",)
+        stats = self.stats
+        registry.add(Metric(m + "serial_frames_total", "MAVLink frames read from the autopilot", labels=msg, collect=lambda: stats.cumulative(0)))
+        registry.add(Metric(m + "serial_bytes_total", "MAVLink bytes read from the autopilot", labels=msg, collect=lambda: stats.cumulative(1)))
+        registry.add(Metric(m + "uplink_frames_total", "MAVLink frames admitted by the uplink policy", labels=msg, collect=lambda: stats.cumulative(2)))
+        registry.add(Metric(m + "uplink_bytes_total", "MAVLink bytes admitted by the uplink policy", labels=msg, collect=lambda: stats.cumulative(3)))
+        registry.add(Metric(m + "uplink_datagrams_total", "Datagrams sent to the server", collect=lambda: {(): stats.datagrams_total + stats.datagrams}))
+        registry.add(Metric(m + "uplink_send_drops_total", "Datagrams dropped on a full or failing socket", collect=lambda: {(): stats.send_drops_total + stats.send_drops}))
+        registry.add(Metric(m + "parser_dropped_bytes_total", "Serial bytes discarded while resynchronising", collect=lambda: {(): self.parser.dropped_bytes}))
+        registry.add(Metric(m + "batch_pending_bytes", "Frames waiting in the uplink batch", "gauge", collect=lambda: {(): self.batcher.pending_bytes}))
+        self.batch_delay = registry.add(Histogram(m + "batch_delay_seconds", "Time the oldest frame of each datagram waited to be sent"))
+        self.loop_lag = registry.add(Histogram(m + "event_loop_lag_seconds", "Event loop wake-up delay"))
+
+        downlink = self.downlink
+        registry.add(Metric(m + "downlink_datagrams_total", "Server datagrams accepted (binary header)", collect=lambda: {(): downlink.received}))
+        registry.add(Metric(m + "downlink_lost_total", "Server datagrams missing by sequence number", collect=lambda: {(): downlink.lost}))
+        registry.add(Metric(m + "downlink_duplicates_total", "Server datagrams dropped as duplicates", collect=lambda: {(): downlink.duplicates}))
+        registry.add(Metric(m + "downlink_resyncs_total", "Server sequence restarts the bridge followed", collect=lambda: {(): downlink.resyncs}))
+
+        link = ("link",)
+        registry.add(Metric(m + "link_up", "1 if the link answers probes", "gauge", link,
+                            lambda: {(l.name,): int(l.healthy(time.monotonic())) for l in self.links}))
+        registry.add(Metric(m + "link_rtt_seconds", "Smoothed probe round-trip time", "gauge", link,
+                            lambda: {(l.name,): l.rtt_ms / 1000 for l in self.links if l.rtt_ms is not None}))
+        registry.add(Metric(m + "link_probe_loss_ratio", "Smoothed probe loss", "gauge", link,
+                            lambda: {(l.name,): l.loss for l in self.links}))
+        registry.add(Metric(m + "link_datagrams_total", "Datagrams sent on the link", labels=link,
+                            collect=lambda: {(l.name,): l.datagrams for l in self.links}))
+        registry.add(Metric(m + "link_bytes_total", "Bytes sent on the link", labels=link,
+                            collect=lambda: {(l.name,): l.bytes for l in self.links}))
+
+        if self.video:
+            video = self.video
+            registry.add(Metric(m + "video_packets_in_total", "RTP packets received from the encoder", collect=lambda: {(): video.packets_in}))
+            registry.add(Metric(m + "video_packets_out_total", "RTP packets relayed to the server", collect=lambda: {(): video.packets_out}))
+            registry.add(Metric(m + "video_late_drops_total", "RTP packets dropped after waiting too long for pacing", collect=lambda: {(): video.late_drops}))
+            registry.add(Metric(m + "video_queue_depth", "RTP packets waiting for pacing", "gauge", collect=lambda: {(): len(video.queue)}))
+        return registry
         
     def connect_serial(self) -> bool:
         """Connect to CubePilot via serial/USB"""
+        if self.serial_port.startswith("udpin:"):
+            try:
+                self.serial_conn = UdpMavlinkPort(self.serial_port)
+                print(f"[MAVProxy] Listening for MAVLink router on {self.serial_port}")
+                return True
+            except Exception as e:
+                print(f"[MAVProxy] Failed to listen on {self.serial_port}: {e}")
+                return False
         try:
+            # Non-blocking: reads are driven by the event loop
             self.serial_conn = serial.Serial(
                 self.serial_port,
                 self.baud_rate,
-                timeout=1,
+                timeout=0,
                 bytesize=8,
                 parity='N',
                 stopbits=1
@@ -66,49 +997,236 @@ class MAVProxyBridge:
     def connect_server(self) -> bool:
         """Connect to central server via UDP"""
         try:
-            self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            # Send initial handshake with drone ID
-            handshake = f"DRONE:{self.drone_id}".encode()
-            self.udp_socket.sendto(handshake, (self.server_host, self.server_port))
-            print(f"[MAVProxy] Connected to server {self.server_host}:{self.server_port}")
+            # Resolve once instead of on every sendto
+            self.server_addr = (socket.gethostbyname(self.server_host), self.server_port)
+            for link in self.links:
+                link.open(self.socket_buffer)
+            if self.video:
+                host, port = self.video.dest
+                self.video.dest = (socket.gethostbyname(host), port)
+                self.video.open()
+                print(f"[MAVProxy] Relaying RTP video from udp:{self.video_port} to {host}:{port}")
+            # Send initial handshake with drone ID, on every link so each gets a NAT mapping
+            if self.drone_num is not None:
+                handshake = self.encapsulate(KIND_HANDSHAKE, self.identity)
+            else:
+                handshake = f"DRONE:{self.drone_id}".encode()
+            self.send_datagram(handshake, redundant=True)
+            sock = self.links[0].sock
+            print(f"[MAVProxy] Connected to server {self.server_host}:{self.server_port} "
+                  f"over {len(self.links)} link(s) "
+                  f"(rcvbuf {sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)}, "
+                  f"sndbuf {sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)})")
             return True
         except Exception as e:
             print(f"[MAVProxy] Failed to connect to server: {e}")
             return False
     
-    def forward_serial_to_server(self):
+    def on_serial_readable(self):
         """Forward MAVLink messages from CubePilot to server"""
-        buffer = bytearray()
-        while self.running:
+        try:
+            data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+        except Exception as e:
+            # The port is gone (USB unplugged); let the supervisor restart us
+            print(f"[MAVProxy] Error forwarding serial->server: {e}")
+            self.stop()
+            return
+        now = time.monotonic()
+        for frame in self.parser.feed(data):
+            forwarded = self.policy.admit(frame, now)
+            self.stats.record(frame, forwarded)
+            if not forwarded:
+                continue
+            payload = self.batcher.add(frame.data, now, self.policy.is_critical(frame.msgid))
+            if payload:
+                self.send_uplink(payload, self.batcher.last_urgent)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Send the pending batch now if it is due, otherwise arm the flush timer"""
+        timeout = self.batcher.timeout(time.monotonic())
+        if timeout is None:
+            return
+        if timeout == 0.0:
+            self.flush_uplink()
+        elif self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(timeout, self.flush_uplink)
+
+    def flush_uplink(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        timeout = self.batcher.timeout(time.monotonic())
+        if timeout:
+            # Batch was restarted after the timer was armed
+            self._flush_handle = self._loop.call_later(timeout, self.flush_uplink)
+            return
+        payload = self.batcher.flush()
+        if payload:
+            self.send_uplink(payload, self.batcher.last_urgent)
+
+    def encapsulate(self, kind: int, payload: bytes) -> bytes:
+        """Wrap a payload in the binary header, consuming one uplink sequence number"""
+        header = pack_header(kind, self.drone_num, self.uplink_seq)
+        self.uplink_seq = (self.uplink_seq + 1) % SEQ_MOD
+        return header + payload
+
+    def pick_links(self, redundant: bool) -> List[UplinkLink]:
+        """Links to send the next datagram on"""
+        if len(self.links) == 1:
+            return self.links
+        now = time.monotonic()
+        healthy = [link for link in self.links if link.healthy(now)]
+        if not healthy:
+            # Nothing known to work: spray and let whichever carrier recovers first win
+            return self.links
+        if redundant or self.bond_mode == BOND_REDUNDANT:
+            return healthy
+        # Smooth weighted round-robin: interleaves links in proportion to their weight
+        total = 0.0
+        best = healthy[0]
+        for link in healthy:
+            weight = link.weight()
+            link.credit += weight
+            total += weight
+            if link.credit > best.credit:
+                best = link
+        best.credit -= total
+        return [best]
+
+    def send_datagram(self, packet: bytes, redundant: bool = False):
+        for link in self.pick_links(redundant):
             try:
-                if self.serial_conn and self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
-                    if self.udp_socket and data:
-                        # Prepend drone ID to identify source
-                        packet = f"{self.drone_id}:".encode() + data
-                        self.udp_socket.sendto(packet, (self.server_host, self.server_port))
-            except Exception as e:
-                print(f"[MAVProxy] Error forwarding serial->server: {e}")
-                time.sleep(0.1)
+                link.send(packet, self.server_addr)
+            except (BlockingIOError, InterruptedError):
+                # Send buffer full: drop like the network would, newer telemetry follows
+                self.stats.send_drops += 1
+            except OSError as e:
+                # e.g. ENETUNREACH while the modem reconnects
+                self.stats.send_drops += 1
+                print(f"[MAVProxy] Send error on link {link.index}: {e}")
+
+    def send_uplink(self, payload: bytes, critical: bool = False):
+        """Send one datagram of complete MAVLink frames to the server"""
+        if self.batcher.last_started_at is not None:
+            self.batch_delay.observe(time.monotonic() - self.batcher.last_started_at)
+        if self.drone_num is not None:
+            packet = self.encapsulate(KIND_DATA, payload)
+        else:
+            # Prepend drone ID to identify source
+            packet = self.prefix + payload
+        self.send_datagram(packet, redundant=critical)
+        self.stats.datagrams += 1
+
+    def send_probes(self):
+        """Probe every link; the server echoes probes so RTT and loss are measured per link"""
+        now = time.monotonic()
+        for link in self.links:
+            packet = pack_header(KIND_PROBE, self.drone_num, link.next_probe(now))
+            try:
+                link.send(packet, self.server_addr)
+            except OSError:
+                pass  # Shows up as probe loss
+
+    def unwrap_downlink(self, data: bytes) -> Optional[bytes]:
+        """MAVLink bytes from a server datagram addressed to this drone, else None"""
+        if self.drone_num is not None:
+            header = unpack_header(data)
+            if header is None or header.kind != KIND_DATA or header.drone_num != self.drone_num:
+                return None
+            resyncs = self.downlink.resyncs
+            if not self.downlink.update(header.seq, header.sent_us):
+                return None
+            if self.downlink.resyncs != resyncs:
+                print(f"[MAVProxy] Downlink sequence jumped to {header.seq} (server restarted?), resynchronised")
+            return data[BRIDGE_HEADER.size:]
+        # Filter commands for this drone
+        if data.startswith(self.prefix):
+            return data[len(self.prefix):]
+        return None
     
-    def forward_server_to_serial(self):
-        """Forward MAVLink commands from server to CubePilot"""
-        while self.running:
+    def on_udp_readable(self, link: UplinkLink):
+        """Forward MAVLink commands from server to CubePilot, draining every queued datagram"""
+        view = memoryview(self.rx_buffer)
+        for _ in range(MAX_DRAIN_PER_WAKEUP):
             try:
-                if self.udp_socket:
-                    self.udp_socket.settimeout(1.0)
-                    try:
-                        data, addr = self.udp_socket.recvfrom(1024)
-                        # Filter commands for this drone
-                        if data.startswith(f"{self.drone_id}:".encode()):
-                            mavlink_data = data[len(f"{self.drone_id}:"):]
-                            if self.serial_conn:
-                                self.serial_conn.write(mavlink_data)
-                    except socket.timeout:
-                        continue
-            except Exception as e:
+                size, _ = link.sock.recvfrom_into(self.rx_buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # ICMP port unreachable from the server side surfaces here
                 print(f"[MAVProxy] Error forwarding server->serial: {e}")
-                time.sleep(0.1)
+                break
+            data = bytes(view[:size])
+            if self.drone_num is not None and data[3:4] == bytes([KIND_PROBE_REPLY]):
+                header = unpack_header(data)
+                if header is not None and header.drone_num == self.drone_num:
+                    link.on_probe_reply(header, time.monotonic())
+                continue
+            # Duplicates of a command sent on several links are dropped by sequence number
+            mavlink_data = self.unwrap_downlink(data)
+            if mavlink_data and self.serial_conn:
+                self.serial_conn.write(mavlink_data)
+
+    def send_heartbeat(self):
+        if self.drone_num is not None:
+            heartbeat = self.encapsulate(KIND_HEARTBEAT, self.identity)
+        else:
+            heartbeat = f"HEARTBEAT:{self.drone_id}".encode()
+        self.send_datagram(heartbeat, redundant=True)
+
+    async def run(self):
+        """Serve both directions from one event loop until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._loop.add_reader(self.serial_conn.fileno(), self.on_serial_readable)
+        for link in self.links:
+            self._loop.add_reader(link.sock.fileno(), self.on_udp_readable, link)
+        if self.video:
+            self.video.attach(self._loop)
+        lag_task = asyncio.ensure_future(monitor_loop_lag(self.loop_lag))
+        metrics_server = None
+        if self.metrics_port:
+            try:
+                metrics_server = await self.metrics.serve("127.0.0.1", self.metrics_port)
+                print(f"[MAVProxy] Metrics on http://127.0.0.1:{self.metrics_port}/metrics")
+            except OSError as e:
+                print(f"[MAVProxy] Metrics port {self.metrics_port} unavailable: {e}")
+        last_heartbeat = 0.0
+        try:
+            while self.running:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=PROBE_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                if self.drone_num is not None:
+                    self.send_probes()
+                # Send heartbeat every 5 seconds
+                if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.send_heartbeat()
+                    last_heartbeat = now
+                if self.stats_interval and now - self.stats.started >= self.stats_interval:
+                    for line in self.stats.report():
+                        print(f"[MAVProxy] {line}")
+                    if self.drone_num is not None:
+                        print(f"[MAVProxy] downlink {self.downlink.summary()}")
+                        for link in self.links:
+                            print(f"[MAVProxy] {link.summary(now)}")
+                    if self.video:
+                        print(f"[MAVProxy] {self.video.summary()}")
+        finally:
+            lag_task.cancel()
+            if metrics_server:
+                metrics_server.close()
+            if self.video:
+                self.video.detach()
+            self._loop.remove_reader(self.serial_conn.fileno())
+            for link in self.links:
+                self._loop.remove_reader(link.sock.fileno())
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
     
     def start(self):
         """Start the bridge"""
@@ -119,49 +1237,76 @@ class MAVProxyBridge:
         
         self.running = True
         
-        # Start forwarding threads
-        serial_to_server = threading.Thread(target=self.forward_serial_to_server, daemon=True)
-        server_to_serial = threading.Thread(target=self.forward_server_to_serial, daemon=True)
-        
-        serial_to_server.start()
-        server_to_serial.start()
-        
         print(f"[MAVProxy] Bridge active for drone {self.drone_id}")
         print(f"[MAVProxy] Serial: {self.serial_port} <-> Server: {self.server_host}:{self.server_port}")
         
         try:
-            while self.running:
-                time.sleep(1)
-                # Send heartbeat every 5 seconds
-                if int(time.time()) % 5 == 0:
-                    heartbeat = f"HEARTBEAT:{self.drone_id}".encode()
-                    if self.udp_socket:
-                        self.udp_socket.sendto(heartbeat, (self.server_host, self.server_port))
+            asyncio.run(self.run())
         except KeyboardInterrupt:
             print("\n[MAVProxy] Shutting down...")
-            self.stop()
+        finally:
+            self.close()
         
         return True
     
     def stop(self):
-        """Stop the bridge"""
+        """Stop the bridge; safe to call from any thread"""
+        self.running = False
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def close(self):
         self.running = False
         if self.serial_conn:
             self.serial_conn.close()
-        if self.udp_socket:
-            self.udp_socket.close()
+        for link in self.links:
+            if link.sock:
+                link.sock.close()
+        if self.video:
+            self.video.close()
         print("[MAVProxy] Bridge stopped")
 
+def parse_host_port(value: str) -> tuple:
+    host, _, port = value.rpartition(":")
+    return (host, int(port))
+
 def main():
     parser = argparse.ArgumentParser(description="SkyLink MAVProxy Bridge")
-    parser.add_argument("--serial", default=DEFAULT_SERIAL_PORT, help="Serial port (default: /dev/ttyUSB0)")
+    parser.add_argument("--serial", default=DEFAULT_SERIAL_PORT, help="Serial port, or udpin:HOST:PORT behind mavlink_router.py (default: /dev/ttyUSB0)")
     parser.add_argument("--baud", type=int, default=DEFAULT_BAUD_RATE, help="Baud rate (default: 57600)")
     parser.add_argument("--server", default=DEFAULT_SERVER_HOST, help="Server hostname/IP")
     parser.add_argument("--port", type=int, default=DEFAULT_SERVER_PORT, help="Server UDP port")
     parser.add_argument("--drone-id", required=True, help="Unique drone identifier")
-    parser.add_argument("--video-port", type=int, help="Video stream port (optional)")
+    parser.add_argument("--video-port", type=int, help="Local UDP port receiving the encoded RTP stream to relay (optional)")
+    parser.add_argument("--video-dest", help=f"Server RTP destination HOST:PORT (default: <server>:{DEFAULT_VIDEO_SERVER_PORT})")
+    parser.add_argument("--video-kbps", type=float, default=DEFAULT_VIDEO_KBPS, help="Video pacing rate, 0 to disable pacing")
+    parser.add_argument("--video-max-delay-ms", type=float, default=DEFAULT_VIDEO_MAX_DELAY_MS, help="Drop video packets queued longer than this")
+    parser.add_argument("--mtu", type=int, default=DEFAULT_MTU, help=f"Max uplink datagram size in bytes (default: {DEFAULT_MTU})")
+    parser.add_argument("--flush-ms", type=float, default=DEFAULT_FLUSH_MS, help=f"Max delay before a partial datagram is sent (default: {DEFAULT_FLUSH_MS})")
+    parser.add_argument("--socket-buffer", type=int, default=DEFAULT_SOCKET_BUFFER, help="UDP send/receive buffer size in bytes")
+    parser.add_argument("--drone-num", type=int, help="Numeric drone ID; enables the binary bridge header instead of the text prefix")
+    parser.add_argument("--link", action="append", metavar="SPEC", help="Local uplink to bond: ADDR[:PORT] or dev:IFNAME, options like ,loss=0.1 (repeatable, needs --drone-num)")
+    parser.add_argument("--bond-mode", choices=[BOND_BALANCE, BOND_REDUNDANT], default=BOND_BALANCE, help="balance: round-robin over healthy links, critical on all; redundant: everything on all")
+    parser.add_argument("--policy", help="JSON uplink policy file (rates, decimate, critical, max_kbps)")
+    parser.add_argument("--rate", action="append", default=[], metavar="MSG=HZ", help="Cap a message type, e.g. ATTITUDE=5 (repeatable)")
+    parser.add_argument("--max-kbps", type=float, help="Uplink budget for non-critical messages")
+    parser.add_argument("--stats-interval", type=float, default=DEFAULT_STATS_INTERVAL, help="Seconds between bandwidth reports, 0 to disable")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT, help=f"Prometheus /metrics port on 127.0.0.1, 0 to disable (default: {DEFAULT_METRICS_PORT})")
     
     args = parser.parse_args()
+    if args.link and len(args.link) > 1 and args.drone_num is None:
+        parser.error("bonding several --link needs --drone-num (duplicates are removed by sequence number)")
+
+    config = {}
+    if args.policy:
+        with open(args.policy) as f:
+            config = json.load(f)
+    default = config.setdefault("default", {})
+    for item in args.rate:
+        name, _, hz = item.partition("=")
+        default.setdefault("rates", {})[name] = float(hz)
+    if args.max_kbps is not None:
+        default["max_kbps"] = args.max_kbps
     
     bridge = MAVProxyBridge(
         serial_port=args.serial,
@@ -169,7 +1314,19 @@ def main():
         server_host=args.server,
         server_port=args.port,
         drone_id=args.drone_id,
-        video_port=args.video_port
+        video_port=args.video_port,
+        mtu=args.mtu,
+        flush_ms=args.flush_ms,
+        policy=UplinkPolicy.from_config(config, args.drone_id),
+        stats_interval=args.stats_interval,
+        drone_num=args.drone_num,
+        socket_buffer=args.socket_buffer,
+        links=args.link,
+        bond_mode=args.bond_mode,
+        video_dest=parse_host_port(args.video_dest) if args.video_dest else None,
+        video_kbps=args.video_kbps,
+        video_max_delay_ms=args.video_max_delay_ms,
+        metrics_port=args.metrics_port
     )
     
     if not bridge.start():
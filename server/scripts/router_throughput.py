@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+SkyLink Router Throughput Test
+Measures mavlink_router.py fan-out on one machine, without a CubePilot
+
+This script:
+1. Creates a pseudo-terminal that stands in for the CubePilot serial port
+2. Starts the router with one udp: endpoint per simulated client (app, bridge, GCS, ...)
+3. Writes synthetic MAVLink frames into the serial side, paced at the UART byte rate
+   (10 bits per byte, so 921600 baud is 92,160 bytes/s); --baud 0 writes as fast as possible
+4. Counts the frames every client receives and the router's per-client drops
+5. Sends broadcast HEARTBEATs from the first client and checks they reach the autopilot
+   and every other client
+
+A pty does not enforce a baud rate, which is why the writer paces itself.
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import tty
+from typing import List
+
+from bridge_throughput import HEARTBEAT_LEN, HEARTBEAT_MSGID, synthetic_frame, synthetic_stream
+from mavlink_router import MavlinkRouter
+from mavproxy_bridge import MAX_DATAGRAM_SIZE, MavlinkFrameParser
+
+GCS_SYSID, GCS_COMPID = 255, 190
+PACE_CHUNK_S = 0.005  # Bytes released per write: a UART delivers a few hundred bytes per 5 ms
+
+class Client:
+    """A local program on a udp: endpoint, counting what the router delivers"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.2)
+        self.port = self.sock.getsockname()[1]
+        self.parser = MavlinkFrameParser()
+        self.router_addr = None
+        self.frames = 0
+        self.gcs_heartbeats = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.router_addr = addr
+            for frame in self.parser.feed(data):
+                if frame.sysid == GCS_SYSID:
+                    self.gcs_heartbeats += 1
+                else:
+                    self.frames += 1
+
+def write_paced(master_fd: int, stream: bytes, baud: int) -> float:
+    """Write `stream` at the UART rate for `baud`, returns the seconds it took"""
+    rate = baud / 10.0
+    chunk = max(1, int(rate * PACE_CHUNK_S)) if baud else 4096
+    view = memoryview(stream)
+    started = time.perf_counter()
+    sent = 0
+    while sent < len(stream):
+        sent += os.write(master_fd, view[sent:sent + chunk])
+        if baud:
+            delay = started + sent / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return time.perf_counter() - started
+
+def read_serial(master_fd: int, seconds: float) -> int:
+    """MAVLink frames the router wrote to the autopilot side within `seconds`"""
+    parser = MavlinkFrameParser()
+    frames = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        try:
+            frames += len(parser.feed(os.read(master_fd, 4096)))
+        except BlockingIOError:
+            time.sleep(0.005)
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink router throughput test")
+    parser.add_argument("--baud", type=int, default=921600, help="UART rate to pace the serial side at, 0 = as fast as possible")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of the serial stream at --baud")
+    parser.add_argument("--frames", type=int, default=200000, help="Frames to push with --baud 0")
+    parser.add_argument("--clients", type=int, default=3, help="Endpoints to fan out to")
+    parser.add_argument("--heartbeats", type=int, default=10, help="Broadcast HEARTBEATs sent by the first client")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    # ATTITUDE-sized frames average about 40 bytes on the wire
+    frames = int(args.baud / 10 * args.seconds / 40) if args.baud else args.frames
+    stream = synthetic_stream(frames)
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    clients: List[Client] = [Client() for _ in range(args.clients)]
+    router = MavlinkRouter(
+        serial_port=os.ttyname(slave_fd),
+        baud_rate=args.baud or 921600,
+        endpoints=[f"udp:127.0.0.1:{client.port}" for client in clients],
+        stats_interval=0
+    )
+    threads = [threading.Thread(target=client.run, daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    router_thread = threading.Thread(target=router.start, daemon=True)
+    router_thread.start()
+    while not router.running or router._loop is None:
+        time.sleep(0.01)
+
+    cpu_before = time.process_time()
+    write_seconds = write_paced(master_fd, stream, args.baud)
+    deadline = time.time() + 5
+    while any(client.frames < frames for client in clients) and time.time() < deadline:
+        time.sleep(0.01)
+    cpu_seconds = time.process_time() - cpu_before
+
+    # Broadcast from a client: the autopilot and every other client should get it
+    os.set_blocking(master_fd, False)
+    sender = clients[0]
+    sent_heartbeats = 0
+    if sender.router_addr is not None:
+        for seq in range(args.heartbeats):
+            sender.sock.sendto(synthetic_frame(HEARTBEAT_MSGID, HEARTBEAT_LEN, seq, GCS_SYSID, GCS_COMPID), sender.router_addr)
+            sent_heartbeats += 1
+    serial_heartbeats = read_serial(master_fd, 1.0)
+
+    peers = {peer.addr[1]: peer for peer in router.all_peers()}
+    results = {
+        "baud": args.baud,
+        "frames_written": frames,
+        "bytes_written": len(stream),
+        "write_seconds": write_seconds,
+        "frames_per_sec": frames / max(write_seconds, 1e-9),
+        "router_serial_frames": router.serial_frames,
+        "router_skipped_bytes": router.serial_dropped_bytes,
+        "process_cpu_seconds": cpu_seconds,
+        "clients": [
+            {
+                "port": client.port,
+                "frames_received": client.frames,
+                "lost": frames - client.frames,
+                "router_drops": peers[client.port].drops if client.port in peers else None,
+            }
+            for client in clients
+        ],
+        "broadcast": {
+            "sent": sent_heartbeats,
+            "to_autopilot": serial_heartbeats,
+            "to_other_clients": [client.gcs_heartbeats for client in clients[1:]],
+        },
+    }
+
+    router.stop()
+    router_thread.join(timeout=3)
+    for client in clients:
+        client.running = False
+    for thread in threads:
+        thread.join(timeout=1)
+    os.close(slave_fd)
+    os.close(master_fd)
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+SkyLink RTP Passthrough Test
+Checks the bridge's video relay (RtpForwarder) with a local RTP sender and receiver
+
+This script:
+1. Sends a synthetic H.264-shaped RTP stream (keyframe bursts, small P-frames)
+2. Relays it through RtpForwarder exactly as the bridge does
+3. Receives it and checks sequence continuity and payload integrity
+4. Reports the relay's CPU time and the peak output rate (to show pacing)
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import threading
+import time
+from typing import List, Tuple
+
+from mavproxy_bridge import DEFAULT_VIDEO_KBPS, DEFAULT_VIDEO_MAX_DELAY_MS, RtpForwarder
+
+RTP_PAYLOAD_TYPE = 96  # Dynamic, as used by rtph264pay
+PACKET_PAYLOAD = 1200
+
+def rtp_packet(seq: int, timestamp: int, marker: bool, payload: bytes) -> bytes:
+    return struct.pack("!BBHII", 0x80, (0x80 if marker else 0) | RTP_PAYLOAD_TYPE,
+                       seq & 0xFFFF, timestamp & 0xFFFFFFFF, 0x5C11) + payload
+
+def payload_for(seq: int) -> bytes:
+    """Deterministic payload so the receiver can check it arrived unmodified"""
+    return (seq.to_bytes(4, "big") * (PACKET_PAYLOAD // 4))[:PACKET_PAYLOAD]
+
+def frame_packets(frame_index: int, keyframe_interval: int, kbps: float, fps: float) -> int:
+    """Packets for one frame: keyframes ~8x the size of P-frames at the same average bitrate"""
+    avg_bytes = kbps * 125.0 / fps
+    p_bytes = avg_bytes * keyframe_interval / (keyframe_interval + 7)
+    size = p_bytes * 8 if frame_index % keyframe_interval == 0 else p_bytes
+    return max(1, int(size // PACKET_PAYLOAD))
+
+def run_sender(dest: tuple, seconds: float, fps: float, kbps: float, keyframe_interval: int) -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    seq = 0
+    frame = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        count = frame_packets(frame, keyframe_interval, kbps, fps)
+        timestamp = int(frame * 90000 / fps)
+        for i in range(count):
+            # Encoders write a whole frame at once: this is the burst pacing has to absorb
+            sock.sendto(rtp_packet(seq, timestamp, i == count - 1, payload_for(seq)), dest)
+            seq += 1
+        frame += 1
+        next_at = started + frame / fps
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+    sock.close()
+    return seq
+
+class Receiver:
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.5)
+        self.arrivals: List[Tuple[float, int]] = []
+        self.corrupt = 0
+        self.out_of_order = 0
+        self.running = True
+
+    def run(self):
+        last = -1
+        while self.running:
+            try:
+                data = self.sock.recv(65535)
+            except socket.timeout:
+                continue
+            seq = struct.unpack_from("!H", data, 2)[0]
+            if data[12:] != payload_for(seq)[:len(data) - 12] or len(data) != 12 + PACKET_PAYLOAD:
+                self.corrupt += 1
+            if seq < last:
+                self.out_of_order += 1
+            last = seq
+            self.arrivals.append((time.perf_counter(), len(data)))
+
+    def peak_kbps(self, window: float = 0.01) -> float:
+        """Highest rate over any `window` seconds of arrivals"""
+        peak = 0
+        start = 0
+        total = 0
+        for end, (at, size) in enumerate(self.arrivals):
+            total += size
+            while at - self.arrivals[start][0] > window:
+                total -= self.arrivals[start][1]
+                start += 1
+            peak = max(peak, total)
+        return peak * 8 / window / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink RTP passthrough test")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--stream-kbps", type=float, default=2500, help="Average encoder bitrate")
+    parser.add_argument("--keyframe-interval", type=int, default=30)
+    parser.add_argument("--pace-kbps", type=float, default=DEFAULT_VIDEO_KBPS, help="Relay pacing rate, 0 disables")
+    parser.add_argument("--max-delay-ms", type=float, default=DEFAULT_VIDEO_MAX_DELAY_MS)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    receiver = Receiver()
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    relay_port = probe.getsockname()[1]
+    probe.close()
+
+    relay = RtpForwarder(relay_port, receiver.sock.getsockname(), max_kbps=args.pace_kbps,
+                         max_delay=args.max_delay_ms / 1000.0)
+    relay.open()
+    loop = asyncio.new_event_loop()
+    relay_cpu = {}
+
+    def run_relay():
+        asyncio.set_event_loop(loop)
+        relay.attach(loop)
+        relay_cpu["start"] = time.thread_time()
+        loop.run_forever()
+        relay_cpu["end"] = time.thread_time()
+        relay.detach()
+
+    relay_thread = threading.Thread(target=run_relay, daemon=True)
+    relay_thread.start()
+    receiver_thread = threading.Thread(target=receiver.run, daemon=True)
+    receiver_thread.start()
+
+    sent = run_sender(("127.0.0.1", relay_port), args.seconds, args.fps, args.stream_kbps, args.keyframe_interval)
+    time.sleep(max(args.max_delay_ms / 1000.0, 0.2) + 0.3)
+    loop.call_soon_threadsafe(loop.stop)
+    relay_thread.join(timeout=2)
+    receiver.running = False
+    receiver_thread.join(timeout=1)
+    relay.close()
+
+    relay_seconds = relay_cpu.get("end", 0.0) - relay_cpu.get("start", 0.0)
+    results = {
+        "packets_sent": sent,
+        "packets_received": len(receiver.arrivals),
+        "corrupt": receiver.corrupt,
+        "out_of_order": receiver.out_of_order,
+        "relay_late_drops": relay.late_drops,
+        "relay_frames": relay.frames,
+        "relay_cpu_seconds": relay_seconds,
+        "relay_cpu_percent": 100.0 * relay_seconds / args.seconds,
+        "peak_output_kbps_10ms": receiver.peak_kbps(),
+        "pace_kbps": args.pace_kbps,
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+SkyLink Sequence Tracker Test
+Checks the binary header's SequenceTracker (loss, reordering, duplicates, resync)
+
+This script:
+1. Feeds in-order, lossy, reordered and duplicated sequence numbers and checks the counters
+2. Restarts the sender's counter after a long session (bridge or server restart) and checks
+   the new packets are accepted and counted as one resync instead of dropped
+3. Checks the counter wrapping at 2^32 is not mistaken for a restart
+
+Runs with pytest or on its own (python3 sequence_tracker_test.py).
+"""
+
+from mavproxy_bridge import SEQ_MOD, SEQ_WINDOW, SequenceTracker
+
+def feed(tracker: SequenceTracker, seqs) -> list:
+    return [tracker.update(seq, 0, 0) for seq in seqs]
+
+def test_in_order_loss_and_reordering():
+    tracker = SequenceTracker()
+    assert all(feed(tracker, [0, 1, 2, 5, 3]))
+    assert (tracker.received, tracker.lost, tracker.reordered) == (5, 1, 1)
+
+def test_duplicates_dropped():
+    tracker = SequenceTracker()
+    assert feed(tracker, [0, 1, 2, 1, 2]) == [True, True, True, False, False]
+    assert tracker.duplicates == 2
+
+def test_restart_after_long_session_resyncs():
+    tracker = SequenceTracker()
+    feed(tracker, range(5000))
+    # The sender restarted and counts from 0 again: nothing may be dropped
+    assert all(feed(tracker, range(5)))
+    assert tracker.resyncs == 1
+    assert (tracker.duplicates, tracker.lost) == (0, 0)
+    # The new session's duplicates are still caught
+    assert feed(tracker, [3, 5]) == [False, True]
+
+def test_counter_reset_jumping_forward_resyncs():
+    tracker = SequenceTracker()
+    feed(tracker, range(100))
+    assert tracker.update(3_000_000_000, 0, 0)
+    assert (tracker.resyncs, tracker.lost) == (1, 0)
+
+def test_wraparound_is_not_a_restart():
+    tracker = SequenceTracker()
+    assert all(feed(tracker, [SEQ_MOD - 2, SEQ_MOD - 1, 0, 1]))
+    assert (tracker.resyncs, tracker.lost) == (0, 0)
+
+def test_late_packet_inside_window_is_reordered():
+    tracker = SequenceTracker()
+    feed(tracker, [0] + list(range(2, SEQ_WINDOW)))
+    assert tracker.update(1, 0, 0)
+    assert (tracker.reordered, tracker.lost, tracker.resyncs) == (1, 0, 0)
+
+def main():
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_")]
+    for name, fn in tests:
+        fn()
+        print(f"ok  {name}")
+    print(f"{len(tests)} passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+SkyLink Telemetry Journal
+Reads and replays the MAVLink journal drone_control_V2.py writes to TELEMETRY_DIR
+
+This script:
+1. Lists the segments with their time range and size (info)
+2. Prints the messages of a time range, or counts them per type (dump)
+3. Replays a time range to a UDP endpoint at N x real time, or as fast as possible (replay)
+4. Converts a time range to a .tlog for MAVExplorer / Mission Planner (export)
+
+Segments are memory-mapped. A time range is found by bisecting the segment names, then the
+segment's sparse index (one entry per second), so a query only reads the frames it returns plus
+at most a second before them. Only the bytes the segment header announces are read, so a journal
+that is still being written can be queried too.
+"""
+
+import argparse
+import bisect
+import glob
+import mmap
+import os
+import socket
+import struct
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+# Same layout as TelemetryJournal in drone_control_V2.py
+JOURNAL_MAGIC = b"SKTJ"
+JOURNAL_HEADER = struct.Struct("<4sHHQQII")  # magic, version, reserved, first us, last us, data bytes, index entries
+JOURNAL_HEADER_SIZE = 64
+JOURNAL_INDEX = struct.Struct("<QI")  # receive time (us), data offset
+JOURNAL_INDEX_SLOTS = 4096
+JOURNAL_RECORD = struct.Struct("<QH")  # receive time (us), frame length
+JOURNAL_DATA_OFFSET = JOURNAL_HEADER_SIZE + JOURNAL_INDEX_SLOTS * JOURNAL_INDEX.size
+SEGMENT_GLOB = "telemetry-*.seg"
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "telemetry")
+
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.first_us, self.last_us, self.used, count = JOURNAL_HEADER.unpack_from(self.map, 0)
+        if magic == bytes(4):
+            count = self.used = 0  # Just created, nothing flushed yet
+        elif magic != JOURNAL_MAGIC or version != 1:
+            raise ValueError(f"{path}: not a telemetry journal segment")
+        index = JOURNAL_INDEX.iter_unpack(self.map[JOURNAL_HEADER_SIZE:JOURNAL_HEADER_SIZE + count * JOURNAL_INDEX.size])
+        self.index_times: List[int] = []
+        self.index_offsets: List[int] = []
+        for at, offset in index:
+            self.index_times.append(at)
+            self.index_offsets.append(offset)
+
+    def records(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        offset = 0
+        if start_us is not None:
+            i = bisect.bisect_right(self.index_times, start_us) - 1
+            if i >= 0:
+                offset = self.index_offsets[i]
+        pos = JOURNAL_DATA_OFFSET + offset
+        end = JOURNAL_DATA_OFFSET + self.used
+        data = self.map
+        while pos + JOURNAL_RECORD.size <= end:
+            at, length = JOURNAL_RECORD.unpack_from(data, pos)
+            pos += JOURNAL_RECORD.size
+            if pos + length > end or (end_us is not None and at > end_us):
+                return
+            if start_us is None or at >= start_us:
+                yield at, data[pos:pos + length]
+            pos += length
+
+    def close(self):
+        self.map.close()
+
+class Journal:
+    def __init__(self, directory: str):
+        self.paths = sorted(glob.glob(os.path.join(directory, SEGMENT_GLOB)))
+        # The name is the segment's first receive time: picks segments without opening them
+        self.starts = [int(os.path.basename(p)[len("telemetry-"):-len(".seg")]) for p in self.paths]
+
+    def segments(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> Iterator[Segment]:
+        first = max(0, bisect.bisect_right(self.starts, start_us) - 1) if start_us is not None else 0
+        for path, first_us in zip(self.paths[first:], self.starts[first:]):
+            if end_us is not None and first_us > end_us:
+                return
+            segment = Segment(path)
+            try:
+                yield segment
+            finally:
+                segment.close()
+
+    def records(self, start_us: Optional[int] = None, end_us: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        for segment in self.segments(start_us, end_us):
+            yield from segment.records(start_us, end_us)
+
+def parse_time(value: Optional[str], origin_us: int) -> Optional[int]:
+    """Unix seconds, ISO 8601 (local time without an offset), or +SECONDS from the journal start"""
+    if value is None:
+        return None
+    if value.startswith("+"):
+        return origin_us + int(float(value[1:]) * 1e6)
+    try:
+        return int(float(value) * 1e6)
+    except ValueError:
+        return int(datetime.fromisoformat(value).timestamp() * 1e6)
+
+def iso(us: int) -> str:
+    return datetime.fromtimestamp(us / 1e6).isoformat(timespec="milliseconds")
+
+def mavlink_parser():
+    os.environ.setdefault("MAVLINK20", "1")
+    from pymavlink.dialects.v20 import ardupilotmega as mavlink
+    parser = mavlink.MAVLink(None)
+    parser.robust_parsing = True
+    return parser
+
+def cmd_info(journal: Journal, args):
+    total = 0
+    for segment in journal.segments():
+        total += segment.used
+        span = (segment.last_us - segment.first_us) / 1e6
+        print(f"{os.path.basename(segment.path)}  {iso(segment.first_us)} -> {iso(segment.last_us)}  "
+              f"{span:8.1f} s  {segment.used / 1024:9.1f} KB  {len(segment.index_times)} index entries")
+    print(f"{len(journal.paths)} segments, {total / 1024 / 1024:.1f} MB of frames")
+
+def cmd_dump(journal: Journal, args, start_us, end_us):
+    parser = mavlink_parser()
+    counts = Counter()
+    first = last = None
+    for at, frame in journal.records(start_us, end_us):
+        first = first or at
+        last = at
+        for msg in parser.parse_buffer(frame) or []:
+            if args.type and msg.get_type() not in args.type:
+                continue
+            counts[msg.get_type()] += 1
+            if not args.stats:
+                print(f"{iso(at)}  {msg.get_srcSystem():3d}  {msg}")
+    if args.stats and first is not None:
+        seconds = max((last - first) / 1e6, 1e-6)
+        for name, count in counts.most_common():
+            print(f"{name:28s} {count:9d}  {count / seconds:8.1f}/s")
+
+def cmd_replay(journal: Journal, args, start_us, end_us):
+    host, port = args.udp.rsplit(":", 1)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dest = (host, int(port))
+    frames = 0
+    first = last = None
+    started = time.perf_counter()
+    for at, frame in journal.records(start_us, end_us):
+        if first is None:
+            first = at
+        if args.speed > 0:
+            delay = started + (at - first) / 1e6 / args.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sock.sendto(frame, dest)
+        frames += 1
+        last = at
+    elapsed = time.perf_counter() - started
+    sock.close()
+    if first is None:
+        print("Nothing to replay in that range")
+        return
+    flight = (last - first) / 1e6
+    print(f"Replayed {frames} frames ({flight:.1f} s of telemetry) in {elapsed:.2f} s: "
+          f"{frames / elapsed:.0f} frames/s, {flight / elapsed:.1f}x real time")
+
+def cmd_export(journal: Journal, args, start_us, end_us):
+    frames = 0
+    with open(args.output, "wb") as f:
+        for at, frame in journal.records(start_us, end_us):
+            f.write(struct.pack(">Q", at) + frame)  # .tlog: big-endian microseconds, then the raw frame
+            frames += 1
+    print(f"Wrote {frames} frames to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="SkyLink telemetry journal reader")
+    parser.add_argument("--dir", default=os.environ.get("TELEMETRY_DIR", DEFAULT_DIR), help="Journal directory (default: TELEMETRY_DIR)")
+    parser.add_argument("--start", help="Unix seconds, ISO time, or +SECONDS from the journal start")
+    parser.add_argument("--end", help="Same formats as --start")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info", help="List segments")
+    dump = sub.add_parser("dump", help="Print decoded messages")
+    dump.add_argument("--type", action="append", help="Only this message type (repeatable)")
+    dump.add_argument("--stats", action="store_true", help="Count per message type instead of printing")
+    replay = sub.add_parser("replay", help="Send the frames to a UDP endpoint")
+    replay.add_argument("--udp", default="127.0.0.1:14550", help="HOST:PORT, e.g. the app's MAVLINK_URL=udpin:...")
+    replay.add_argument("--speed", type=float, default=1.0, help="Times real time, 0 = as fast as possible")
+    export = sub.add_parser("export", help="Write a .tlog")
+    export.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    journal = Journal(args.dir)
+    if not journal.paths:
+        parser.error(f"no {SEGMENT_GLOB} in {args.dir}")
+    if args.command == "info":
+        cmd_info(journal, args)
+        return
+    origin = journal.starts[0]
+    start_us, end_us = parse_time(args.start, origin), parse_time(args.end, origin)
+    {"dump": cmd_dump, "replay": cmd_replay, "export": cmd_export}[args.command](journal, args, start_us, end_us)
+
+if __name__ == "__main__":
+    main()
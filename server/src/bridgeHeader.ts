@@ -0,0 +1,159 @@
+// Binary header used by mavproxy_bridge.py when started with --drone-num.
+// Layout (network byte order, 20 bytes):
+//   magic "SL" | version u8 | kind u8 | drone number u32 | sequence u32 | send time u64 (unix us)
+
+export const BRIDGE_HEADER_SIZE = 20;
+export const BRIDGE_VERSION = 1;
+
+export const BridgeKind = {
+  DATA: 0,
+  // Both carry the bridge identity as payload (see parseBridgeIdentity)
+  HANDSHAKE: 1,
+  HEARTBEAT: 2,
+  // Link health probe, sent per link by the bridge; echoed back as PROBE_REPLY
+  PROBE: 3,
+  PROBE_REPLY: 4,
+} as const;
+
+const MAGIC_S = 0x53;
+const MAGIC_L = 0x4c;
+const SEQ_MOD = 2 ** 32;
+const SEQ_WINDOW = 1024;
+// A forward jump this large is a new sequence space, not loss
+const SEQ_RESYNC_GAP = 2 ** 16;
+
+export interface BridgeHeader {
+  kind: number;
+  droneNum: number;
+  seq: number;
+  sentUs: bigint;
+}
+
+export function isBridgeHeader(msg: Buffer): boolean {
+  return (
+    msg.length >= BRIDGE_HEADER_SIZE &&
+    msg[0] === MAGIC_S &&
+    msg[1] === MAGIC_L &&
+    msg[2] === BRIDGE_VERSION
+  );
+}
+
+export function parseBridgeHeader(msg: Buffer): BridgeHeader | null {
+  if (!isBridgeHeader(msg)) return null;
+  return {
+    kind: msg[3],
+    droneNum: msg.readUInt32BE(4),
+    seq: msg.readUInt32BE(8),
+    sentUs: msg.readBigUInt64BE(12),
+  };
+}
+
+export interface BridgeIdentity {
+  droneId: string;
+  // Random per bridge start; undefined for bridges that only send the drone ID
+  session?: string;
+}
+
+/** Payload of HANDSHAKE / HEARTBEAT: "<drone ID>\n<session>" */
+export function parseBridgeIdentity(msg: Buffer): BridgeIdentity | null {
+  const [droneId, session] = msg.subarray(BRIDGE_HEADER_SIZE).toString().split("\n");
+  if (!droneId.trim()) return null;
+  return { droneId: droneId.trim(), session: session?.trim() || undefined };
+}
+
+export function buildBridgeHeader(kind: number, droneNum: number, seq: number): Buffer {
+  const header = Buffer.alloc(BRIDGE_HEADER_SIZE);
+  header[0] = MAGIC_S;
+  header[1] = MAGIC_L;
+  header[2] = BRIDGE_VERSION;
+  header[3] = kind;
+  header.writeUInt32BE(droneNum >>> 0, 4);
+  header.writeUInt32BE(seq % SEQ_MOD, 8);
+  header.writeBigUInt64BE(BigInt(Date.now()) * 1000n, 12);
+  return header;
+}
+
+export interface LinkStatsSnapshot {
+  received: number;
+  lost: number;
+  reordered: number;
+  duplicates: number;
+  resyncs: number;
+  lossPercent: number;
+  latencyAvgMs: number;
+  latencyMaxMs: number;
+}
+
+/**
+ * Receiver-side loss, reordering and one-way latency for one bridge link.
+ * Mirrors SequenceTracker in mavproxy_bridge.py, including the resync when
+ * the sender restarts its counter. Latency relies on both clocks being
+ * NTP-synced.
+ */
+export class SequenceTracker {
+  private highest: number | null = null;
+  // Seen flags for the last SEQ_WINDOW sequence numbers, indexed by seq % SEQ_WINDOW
+  private seen = new Uint8Array(SEQ_WINDOW);
+  private received = 0;
+  private lost = 0;
+  private reordered = 0;
+  private duplicates = 0;
+  private resyncs = 0;
+  private latencyUsSum = 0;
+  private latencyUsMax = 0;
+
+  /** Returns false for duplicates, which the caller should drop. */
+  update(seq: number, sentUs: bigint, nowUs: bigint = BigInt(Date.now()) * 1000n): boolean {
+    if (this.highest === null) {
+      this.highest = seq;
+      this.seen[seq % SEQ_WINDOW] = 1;
+    } else {
+      const ahead = (seq - this.highest + SEQ_MOD) % SEQ_MOD;
+      const behind = (this.highest - seq + SEQ_MOD) % SEQ_MOD;
+      if (ahead > 0 && ahead < SEQ_RESYNC_GAP) {
+        this.lost += ahead - 1;
+        const clear = Math.min(ahead, SEQ_WINDOW);
+        for (let i = 1; i <= clear; i++) {
+          this.seen[(this.highest + i) % SEQ_WINDOW] = 0;
+        }
+        this.highest = seq;
+        this.seen[seq % SEQ_WINDOW] = 1;
+      } else if (ahead > 0 && behind >= SEQ_WINDOW) {
+        // Restarted sender (bridge or server), or a counter reset on re-registration
+        this.resyncs++;
+        this.seen.fill(0);
+        this.highest = seq;
+        this.seen[seq % SEQ_WINDOW] = 1;
+      } else {
+        const slot = seq % SEQ_WINDOW;
+        if (this.seen[slot]) {
+          this.duplicates++;
+          return false;
+        }
+        this.seen[slot] = 1;
+        this.reordered++;
+        this.lost--;
+      }
+    }
+
+    this.received++;
+    const latency = Number(nowUs - sentUs);
+    this.latencyUsSum += latency;
+    this.latencyUsMax = Math.max(this.latencyUsMax, latency);
+    return true;
+  }
+
+  snapshot(): LinkStatsSnapshot {
+    const expected = this.received + this.lost;
+    return {
+      received: this.received,
+      lost: this.lost,
+      reordered: this.reordered,
+      duplicates: this.duplicates,
+      resyncs: this.resyncs,
+      lossPercent: expected ? (100 * this.lost) / expected : 0,
+      latencyAvgMs: this.received ? this.latencyUsSum / this.received / 1000 : 0,
+      latencyMaxMs: this.latencyUsMax / 1000,
+    };
+  }
+}
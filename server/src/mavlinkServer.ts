@@ -1,6 +1,17 @@
 import dgram from "dgram";
+import { randomInt } from "crypto";
 import { createClient } from "@supabase/supabase-js";
 import type { TelemetryFrame } from "./types.js";
+import {
+  BRIDGE_HEADER_SIZE,
+  BridgeKind,
+  SequenceTracker,
+  buildBridgeHeader,
+  parseBridgeHeader,
+  parseBridgeIdentity,
+  type BridgeHeader,
+  type LinkStatsSnapshot,
+} from "./bridgeHeader.js";
 
 const supabaseUrl = process.env.SUPABASE_URL || "";
 const supabaseServiceKey = process.env.SUPABASE_SERVICE_ROLE_KEY || "";
@@ -17,12 +28,19 @@ interface DroneConnection {
   address: string;
   port: number;
   lastHeartbeat: Date;
+  // Set when the bridge uses the binary header (--drone-num)
+  droneNum?: number;
+  uplink?: SequenceTracker;
+  session?: string;
 }
 
 export class MavlinkServer {
   private server = dgram.createSocket("udp4");
   private connections = new Map<string, DroneConnection>();
   private telemetryCache = new Map<string, TelemetryFrame>();
+  private droneIdsByNum = new Map<number, string>();
+  // Per drone number, so a connection that expired and resumes keeps counting where it was
+  private downlinkSeqs = new Map<number, number>();
 
   constructor(private port: number = 5761) {
     this.setupServer();
@@ -31,6 +49,12 @@ export class MavlinkServer {
   private setupServer() {
     this.server.on("message", async (msg, rinfo) => {
       try {
+        const header = parseBridgeHeader(msg);
+        if (header) {
+          this.handleBinaryPacket(header, msg, rinfo);
+          return;
+        }
+
         const data = msg.toString();
 
         // Handle handshake
@@ -97,6 +121,80 @@ export class MavlinkServer {
     this.updateDroneStatus(droneId, true);
   }
 
+  private handleBinaryPacket(
+    header: BridgeHeader,
+    msg: Buffer,
+    rinfo: dgram.RemoteInfo
+  ) {
+    if (header.kind === BridgeKind.PROBE) {
+      // Echo on the same path so the bridge can measure RTT and loss per link
+      const reply = Buffer.from(msg);
+      reply[3] = BridgeKind.PROBE_REPLY;
+      this.server.send(reply, rinfo.port, rinfo.address);
+      return;
+    }
+
+    if (header.kind === BridgeKind.HANDSHAKE || header.kind === BridgeKind.HEARTBEAT) {
+      // Heartbeats name the drone too, so after a server restart a running bridge is
+      // recognised again at its next heartbeat instead of needing a new handshake
+      const identity = parseBridgeIdentity(msg);
+      const existing = identity ? this.connections.get(identity.droneId) : undefined;
+      if (identity && !(existing?.uplink && existing.droneNum === header.droneNum)) {
+        this.droneIdsByNum.set(header.droneNum, identity.droneId);
+        this.registerBinaryConnection(identity.droneId, header, rinfo, identity.session);
+        return;
+      }
+      if (identity && existing && identity.session !== existing.session) {
+        if (existing.session !== undefined) {
+          // The bridge restarted: its sequence numbers start over, the old tracker would drop them
+          console.log(`[MavlinkServer] Drone ${identity.droneId} bridge restarted, new session`);
+          this.registerBinaryConnection(identity.droneId, header, rinfo, identity.session);
+          return;
+        }
+        // Resumed from a data packet after expiring as stale: same bridge, adopt its session
+        existing.session = identity.session;
+      }
+      // Same session: a bonded bridge sends these on every link, the sequence check below
+      // drops the copies
+    }
+
+    // Packets before the first handshake or heartbeat cannot be attributed to a drone
+    const droneId = this.droneIdsByNum.get(header.droneNum);
+    if (!droneId) return;
+
+    let conn = this.connections.get(droneId);
+    // Duplicates from bonded links are dropped here by sequence number
+    if (!conn?.uplink) {
+      // Connection expired as stale; resume it without waiting for a new handshake
+      conn = this.registerBinaryConnection(droneId, header, rinfo, undefined);
+    } else if (!conn.uplink.update(header.seq, header.sentUs)) {
+      return;
+    }
+    conn.lastHeartbeat = new Date();
+    conn.address = rinfo.address;
+    conn.port = rinfo.port;
+
+    if (header.kind === BridgeKind.DATA) {
+      // Raw MAVLink frames start at BRIDGE_HEADER_SIZE
+      // In production, parse MAVLink protocol here
+    }
+  }
+
+  private registerBinaryConnection(
+    droneId: string,
+    header: BridgeHeader,
+    rinfo: dgram.RemoteInfo,
+    session: string | undefined
+  ): DroneConnection {
+    this.handleDroneConnection(droneId, rinfo);
+    const conn = this.connections.get(droneId)!;
+    conn.droneNum = header.droneNum;
+    conn.session = session;
+    conn.uplink = new SequenceTracker();
+    conn.uplink.update(header.seq, header.sentUs);
+    return conn;
+  }
+
   private updateHeartbeat(droneId: string) {
     const conn = this.connections.get(droneId);
     if (conn) {
@@ -225,7 +323,16 @@ export class MavlinkServer {
       throw new Error(`Drone ${droneId} not connected`);
     }
 
-    const envelope = Buffer.from(`${droneId}:${command.toString("base64")}`);
+    let envelope: Buffer;
+    if (conn.droneNum !== undefined) {
+      // Random first value: after a server restart the bridge sees a jump and resyncs,
+      // rather than taking a low number it already saw as a duplicate
+      const seq = this.downlinkSeqs.get(conn.droneNum) ?? randomInt(2 ** 32);
+      this.downlinkSeqs.set(conn.droneNum, (seq + 1) % 2 ** 32);
+      envelope = Buffer.concat([buildBridgeHeader(BridgeKind.DATA, conn.droneNum, seq), command]);
+    } else {
+      envelope = Buffer.from(`${droneId}:${command.toString("base64")}`);
+    }
     this.server.send(envelope, conn.port, conn.address, (err) => {
       if (err) {
         console.error(`[MavlinkServer] Error sending command to ${droneId}:`, err);
@@ -239,6 +346,14 @@ export class MavlinkServer {
     return Array.from(this.telemetryCache.values());
   }
 
+  getLinkStats(): Record<string, LinkStatsSnapshot> {
+    const stats: Record<string, LinkStatsSnapshot> = {};
+    for (const [droneId, conn] of this.connections.entries()) {
+      if (conn.uplink) stats[droneId] = conn.uplink.snapshot();
+    }
+    return stats;
+  }
+
   getConnectedDrones(): string[] {
     return Array.from(this.connections.keys());
   }
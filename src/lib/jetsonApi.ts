@@ -21,8 +21,68 @@ export interface JetsonTelemetry {
   signalQuality?: number;
 }
 
+// One detected object from /ws/detections, in video frame pixels
+export interface JetsonDetection {
+  x1: number;
+  y1: number;
+  x2: number;
+  y2: number;
+  classId: number;
+  confidence: number; // 0..1
+  trackId: number; // Stable while the object stays in view
+  distance?: number; // Metres, when depth is available
+}
+
+export interface JetsonDetections {
+  seq: number; // Video frame sequence number
+  width: number; // Frame size the boxes refer to
+  height: number;
+  detections: JetsonDetection[];
+  // Nearest obstacle per depth sector, row-major, metres (0 = no reading); bottom row sees the ground
+  obstacles?: { rows: number; cols: number; distances: number[] };
+}
+
+// Binary layout (little-endian): 12-byte header, then 14 bytes per object, then the optional obstacle grid
+export function decodeDetections(buffer: ArrayBuffer): JetsonDetections {
+  const view = new DataView(buffer);
+  const count = view.getUint16(10, true);
+  const detections: JetsonDetection[] = [];
+  for (let i = 0, offset = 12; i < count; i++, offset += 14) {
+    const distanceCm = view.getUint16(offset + 12, true);
+    detections.push({
+      x1: view.getUint16(offset, true),
+      y1: view.getUint16(offset + 2, true),
+      x2: view.getUint16(offset + 4, true),
+      y2: view.getUint16(offset + 6, true),
+      classId: view.getUint8(offset + 8),
+      confidence: view.getUint8(offset + 9) / 100,
+      trackId: view.getUint16(offset + 10, true),
+      distance: distanceCm ? distanceCm / 100 : undefined,
+    });
+  }
+  let obstacles: JetsonDetections["obstacles"];
+  if (view.getUint8(1) & 1) {
+    const offset = 12 + count * 14;
+    const rows = view.getUint8(offset);
+    const cols = view.getUint8(offset + 1);
+    const distances: number[] = [];
+    for (let i = 0; i < rows * cols; i++) {
+      distances.push(view.getUint16(offset + 2 + i * 2, true) / 100);
+    }
+    obstacles = { rows, cols, distances };
+  }
+  return {
+    seq: view.getUint32(6, true),
+    width: view.getUint16(2, true),
+    height: view.getUint16(4, true),
+    detections,
+    obstacles,
+  };
+}
+
 export class JetsonAPI {
   private ws: WebSocket | null = null;
+  private detectionsWs: WebSocket | null = null;
   private pc: RTCPeerConnection | null = null;
   private videoTrack: MediaStreamTrack | null = null;
 
@@ -286,12 +346,26 @@ export class JetsonAPI {
     }
   }
 
+  // Subscribe to detections (boxes are no longer drawn into the video; draw them over it)
+  connectDetections(onDetections: (data: JetsonDetections) => void, adminToken?: string): WebSocket {
+    this.detectionsWs?.close();
+    const query = adminToken ? `?token=${encodeURIComponent(adminToken)}` : "";
+    const ws = new WebSocket(`${JETSON_WS_URL}/ws/detections${query}`);
+    ws.binaryType = "arraybuffer";
+    ws.onmessage = (event) => onDetections(decodeDetections(event.data));
+    ws.onerror = (error) => console.error("[JetsonAPI] Detections WebSocket error:", error);
+    this.detectionsWs = ws;
+    return ws;
+  }
+
   // Disconnect WebSocket
   disconnect() {
     if (this.ws) {
       this.ws.close();
       this.ws = null;
     }
+    this.detectionsWs?.close();
+    this.detectionsWs = null;
     this.disconnectVideoStream();
   }
 }